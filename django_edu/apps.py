@@ -0,0 +1,51 @@
+"""
+Application config: database connection setup and cached roles invalidation.
+"""
+
+from typing import Any
+
+from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from django_edu import metrics, roles
+
+
+def configure_sqlite(sender: Any, connection: BaseDatabaseWrapper, **kwargs: Any) -> None:
+    """
+    Let readers and a writer work concurrently: waiting for locks instead of
+    'database is locked' errors, and no fsync on every commit (the WAL journal,
+    set by migration 0017 once, as it is kept in the db, keeps the db consistent).
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA busy_timeout={int(settings.DB_SQLITE_BUSY_TIMEOUT)}')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+
+
+def count_queries(sender: Any, connection: BaseDatabaseWrapper, **kwargs: Any) -> None:
+    """ Count queries of requests on every connection, see metrics.MetricsMiddleware. """
+    if metrics.count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(metrics.count_queries)
+
+
+class DjangoEduConfig(AppConfig):
+    """ django_edu application. """
+    name = 'django_edu'
+
+    def ready(self) -> None:
+        # pylint: disable-next=import-outside-toplevel
+        from django.contrib.auth.models import Group, User
+
+        connection_created.connect(configure_sqlite,
+                                   dispatch_uid='django_edu.configure_sqlite')
+        connection_created.connect(count_queries, dispatch_uid='django_edu.count_queries')
+        # membership of users in groups and groups themselves (i.e. renamed ones)
+        m2m_changed.connect(roles.roles_changed, sender=User.groups.through,
+                            dispatch_uid='django_edu.roles_changed')
+        for signal in (post_save, post_delete):
+            signal.connect(roles.roles_changed, sender=Group,
+                           dispatch_uid='django_edu.roles_changed')
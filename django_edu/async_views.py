@@ -0,0 +1,166 @@
+"""
+Async versions of the contests, tasks and tests pages, routed instead of the sync
+ones if settings.ASYNC_VIEWS is set (under ASGI, see django_edu/asgi.py).
+Data is read with the async ORM and code answers are checked by Checker.acheck(),
+so a single worker serves many pages and test runs at a time.
+Sessions and templates are synchronous in Django: they are run by sync_to_async().
+Forms, that edit contests, tasks and tests, are handled by the sync views.
+"""
+
+from typing import Any, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import HttpRequest, HttpResponse, HttpResponseNotFound
+from django.utils.translation import gettext as _
+
+from django_edu import pagecache, views
+from django_edu.checker import Checker
+from django_edu.judge import ajudge
+from django_edu.models import Contest, Submission, Task, Test
+from django_edu.pagination import KeysetPage, acount_before, akeyset_page, parse_key
+from django_edu.runner import DEFAULT_LANGUAGE
+
+_render = sync_to_async(views.render)
+
+
+@sync_to_async
+def _page_context(request: HttpRequest) -> dict[str, Any]:
+    """ Context of a page: base_page actions are handled, login details are set. """
+    views.handle_misc_actions(request)
+    return views.init_login_context(request, {})
+
+
+@sync_to_async
+def _tasks_page_state(request: HttpRequest, contest_id: int,
+                      task_num: int) -> tuple[dict[str, Any], int]:
+    """ Context of a tasks page with the answer form type and the active task number. """
+    views.handle_misc_actions(request)
+    context = views.init_login_context(request, {})
+    views.init_ans_type_context(request, context)
+    return context, views.active_task_num(request, contest_id, task_num)
+
+
+@sync_to_async
+def _tests_page_context(request: HttpRequest) -> dict[str, Any]:
+    """ Context of a tests page, the previous page is saved to return to. """
+    views.handle_misc_actions(request)
+    views.update_session(request, 'tests_prev_page',
+                         request.META.get('HTTP_REFERER', '/'))
+    return views.init_login_context(request, {})
+
+
+async def contests(request: HttpRequest) -> HttpResponse:
+    """ Contests page, see views.contests(). """
+    if request.method == 'POST':
+        return await sync_to_async(views.contests)(request)
+    context = await _page_context(request)
+    after = parse_key(request.GET.get('after'), 1)
+    before = parse_key(request.GET.get('before'), 1)
+
+    async def load_page() -> dict[str, Any]:
+        page: KeysetPage[tuple[int, str]] = await akeyset_page(
+            Contest.objects.values_list('id', 'name'), ('id',),
+            lambda row: (row[0],), views.CONTESTS_PER_PAGE, after, before)
+        return views.contests_page_context(page)
+
+    contests_page = await pagecache.aget_or_load(pagecache.CONTESTS,
+                                                 f'list:{after}:{before}', load_page)
+    context.update(contests_page or {})
+    if len(context["contest_list"]) == 0:
+        context["contest_list_is_empty"] = True
+    return await _render(request, "contests.html", context=context)
+
+
+async def submit(request: HttpRequest, task: Task, ans: str,
+                 language: str = DEFAULT_LANGUAGE) -> Submission:
+    """ views.submit() for async views: answers are checked by ajudge(). """
+    user = await request.auser()
+    submission = Submission(task=task, code=ans, language=language)
+    if isinstance(user, get_user_model()):
+        submission.user = user
+    if settings.JUDGE_ASYNC and task.ans_type == Task.AnsType.code:
+        await submission.asave()
+    else:
+        await ajudge(submission)
+    if submission.user is None:
+        await sync_to_async(views.remember_submission)(request, submission)
+    return submission
+
+
+async def contest_tasks(contest_id: int) -> tuple[int, Optional[list[views.TaskRow]]]:
+    """ views.contest_tasks() for async views. """
+    scope = pagecache.contest_scope(contest_id)
+
+    async def load() -> Optional[list[views.TaskRow]]:
+        if not await Contest.objects.filter(id=contest_id).aexists():
+            return None
+        return [task async for task in Task.objects.filter(linked_contest_id=contest_id)
+                .order_by('position', 'id').values('id', 'name', 'ans_type')]
+
+    contest_version = await pagecache.aversion(scope)
+    return contest_version, await pagecache.aget_or_load(scope, 'tasks', load,
+                                                         contest_version)
+
+
+async def tasks(request: HttpRequest, contest_id: int, task_num: int = 0) -> HttpResponse:
+    """ Tasks page, see views.tasks(): only answers are checked here. """
+    if request.method == 'POST' and request.POST.get('form_descr') != 'task_ans':
+        return await sync_to_async(views.tasks)(request, contest_id, task_num)
+    contest_version, tasks_list = await contest_tasks(contest_id)
+    if tasks_list is None:
+        return HttpResponseNotFound(_('<h1>Contest not found</h1>'))
+    context, cur_active = await _tasks_page_state(request, contest_id, task_num)
+
+    if request.method == 'POST':
+        task_id_str = request.POST.get('task_ans_id')
+        task_ans = request.POST.get('task_ans')
+        if task_id_str is None or task_ans is None:
+            raise RuntimeError('HTML Template is broken')
+        task_language = request.POST.get('task_ans_language', DEFAULT_LANGUAGE)
+        task = await Task.objects.aget(id=int(task_id_str))
+        try:
+            Checker.validate_ans(task_ans, task_language)
+        except Checker.CheckerAnsException as e:
+            context['ans_error'] = str(e)
+        else:
+            if task.ans_type == Task.AnsType.code:
+                # the session is loaded already, by _tasks_page_state()
+                views.update_session(request, 'ans_language', task_language)
+                context['ans_language'] = task_language
+            submission = await submit(request, task, task_ans, task_language)
+            views.init_submission_context(submission, context)
+
+    task_id = views.init_tasks_context(context, contest_id, contest_version, tasks_list,
+                                       cur_active)
+    if task_id is not None:
+        context['task_text'] = await pagecache.aget_or_load(
+            pagecache.contest_scope(contest_id), f'text:{task_id}',
+            Task.objects.filter(id=task_id).values_list('text', flat=True).afirst,
+            contest_version
+        )
+    return await _render(request, "tasks.html", context=context)
+
+
+async def tests(request: HttpRequest, task_id: int) -> HttpResponse:
+    """ Tests for a task editing page, see views.tests(): changes are made there. """
+    if request.method == 'POST':
+        return await sync_to_async(views.tests)(request, task_id)
+    task = await Task.objects.filter(id=task_id).afirst()
+    if task is None:
+        return HttpResponseNotFound(_('<h1>Task not found</h1>'))
+    context = await _tests_page_context(request)
+    context['task_text'] = task.text
+    context['task_name'] = task.name
+
+    page = await akeyset_page(Test.with_heads(task.test_set.all()), views.TESTS_ORDER,
+                              views.test_key, views.TESTS_PER_PAGE,
+                              parse_key(request.GET.get('after'), 2),
+                              parse_key(request.GET.get('before'), 2))
+    first_test_num = 1
+    if page.rows:
+        first_test_num += await acount_before(task.test_set.all(), views.TESTS_ORDER,
+                                              views.test_key(page.rows[0]))
+    views.init_tests_page_context(context, task, page, first_test_num)
+    return await _render(request, "tests.html", context=context)
@@ -2,107 +2,234 @@
 Checker that checks task's solutions
 """
 
-import subprocess
-from typing import Tuple
-from abc import ABC, abstractmethod
-from django.utils.translation import gettext as _
+import asyncio
+import contextvars
+import hashlib
+import signal
+import threading
+import time
+import weakref
+from contextlib import ExitStack, aclosing
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from functools import partial
+from typing import Any, AsyncGenerator, Callable, Iterator, NamedTuple, Optional
+from django.conf import settings
+from django.core.cache import caches
+from django.db import models
+from django.utils.translation import gettext as _, gettext_lazy
 
+from django_edu import metrics, outputs, testdata
+from django_edu.comparators import AbstractComparator, Expected, get_comparator
 from django_edu.models import Task
 from django_edu.models import Test
+from django_edu.runner import (DEFAULT_LANGUAGE, LANGUAGES, AsyncSpawnRunner,
+                               CompiledSolution, CompileError, CompilerFailure, Limits,
+                               RunResult, Stdin, compile_solution, get_runner)
 
+# Process-wide cap on simultaneously running solutions, shared by all checkers.
+_SANDBOX_SLOTS = threading.BoundedSemaphore(settings.CHECKER_MAX_SANDBOXES)
+# The same cap for async checks of every event loop (asyncio semaphores are bound
+# to a loop).
+_async_sandbox_slots: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop,
+                                                asyncio.Semaphore]
+_async_sandbox_slots = weakref.WeakKeyDictionary()
 
-class AbstractTemplate(ABC):
+
+def _async_slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _async_sandbox_slots.get(loop)
+    if slots is None:
+        slots = _async_sandbox_slots[loop] = asyncio.Semaphore(
+            settings.CHECKER_MAX_SANDBOXES)
+    return slots
+
+
+class Verdict(models.TextChoices):
+    """ Enum in fact, representing a single test outcome """
+    ok = 'OK', gettext_lazy('Accepted')
+    wrong_answer = 'WA', gettext_lazy('Wrong answer')
+    time_limit = 'TLE', gettext_lazy('Time limit exceeded')
+    memory_limit = 'MLE', gettext_lazy('Memory limit exceeded')
+    output_limit = 'OLE', gettext_lazy('Output limit exceeded')
+    runtime_error = 'RE', gettext_lazy('Runtime error')
+
+
+# Lines of outputs, that are shown around their first difference, and their length.
+REPORT_CONTEXT_LINES = 2
+REPORT_LINE_LENGTH = 200
+# Characters of the end of solution stderr, that are shown.
+REPORT_STDERR_LENGTH = 2000
+
+
+class TestStatus(NamedTuple):
     """
-    Interface for a template.
-    A template is some info that can be represented in different ways.
-    Methods here define these ways.
+    A single test status.
+    time (cpu seconds, wall clock where not accounted) and max_rss (KiB) are not shown
+    if negative.
+    """
+    test_num: int
+    verdict: Verdict
+    time: float = -1
+    max_rss: int = -1
+
+    @property
+    def passed(self) -> bool:
+        """ Whether the test is passed. """
+        return self.verdict == Verdict.ok
+
+    @property
+    def memory(self) -> float:
+        """ max_rss in MiB. """
+        return self.max_rss / 1024
+
+
+class Mismatch(NamedTuple):
+    """
+    Outputs of a failed test around their first difference (line, from 1):
+    REPORT_CONTEXT_LINES lines around it, starting with first_line, and the end
+    of stderr. The whole received output is kept as received_file (see outputs.py),
+    if it does not fit into the excerpt. note is why the run has been stopped:
+    'timed_out', 'output_exceeded', 'rejected' or ''.
     """
-    @abstractmethod
-    def to_html(self) -> str:
-        """ Return html representation """
-
-
-class TemplateGlobalStatus(AbstractTemplate):
-    """ A template for overall status of a task check. """
-    succeeded: bool
-    tests_amount: int
-    passed_amount: int
-
-    def __init__(self, succeded: bool, tests_amount: int = -1, passed_amount: int = -1):
-        self.succeeded = succeded
-        self.passed_amount = passed_amount
-        self.tests_amount = tests_amount
-
-    def to_html(self) -> str:
-        res = ''
-        if self.succeeded is True:
-            res += _('<p><strong>Passed!</strong></p>')
-        else:
-            res += _('<p><strong>Failed!</strong></p>')
-        if self.tests_amount >= 0:
-            res += _('<p>{passed} tests out of {total} passed.</p>').format(
-                passed=self.passed_amount,
-                total=self.tests_amount
-            )
-        return res
-
-
-class TemplateTestStatus(AbstractTemplate):
-    """ A template for a single test status. """
-    succeeded: bool
     test_num: int
+    test_id: int
+    line: int
+    first_line: int
+    received: str
+    expected: str
+    stderr: str
+    note: str
+    received_file: Optional[str]
+    expected_cut: bool
+
+
+class Report(NamedTuple):
+    """
+    Check report: a compact record, that is cached with the verdict and saved
+    with the submission (see to_json()), it is rendered by the report.html template.
+    tests_amount is -1 if the answer is not run on tests, error is why the answer
+    can not be checked at all. Code answers are compiled (to binary_size bytes)
+    from language in compile_time seconds, binary_size is -1 if they are not.
+    """
+    passed: bool
+    tests_amount: int = -1
+    passed_amount: int = -1
+    tests: tuple[TestStatus, ...] = ()
+    mismatches: tuple[Mismatch, ...] = ()
+    compile_error: str = ''
+    error: str = ''
+    language: str = ''
+    compile_time: float = -1
+    binary_size: int = -1
+
+    @property
+    def language_label(self) -> str:
+        """ Name of the language to show. """
+        language = LANGUAGES.get(self.language)
+        return language.label if language is not None else self.language
+
+    @property
+    def binary_kib(self) -> float:
+        """ binary_size in KiB. """
+        return self.binary_size / 1024
+
+    def results(self) -> list[tuple[TestStatus, Optional[Mismatch]]]:
+        """ Test statuses with the mismatches of failed tests, for templates. """
+        mismatches = {mismatch.test_num: mismatch for mismatch in self.mismatches}
+        return [(status, mismatches.get(status.test_num)) for status in self.tests]
 
-    def __init__(self, succeded: bool, test_num: int):
-        self.succeeded = succeded
-        self.test_num = test_num
-
-    def to_html(self) -> str:
-        if self.succeeded is True:
-            return _(
-                '<div class="container d-flex">'
-                '   <div>Test {n}: </div>'
-                '   <div class="text-ok">OK</div>'
-                '</div>'
-            ).format(n=self.test_num)
-        return _(
-            '<div class="container d-flex">'
-            '   <div>Test {n}: </div>'
-            '   <div class="text-fail">FAIL</div>'
-            '</div>'
-        ).format(n=self.test_num)
-
-
-class TemplateTestReport(AbstractTemplate):
-    """ A template for a test verbose report. """
-    test: Test
-    received_output: str
-
-    def __init__(self, test: Test, received_output: str):
-        self.test = test
-        self.received_output = received_output
-
-    def to_html(self) -> str:
-        return _(
-            '<table class="table table-sm table-bordered-black">'
-            '   <thead class="table-bordered-black">'
-            '       <tr class="table-bordered-black">'
-            '           <th class="table-bordered-black" scope="col">Received</th>'
-            '           <th class="table-bordered-black" scope="col">Expected</th>'
-            '       </tr>'
-            '   </thead>'
-            '   <tbody class="table-bordered-black">'
-            '   <tr class="table-bordered-black">'
-            '       <td class="table-bordered-black">'
-            '           <span class="test-io-full multiline-text">{received}</span>'
-            '       </td>'
-            '       <td class="table-bordered-black">'
-            '           <span class="test-io-full multiline-text">{expected}</span>'
-            '       </td>'
-            '   </tr>'
-            '   </tbody>'
-            '</table>'
-        ).format(received=self.received_output,
-                 expected=self.test.test_output)
+    def to_json(self) -> dict[str, Any]:
+        """ The report as json data, records are arrays there. """
+        return self._asdict()
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> 'Report':
+        """ The report, saved by to_json(). """
+        return cls(**{
+            **data,
+            'tests': tuple(TestStatus(num, Verdict(verdict), run_time, max_rss)
+                           for num, verdict, run_time, max_rss in data.get('tests', ())),
+            'mismatches': tuple(Mismatch(*mismatch)
+                                for mismatch in data.get('mismatches', ())),
+        })
+
+
+class TestResult(NamedTuple):
+    """
+    Outcome of a solution on a single test, mismatch is None for passed tests.
+    time is cpu seconds (wall clock where not accounted), max_rss is KiB, 0 if unknown.
+    """
+    verdict: Verdict
+    mismatch: Optional[Mismatch]
+    time: float
+    max_rss: int
+
+    @property
+    def passed(self) -> bool:
+        """ Whether the test is passed. """
+        return self.verdict == Verdict.ok
+
+
+def _excerpt(lines: list[str], start: int, end: int) -> tuple[str, bool]:
+    """ Lines from start to end, long ones cut; whether it is not the whole text. """
+    excerpt = lines[start:end]
+    cut = [line if len(line) <= REPORT_LINE_LENGTH else line[:REPORT_LINE_LENGTH] + '...'
+           for line in excerpt]
+    return '\n'.join(cut), cut != lines
+
+
+def find_mismatch(received: str,
+                  expected: str) -> tuple[int, int, tuple[str, bool], tuple[str, bool]]:
+    """
+    The first line (from 1), that differs (whitespace around lines is ignored),
+    the first line of excerpts around it and the excerpts (see _excerpt())
+    of received and expected outputs.
+    """
+    received_lines = received.splitlines()
+    expected_lines = expected.splitlines()
+    for idx, (got, want) in enumerate(zip(received_lines, expected_lines)):
+        if got.strip() != want.strip():
+            break
+    else:
+        # the shorter output is the beginning of the longer one, or none differs
+        # (i.e. the run has failed): then excerpts are from the start
+        idx = min(len(received_lines), len(expected_lines))
+        if len(received_lines) == len(expected_lines):
+            idx = 0
+    start = max(0, idx - REPORT_CONTEXT_LINES)
+    end = idx + REPORT_CONTEXT_LINES + 1
+    return (idx + 1, start + 1, _excerpt(received_lines, start, end),
+            _excerpt(expected_lines, start, end))
+
+
+# Called with every test status as soon as the test is finished.
+ProgressCallback = Callable[[TestStatus], None]
+
+
+class _TimedComparator:
+    """ Comparator of a run, that sums up the time spent in it. """
+    comparator: AbstractComparator
+    time: float
+
+    def __init__(self, comparator: AbstractComparator) -> None:
+        self.comparator = comparator
+        self.time = 0.0
+
+    def feed(self, chunk: bytes) -> bool:
+        """ Runner output consumer. """
+        start = time.perf_counter()
+        try:
+            return self.comparator.feed(chunk)
+        finally:
+            self.time += time.perf_counter() - start
+
+    def finish(self) -> 'Verdict':
+        """ Verdict for a run, that has finished fine. """
+        start = time.perf_counter()
+        try:
+            return Verdict.ok if self.comparator.finish() else Verdict.wrong_answer
+        finally:
+            self.time += time.perf_counter() - start
 
 
 class Checker:
@@ -111,77 +238,384 @@ class Checker:
 
     Attributes
     ----------
-    report : list[AbstractTemplate]
-        Report about check process in form of a list of templates.
+    report : Report
+        Report about the check process, complete after a check.
+    workers : int
+        Amount of tests of a single check that may run simultaneously.
+    fail_fast : bool
+        Stop running tests after the first failed one.
+    timed_out : bool
+        Some test or the compiler has timed out (or the compiler has failed):
+        the result may depend on the server load, so it is not cached.
     """
     class CheckerAnsException(ValueError):
         """ Provide ability to detect specific error """
 
-    report: list[AbstractTemplate]
+    report: Report
+    workers: int
+    fail_fast: bool
+    timed_out: bool
 
-    def __init__(self) -> None:
+    def __init__(self, workers: Optional[int] = None,
+                 fail_fast: Optional[bool] = None) -> None:
         # FEATURE: create isolated env?
         # or leave creation to run_code_test method
-        self.report = []
+        self.report = Report(False)
+        self.tests: list[TestStatus] = []
+        self.mismatches: list[Mismatch] = []
+        self.workers = settings.CHECKER_WORKERS if workers is None else workers
+        self.fail_fast = settings.CHECKER_FAIL_FAST if fail_fast is None else fail_fast
+        self.timed_out = False
 
-    def html_report(self) -> str:
-        """ generate html report from templates (report attr). """
-        res = ''
-        for template in self.report:
-            res += template.to_html() + '\n'
-        return res
-
-    def check(self, task: Task, ans: str) -> bool:
-        """ Check if ans for the task is correct. """
+    @classmethod
+    def validate_ans(cls, ans: str, language: str = DEFAULT_LANGUAGE) -> None:
+        """ Raise CheckerAnsException if ans can not be checked at all. """
         if len(ans) == 0:
-            raise self.CheckerAnsException(_('Answer for a task must not be empty'))
+            raise cls.CheckerAnsException(_('Answer for a task must not be empty'))
+        if language not in LANGUAGES:
+            raise cls.CheckerAnsException(_('Unknown language of the answer'))
+
+    def check(self, task: Task, ans: str, progress: Optional[ProgressCallback] = None,
+              language: str = DEFAULT_LANGUAGE) -> bool:
+        """
+        Check if ans for the task is correct, code ans is in language (see LANGUAGES).
+        progress is called with every test status as soon as the test is finished,
+        in the order of tests.
+        """
+        self.validate_ans(ans, language)
         if task.ans_type == Task.AnsType.text:
             # None in ref_ans is impossible by Task design
             passed = (ans.strip() == task.ref_ans.strip())  # type: ignore[union-attr]
-            self.report.append(TemplateGlobalStatus(passed))
+            self.report = Report(passed)
         elif task.ans_type == Task.AnsType.code:
-            passed = True
-            num_failed = 0
-
-            for test_num, test_id in enumerate(task.tests):
-                test = Test.objects.get(id=test_id)
-                test_passed, received, expected = self.run_code_test(ans, test)
-                self.report.append(TemplateTestStatus(test_passed, test_num + 1))
-                if test_passed is False:
-                    passed = False
-                    num_failed += 1
-                    # FEATURE: open and closed tests
-                    self.report.append(TemplateTestReport(test, received))
-
-            self.report.insert(0, TemplateGlobalStatus(passed,
-                                                       len(task.tests),
-                                                       len(task.tests) - num_failed))
+            verdicts = caches['verdicts']
+            key = self.verdict_key(task, ans, language)
+            cached: Optional[Report] = verdicts.get(key)
+            if cached is not None and self.outputs_kept(cached):
+                self.report = cached
+                return cached.passed
+            passed = self.check_code(task, ans, progress, language)
+            if not self.timed_out:
+                verdicts.set(key, self.report)
+        return passed
+
+    async def acheck(self, task: Task, ans: str,
+                     progress: Optional[ProgressCallback] = None,
+                     language: str = DEFAULT_LANGUAGE) -> bool:
+        """
+        check() for event loops: tests are run as asyncio subprocesses
+        (see AsyncSpawnRunner), whatever settings.CHECKER_BACKEND is.
+        """
+        if task.ans_type != Task.AnsType.code:
+            return self.check(task, ans, progress, language)
+        self.validate_ans(ans, language)
+        verdicts = caches['verdicts']
+        key = self.verdict_key(task, ans, language)
+        cached: Optional[Report] = await verdicts.aget(key)
+        # a few stat calls, not worth a thread
+        if cached is not None and self.outputs_kept(cached):
+            self.report = cached
+            return cached.passed
+        passed = await self.acheck_code(task, ans, progress, language)
+        if not self.timed_out:
+            await verdicts.aset(key, self.report)
         return passed
 
-    def run_code_test(self, code: str, test: Test) -> Tuple[bool, str, str]:
+    @staticmethod
+    def outputs_kept(report: Report) -> bool:
+        """
+        Received outputs of the cached report are kept (and are kept anew),
+        otherwise it is checked again: its download links would be broken.
+        """
+        return all(outputs.keep(mismatch.received_file) for mismatch in report.mismatches
+                   if mismatch.received_file is not None)
+
+    @staticmethod
+    def verdict_key(task: Task, ans: str, language: str = DEFAULT_LANGUAGE) -> str:
+        """
+        Cache key for the check result of ans: it is the same for equivalent code
+        while task tests are not changed.
+        """
+        # python reads '\r\n' as '\n' everywhere, even in string literals,
+        # and so do C and C++ compilers
+        normalized = ans.replace('\r\n', '\n').rstrip()
+        digest = hashlib.sha256(normalized.encode('utf-8', errors='surrogatepass'))
+        return f'verdict:{task.id}:{task.tests_version}:{language}:{digest.hexdigest()}'
+
+    def check_code(self, task: Task, ans: str,
+                   progress: Optional[ProgressCallback] = None,
+                   language: str = DEFAULT_LANGUAGE) -> bool:
+        """ Check code ans on task tests, see check(). """
+        tests = task.get_tests()
+        solution = self.compile_ans(ans, language)
+        if solution is None:
+            return False
+        num_passed = 0
+        results = self.iter_code_tests(solution, task, tests)
+        for test_num, result in enumerate(results):
+            num_passed += self.add_result(test_num + 1, result, progress)
+        return self.add_summary(len(tests), num_passed)
+
+    async def acheck_code(self, task: Task, ans: str,
+                          progress: Optional[ProgressCallback] = None,
+                          language: str = DEFAULT_LANGUAGE) -> bool:
+        """ Check code ans on task tests, see acheck(). """
+        tests = [test async for test in task.test_set.order_by('position', 'id')]
+        # compilers are run as subprocesses: not to block the loop
+        solution = await asyncio.to_thread(self.compile_ans, ans, language)
+        if solution is None:
+            return False
+        num_passed = 0
+        test_num = 0
+        async with aclosing(self.aiter_code_tests(solution, task, tests)) as results:
+            async for result in results:
+                num_passed += self.add_result(test_num + 1, result, progress)
+                test_num += 1
+        return self.add_summary(len(tests), num_passed)
+
+    def compile_ans(self, ans: str, language: str) -> Optional[CompiledSolution]:
+        """
+        Compile code ans once for all tests, None (reported) if it can not be compiled.
+        The compile time (next to nothing if the solution is cached) and
+        the size of the compiled solution are reported apart from test runs.
+        """
+        start = time.perf_counter()
+        try:
+            with metrics.span('compile'):
+                solution = compile_solution(ans, language)
+        except CompileError as e:
+            if isinstance(e, CompilerFailure):
+                self.timed_out = True
+            # no test can pass: do not run any
+            self.report = Report(False, compile_error=str(e), language=language,
+                                 compile_time=time.perf_counter() - start)
+            return None
+        self.report = Report(False, language=language,
+                             compile_time=time.perf_counter() - start,
+                             binary_size=solution.size)
+        return solution
+
+    def add_result(self, test_num: int, result: TestResult,
+                   progress: Optional[ProgressCallback]) -> bool:
+        """ Report a test result, return whether the test is passed. """
+        test_status = TestStatus(test_num, result.verdict, result.time, result.max_rss)
+        self.tests.append(test_status)
+        if progress is not None:
+            progress(test_status)
+        if result.mismatch is not None:
+            # FEATURE: open and closed tests
+            self.mismatches.append(result.mismatch._replace(test_num=test_num))
+        return result.passed
+
+    def add_summary(self, tests_amount: int, num_passed: int) -> bool:
+        """ Complete the report with the overall status, return it. """
+        # with fail_fast not all tests may be run
+        passed = num_passed == tests_amount
+        self.report = self.report._replace(passed=passed, tests_amount=tests_amount,
+                                           passed_amount=num_passed,
+                                           tests=tuple(self.tests),
+                                           mismatches=tuple(self.mismatches))
+        return passed
+
+    def iter_code_tests(self, solution: CompiledSolution, task: Task,
+                        tests: list[Test]) -> Iterator[TestResult]:
+        """
+        Run code on tests, up to self.workers tests at a time.
+        Results are yielded in the order of tests, as soon as they are ready.
+        With fail_fast, iteration stops after the first failed test
+        and tests that have not started yet are cancelled.
+        """
+        if self.workers <= 1 or len(tests) <= 1:
+            for test in tests:
+                result = self.run_code_test(solution, task, test)
+                yield result
+                if self.fail_fast and not result.passed:
+                    return
+            return
+
+        pool = ThreadPoolExecutor(max_workers=min(self.workers, len(tests)))
+        try:
+            # pool threads must add spans to breakdowns of this thread
+            futures = [pool.submit(contextvars.copy_context().run,
+                                   self.run_code_test, solution, task, test)
+                       for test in tests]
+            for idx, future in enumerate(futures):
+                while not future.done():
+                    wait([f for f in futures[idx:] if not f.done()],
+                         return_when=FIRST_COMPLETED)
+                    if self.fail_fast:
+                        self._cancel_after_failure(futures)
+                result = future.result()
+                yield result
+                if self.fail_fast and not result.passed:
+                    return
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    async def aiter_code_tests(self, solution: CompiledSolution, task: Task,
+                               tests: list[Test]) -> AsyncGenerator[TestResult, None]:
+        """ iter_code_tests() for event loops: runs are asyncio tasks, not threads. """
+        slots = asyncio.Semaphore(max(self.workers, 1))
+
+        async def run(test: Test) -> TestResult:
+            async with slots:
+                return await self.arun_code_test(solution, task, test)
+
+        runs = [asyncio.create_task(run(test)) for test in tests]
+
+        def cancel_after(idx: int, done: 'asyncio.Task[TestResult]') -> None:
+            if (not done.cancelled() and done.exception() is None
+                    and not done.result().passed):
+                for later in runs[idx + 1:]:
+                    later.cancel()
+
+        if self.fail_fast:
+            for idx, test_run in enumerate(runs):
+                test_run.add_done_callback(partial(cancel_after, idx))
+        try:
+            for test_run in runs:
+                result = await test_run
+                yield result
+                if self.fail_fast and not result.passed:
+                    return
+        finally:
+            for test_run in runs:
+                test_run.cancel()
+            await asyncio.gather(*runs, return_exceptions=True)
+
+    @staticmethod
+    def _cancel_after_failure(futures: list[Future[TestResult]]) -> None:
+        """ Cancel not started tests, that follow the first finished failed one. """
+        for idx, future in enumerate(futures):
+            if future.done() and not future.cancelled() and not future.result().passed:
+                for later in futures[idx + 1:]:
+                    later.cancel()
+                return
+
+    def run_code_test(self, solution: CompiledSolution, task: Task,
+                      test: Test) -> TestResult:
         """
-        Run test code.
+        Run test code under resource limits from settings,
+        comparing its output with the task comparator as it arrives.
         This functionality is in fact DEMO, as code is run under the server's privileges
         and in the server's environment which can lead to dramatic damage.
         TODO: isolated env with limited privileges (unprivileged user in a container).
-        FEATURE: other languages besides Python.
-        """
-        timedout = False
-        status = False
-        with (subprocess.Popen(args=['python3', '-c', code],
-                               stdin=subprocess.PIPE,
-                               stdout=subprocess.PIPE,
-                               stderr=subprocess.STDOUT)) as proc:
-            try:
-                out, err = proc.communicate(input=test.test_input.encode('utf-8'),
-                                            timeout=3)
-            except subprocess.TimeoutExpired:
-                proc.kill()
-                out, err = proc.communicate()
-                timedout = True
-            out_str = out.decode('utf-8').strip()
-            if (out_str == test.test_output.strip()) and not timedout:
-                status = True
-            if timedout is True:
-                out_str += _('\nTimed out...')
-            return status, out_str, test.test_output.strip()
+        """
+        with ExitStack() as stack:
+            stdin, limits, comparator = self.prepare_test(stack, task, test)
+            with _SANDBOX_SLOTS:
+                result = get_runner().run(solution, stdin, limits, comparator.feed)
+                self.add_run_spans(result, comparator)
+                failed = self.classify(result, limits)
+                # a custom checker runs like a solution: in the same slot
+                verdict = failed if failed is not None else comparator.finish()
+            metrics.add_span('compare', comparator.time)
+        return self.test_result(test, result, verdict)
+
+    async def arun_code_test(self, solution: CompiledSolution, task: Task,
+                             test: Test) -> TestResult:
+        """ run_code_test() for event loops. """
+        with ExitStack() as stack:
+            stdin, limits, comparator = self.prepare_test(stack, task, test)
+            async with _async_slots():
+                result = await AsyncSpawnRunner().run(solution, stdin, limits,
+                                                      comparator.feed)
+                self.add_run_spans(result, comparator)
+                failed = self.classify(result, limits)
+                # custom checkers are run synchronously
+                verdict = (failed if failed is not None
+                           else await asyncio.to_thread(comparator.finish))
+            metrics.add_span('compare', comparator.time)
+        return self.test_result(test, result, verdict)
+
+    @staticmethod
+    def prepare_test(stack: ExitStack, task: Task,
+                     test: Test) -> tuple[Stdin, Limits, _TimedComparator]:
+        """
+        Input, limits and comparator for a run on test, limits are from settings.
+        Files, that are opened, are closed by stack.
+        """
+        limits = Limits.from_settings()
+        # large test data is stored in files: the input file is given
+        # to the solution as is, the output one is mapped for comparison
+        stdin: Stdin = test.test_input.encode('utf-8')
+        if test.input_file is not None:
+            stdin = stack.enter_context(testdata.open_file(test.input_file)).fileno()
+        expected: Expected = test.test_output.encode('utf-8')
+        if test.output_file is not None:
+            expected = stack.enter_context(testdata.mapped(test.output_file))
+        if limits.output:
+            # right output must fit, even with some extra whitespace
+            limits = limits._replace(output=max(limits.output, 2 * len(expected)))
+        comparator = get_comparator(task, test, expected, limits)
+        return stdin, limits, _TimedComparator(comparator)
+
+    @staticmethod
+    def add_run_spans(result: RunResult, comparator: _TimedComparator) -> None:
+        """ Record spawn and run spans of a run, excluding the comparison time. """
+        metrics.add_span('spawn', result.spawn_time)
+        metrics.add_span('run', result.time - result.spawn_time - comparator.time)
+
+    def test_result(self, test: Test, result: RunResult, verdict: Verdict) -> TestResult:
+        """ Result of test for a run and its verdict. """
+        if result.timed_out is True:
+            self.timed_out = True
+        mismatch = None
+        if verdict != Verdict.ok:
+            mismatch = self.mismatch(test, result)
+        return TestResult(verdict, mismatch, result.cpu_time or result.time,
+                          result.max_rss)
+
+    @staticmethod
+    def mismatch(test: Test, result: RunResult) -> Mismatch:
+        """
+        Outputs of a failed run on test around their first difference,
+        test_num is set by add_result().
+        """
+        received = result.out.decode('utf-8', errors='replace')
+        if test.output_file is None:
+            expected = test.test_output
+        else:
+            # the difference is within the received output or right after it
+            size = 2 * len(result.out) + 2**16
+            expected = testdata.read(test.output_file, size).decode('utf-8',
+                                                                    errors='replace')
+        line, first_line, received_part, expected_part = find_mismatch(received, expected)
+        received_excerpt, received_cut = received_part
+        expected_excerpt, expected_cut = expected_part
+        stderr = result.err.decode('utf-8', errors='replace').rstrip()
+        if len(stderr) > REPORT_STDERR_LENGTH:
+            stderr = '...' + stderr[-REPORT_STDERR_LENGTH:]
+        note = ''
+        if result.timed_out:
+            note = 'timed_out'
+        elif result.output_exceeded:
+            note = 'output_exceeded'
+        elif result.rejected:
+            note = 'rejected'
+        # whole outputs are downloaded on demand, see views.submission_output()
+        received_file = outputs.store(result.out) if received_cut else None
+        return Mismatch(0, test.id, line, first_line, received_excerpt, expected_excerpt,
+                        stderr, note, received_file, expected_cut)
+
+    @staticmethod
+    def classify(result: RunResult, limits: Limits) -> Optional[Verdict]:
+        """ Verdict for a run, that has failed whatever the output is, None otherwise. """
+        if result.output_exceeded:
+            return Verdict.output_limit
+        if result.rejected:
+            # killed on a wrong output
+            return Verdict.wrong_answer
+        # SIGXCPU is sent at the cpu time limit, it is missing on windows
+        cpu_killed = (hasattr(signal, 'SIGXCPU')
+                      and result.returncode == -signal.SIGXCPU)
+        if (result.timed_out or cpu_killed
+                or (limits.cpu_time and result.cpu_time >= limits.cpu_time)):
+            return Verdict.time_limit
+        if result.returncode != 0:
+            # allocations beyond the address space limit fail with MemoryError
+            lines = result.err.rstrip().rsplit(b'\n', 1)
+            if limits.memory and lines[-1].startswith(b'MemoryError'):
+                return Verdict.memory_limit
+            return Verdict.runtime_error
+        return None
@@ -0,0 +1,213 @@
+"""
+Comparators: ways to compare a solution output with the expected one.
+They consume the output as it arrives, so that a run can be stopped
+at the first mismatch. The expected output may be memory-mapped:
+it is not copied as a whole.
+"""
+
+import json
+import math
+import mmap
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Iterator, Optional, Union
+
+from django.conf import settings
+
+from django_edu.models import Task
+from django_edu.models import Test
+from django_edu.runner import CompileError, Limits, compile_solution, get_runner
+
+
+# Expected output, bytes or a memory-mapped file with them.
+Expected = Union[bytes, mmap.mmap]
+
+_TOKEN_RE = re.compile(rb'\S+')
+_LINE_RE = re.compile(rb'[^\n]+')
+
+
+class CheckerScriptError(ValueError):
+    """ Custom checker has failed, so the output can not be judged. """
+
+
+class AbstractComparator(ABC):
+    """ Interface for a comparator of a single run output. """
+    @abstractmethod
+    def feed(self, chunk: bytes) -> bool:
+        """ Consume next output chunk, return False if the output is already wrong. """
+
+    @abstractmethod
+    def finish(self) -> bool:
+        """ The output is complete: return whether it is correct. """
+
+
+class ExactComparator(AbstractComparator):
+    """ Output must be the expected one, except for leading and trailing whitespace. """
+    def __init__(self, expected: Expected) -> None:
+        self.expected = expected
+        first = _TOKEN_RE.search(expected)
+        self.pos = self.end = 0
+        if first is not None:
+            self.pos = first.start()
+            self.end = len(expected)
+            while expected[self.end - 1:self.end].isspace():
+                self.end -= 1
+        self.started = False
+
+    def feed(self, chunk: bytes) -> bool:
+        if not self.started:
+            chunk = chunk.lstrip()
+            self.started = bool(chunk)
+        head = chunk[:self.end - self.pos]
+        if head != self.expected[self.pos:self.pos + len(head)]:
+            return False
+        self.pos += len(head)
+        # only trailing whitespace may follow the expected output
+        return chunk[len(head):].strip() == b''
+
+    def finish(self) -> bool:
+        return self.pos == self.end
+
+
+class TokenComparator(AbstractComparator):
+    """ Output must consist of the expected tokens, whitespace is not significant. """
+    def __init__(self, expected: Expected) -> None:
+        self.expected = (match.group() for match in _TOKEN_RE.finditer(expected))
+        self.next_expected = next(self.expected, None)
+        # a token can be split between chunks
+        self.partial = b''
+
+    def tokens_equal(self, token: bytes, expected: bytes) -> bool:
+        """ Compare a complete token. """
+        return token == expected
+
+    def may_become_equal(self, partial: bytes, expected: bytes) -> bool:
+        """ Check if an incomplete token can still turn out to be the expected one. """
+        return expected.startswith(partial)
+
+    def feed(self, chunk: bytes) -> bool:
+        data = self.partial + chunk
+        tokens = data.split()
+        # the last token is incomplete, unless it is followed by whitespace
+        self.partial = b''
+        if tokens and not data[-1:].isspace():
+            self.partial = tokens.pop()
+        for token in tokens:
+            if (self.next_expected is None
+                    or not self.tokens_equal(token, self.next_expected)):
+                return False
+            self.next_expected = next(self.expected, None)
+        if self.partial:
+            return (self.next_expected is not None
+                    and self.may_become_equal(self.partial, self.next_expected))
+        return True
+
+    def finish(self) -> bool:
+        if self.partial and not self.feed(b' '):
+            return False
+        return self.next_expected is None
+
+
+class FloatComparator(TokenComparator):
+    """
+    Like TokenComparator, but numbers are equal if they differ by no more than
+    settings.CHECKER_FLOAT_EPSILON, absolute or relative.
+    """
+    def __init__(self, expected: Expected, epsilon: Optional[float] = None) -> None:
+        super().__init__(expected)
+        self.epsilon = settings.CHECKER_FLOAT_EPSILON if epsilon is None else epsilon
+
+    def tokens_equal(self, token: bytes, expected: bytes) -> bool:
+        try:
+            expected_num = float(expected)
+        except ValueError:
+            return token == expected
+        try:
+            num = float(token)
+        except ValueError:
+            return False
+        if math.isnan(expected_num) or math.isinf(expected_num):
+            return token.lower() == expected.lower()
+        return math.isclose(num, expected_num, rel_tol=self.epsilon, abs_tol=self.epsilon)
+
+    def may_become_equal(self, partial: bytes, expected: bytes) -> bool:
+        # '1.0' and '1' are equal numbers: prefixes tell nothing
+        return True
+
+
+class LineSetComparator(AbstractComparator):
+    """
+    Output must consist of the expected lines in any order.
+    Leading and trailing whitespace of lines and empty lines are not significant.
+    """
+    def __init__(self, expected: Expected) -> None:
+        self.missing = Counter(self._lines(expected))
+        self.partial = b''
+
+    @staticmethod
+    def _lines(data: Expected) -> Iterator[bytes]:
+        for match in _LINE_RE.finditer(data):
+            line = match.group().strip()
+            if line:
+                yield line
+
+    def feed(self, chunk: bytes) -> bool:
+        data, _newline, self.partial = (self.partial + chunk).rpartition(b'\n')
+        for line in self._lines(data):
+            if self.missing[line] <= 0:
+                return False
+            self.missing[line] -= 1
+        return True
+
+    def finish(self) -> bool:
+        if not self.feed(b'\n'):
+            return False
+        return not any(self.missing.values())
+
+
+class CustomComparator(AbstractComparator):
+    """
+    Task checker_code decides, it is run like a solution with json on stdin:
+    {"input": test input, "output": solution output, "expected": test output}.
+    Exit code 0 means the output is correct, 1 - wrong, anything else - checker failure.
+    """
+    def __init__(self, checker_code: str, test: Test, limits: Limits) -> None:
+        try:
+            self.checker = compile_solution(checker_code)
+        except CompileError as e:
+            raise CheckerScriptError(str(e)) from e
+        self.test = test
+        self.limits = limits
+        self.chunks: list[bytes] = []
+
+    def feed(self, chunk: bytes) -> bool:
+        self.chunks.append(chunk)
+        return True
+
+    def finish(self) -> bool:
+        data = json.dumps({
+            'input': self.test.input_text(),
+            'output': b''.join(self.chunks).decode('utf-8', errors='replace'),
+            'expected': self.test.output_text(),
+        })
+        result = get_runner().run(self.checker, data.encode('utf-8'), self.limits)
+        if result.returncode in (0, 1) and not result.timed_out:
+            return result.returncode == 0
+        output = result.out + result.err
+        raise CheckerScriptError(output.decode('utf-8', errors='replace'))
+
+
+def get_comparator(task: Task, test: Test, expected: Expected,
+                   limits: Limits) -> AbstractComparator:
+    """ Get a comparator for a run of the task solution on the test. """
+    if task.comparator == Task.Comparator.tokens:
+        return TokenComparator(expected)
+    if task.comparator == Task.Comparator.floats:
+        return FloatComparator(expected)
+    if task.comparator == Task.Comparator.lines:
+        return LineSetComparator(expected)
+    if task.comparator == Task.Comparator.custom:
+        # None in checker_code is impossible by Task design
+        return CustomComparator(task.checker_code, test, limits)  # type: ignore[arg-type]
+    return ExactComparator(expected)
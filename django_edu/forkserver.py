@@ -0,0 +1,164 @@
+"""
+Fork server: a warm Python interpreter, that runs solutions in forked children.
+Started by django_edu.runner.ForkServerRunner as
+
+    python forkserver.py <socket fd> [module to preload ...]
+
+Protocol over the unix socket, every frame is a 4-byte big-endian length + marshal data:
+    request: (marshalled code object or path to an executable, limits for set_limits()),
+             sent together with 3 fds: child's stdin, stdout and stderr
+    replies: ('started', pid), then ('exited', wait status, cpu seconds, max rss in KiB)
+Must not import django or anything from the project: it runs student code.
+"""
+
+import builtins
+import importlib
+import marshal
+import os
+import signal
+import socket
+import struct
+import sys
+import traceback
+from typing import Any, NoReturn, Union
+
+try:
+    import resource
+except ImportError:  # not POSIX
+    resource = None  # type: ignore[assignment]
+
+_LEN = struct.Struct('!I')
+
+
+def set_limits(cpu_time: int, memory: int, processes: int, file_size: int) -> None:
+    """
+    Limit resources of the current process, 0 is no limit:
+    cpu seconds, address space bytes, processes of the user (all of them are
+    counted, so it is for a dedicated uid) and written file bytes.
+    """
+    if resource is None:
+        return
+    if cpu_time:
+        # SIGXCPU at soft limit, SIGKILL at hard one, if SIGXCPU is handled
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_time, cpu_time + 1))
+    if memory:
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    if processes:
+        resource.setrlimit(resource.RLIMIT_NPROC, (processes, processes))
+    if file_size:
+        resource.setrlimit(resource.RLIMIT_FSIZE, (file_size, file_size))
+
+
+def send_frame(sock: socket.socket, obj: Any, fds: tuple[int, ...] = ()) -> None:
+    """ Send a marshal frame, optionally passing fds along with it. """
+    data = marshal.dumps(obj)
+    if fds:
+        socket.send_fds(sock, [_LEN.pack(len(data))], list(fds))
+        sock.sendall(data)
+    else:
+        sock.sendall(_LEN.pack(len(data)) + data)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise EOFError('fork server socket closed')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_frame(sock: socket.socket, maxfds: int = 0) -> tuple[Any, list[int]]:
+    """ Receive a marshal frame and fds passed along with it. """
+    fds: list[int] = []
+    if maxfds:
+        head, fds, _flags, _addr = socket.recv_fds(sock, _LEN.size, maxfds)
+        if not head:
+            raise EOFError('fork server socket closed')
+        head += _recv_exactly(sock, _LEN.size - len(head))
+    else:
+        head = _recv_exactly(sock, _LEN.size)
+    (size,) = _LEN.unpack(head)
+    return marshal.loads(_recv_exactly(sock, size)), fds
+
+
+def _run_child(program: Union[bytes, str], limits: tuple[int, int, int, int],
+               fds: list[int]) -> NoReturn:
+    """
+    Turn the forked child into `python -c code` and run it,
+    or replace it with the executable, if program is a path.
+    """
+    exit_code = 0
+    try:
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        os.setsid()
+        for std_fd, fd in enumerate(fds):
+            os.dup2(fd, std_fd)
+        for fd in fds:
+            os.close(fd)
+        set_limits(*limits)
+        if isinstance(program, str):
+            # python ignores these, ignored signals are inherited by executables
+            for name in ('SIGPIPE', 'SIGXFSZ'):
+                if hasattr(signal, name):
+                    signal.signal(getattr(signal, name), signal.SIG_DFL)
+            os.execv(program, [program])
+        sys.argv = ['-c']
+        exec(marshal.loads(program),  # pylint: disable=exec-used
+             {'__name__': '__main__', '__builtins__': builtins})
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException as e:  # pylint: disable=broad-exception-caught
+        # hide this frame: the traceback must look the same as with `python -c`
+        tb = e.__traceback__.tb_next if e.__traceback__ else None
+        traceback.print_exception(e.with_traceback(tb))
+        exit_code = 1
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    finally:
+        os._exit(exit_code & 0xff)  # pylint: disable=protected-access
+
+
+def serve(sock: socket.socket) -> None:
+    """ Serve requests until the socket is closed by the server. """
+    while True:
+        try:
+            (program, limits), fds = recv_frame(sock, maxfds=3)
+        except EOFError:
+            return
+        pid = os.fork()
+        if pid == 0:
+            sock.close()
+            _run_child(program, limits, fds)
+        for fd in fds:
+            os.close(fd)
+        send_frame(sock, ('started', pid))
+        _pid, status, rusage = os.wait4(pid, 0)
+        send_frame(sock, ('exited', status,
+                          rusage.ru_utime + rusage.ru_stime, rusage.ru_maxrss))
+
+
+def main() -> None:
+    """ Warm up and serve. """
+    sock = socket.socket(fileno=int(sys.argv[1]))
+    for module in sys.argv[2:]:
+        importlib.import_module(module)
+    # solutions see the same sys.path as with `python -c`
+    sys.path[0] = ''
+    # interrupting the server must not kill a runner in the middle of a request
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    with sock:
+        serve(sock)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Judge: checking submissions, either in place or by worker threads of a separate process.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.utils import timezone
+
+from django_edu import metrics
+from django_edu.checker import Checker, Report, TestStatus
+from django_edu.models import Submission
+
+logger = logging.getLogger(__name__)
+
+
+def judge(submission: Submission) -> None:
+    """ Check a submission and save the verdict with the report, log its timings. """
+    start = time.perf_counter()
+    with metrics.breakdown() as spans:
+        _judge(submission)
+    metrics.log_event('submission', id=submission.id, task=submission.task_id,
+                      status=submission.status, passed=submission.passed,
+                      ms=round((time.perf_counter() - start) * 1000, 3),
+                      spans=spans.as_ms())
+
+
+def _judge(submission: Submission) -> None:
+    checker = Checker()
+    try:
+        passed = checker.check(submission.task, submission.code,
+                               partial(_add_progress, submission), submission.language)
+    except Checker.CheckerAnsException as e:
+        submission.finish(False, Report(False, error=str(e)).to_json())
+        return
+    except Exception:  # pylint: disable=broad-exception-caught
+        # a broken submission must not stop the worker
+        logger.exception('Judging submission %s failed', submission.id)
+        submission.finish(None, {}, Submission.Status.error)
+        return
+    submission.finish(passed, checker.report.to_json())
+
+
+async def ajudge(submission: Submission) -> None:
+    """
+    judge() for event loops: tests are run by Checker.acheck(). A new submission
+    is saved as running before the check, so that its progress can be followed.
+    """
+    start = time.perf_counter()
+    if submission.pk is None:
+        submission.status = Submission.Status.running
+        submission.worker = f'{socket.gethostname()}:{os.getpid()}'
+        submission.claimed_at = timezone.now()
+        await submission.asave()
+    with metrics.breakdown() as spans:
+        checker = Checker()
+        saver = _ProgressSaver(submission)
+        try:
+            try:
+                passed = await checker.acheck(submission.task, submission.code,
+                                              saver.add, submission.language)
+            finally:
+                # progress is saved before the verdict
+                await saver.close()
+        except Checker.CheckerAnsException as e:
+            await sync_to_async(submission.finish)(False,
+                                                   Report(False, error=str(e)).to_json())
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception('Judging submission %s failed', submission.id)
+            await sync_to_async(submission.finish)(None, {}, Submission.Status.error)
+        else:
+            await sync_to_async(submission.finish)(passed, checker.report.to_json())
+    metrics.log_event('submission', id=submission.id, task=submission.task_id,
+                      status=submission.status, passed=submission.passed,
+                      ms=round((time.perf_counter() - start) * 1000, 3),
+                      spans=spans.as_ms())
+
+
+def _add_progress(submission: Submission, status: TestStatus) -> None:
+    submission.add_progress(status.test_num, status.verdict, status.time, status.max_rss)
+
+
+class _ProgressSaver:
+    """
+    Progress callback of Checker.acheck(): it is called in the event loop, where
+    the sync ORM can not be used, so progress is saved by a task, one save at a time.
+    """
+
+    def __init__(self, submission: Submission) -> None:
+        self.submission = submission
+        self.changed = asyncio.Event()
+        self.closed = False
+        self.task = asyncio.create_task(self._save())
+
+    def add(self, status: TestStatus) -> None:
+        """ Add the test status to the progress, that is saved soon. """
+        self.submission.add_progress(status.test_num, status.verdict, status.time,
+                                     status.max_rss, save=False)
+        self.changed.set()
+
+    async def _save(self) -> None:
+        while not self.closed:
+            await self.changed.wait()
+            self.changed.clear()
+            await self.submission.asave(update_fields=['progress'])
+
+    async def close(self) -> None:
+        """ Save the rest of the progress and stop. """
+        self.closed = True
+        self.changed.set()
+        try:
+            await self.task
+        except Exception:  # pylint: disable=broad-exception-caught
+            # the verdict is saved anyway
+            logger.exception('Saving progress of submission %s failed',
+                             self.submission.id)
+
+
+class JudgeWorker:
+    """
+    Judge worker: a pool of threads, that claim pending submissions from the db
+    and judge them.
+
+    Attributes
+    ----------
+    workers : int
+        Amount of submissions judged simultaneously.
+    poll_interval : float
+        Pause in seconds before looking into an empty queue again.
+    once : bool
+        Stop when the queue becomes empty, instead of waiting for new submissions.
+    """
+    workers: int
+    poll_interval: float
+    once: bool
+
+    def __init__(self, workers: int, poll_interval: float, once: bool = False) -> None:
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.once = once
+        self._stop = threading.Event()
+        self._name = f'{socket.gethostname()}:{os.getpid()}'
+
+    def run(self) -> None:
+        """ Run worker threads until stop() is called (or the queue is empty if once). """
+        threads = [threading.Thread(target=self._loop, name=f'judge-{num}', daemon=True)
+                   for num in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+        finally:
+            self.stop()
+            for thread in threads:
+                thread.join()
+
+    def stop(self) -> None:
+        """ Ask worker threads to finish after current submissions. """
+        self._stop.set()
+
+    def _loop(self) -> None:
+        """ Single worker thread: claim, judge, repeat. """
+        name = f'{self._name}:{threading.current_thread().name}'
+        try:
+            while not self._stop.is_set():
+                submission = Submission.claim(name)
+                if submission is None:
+                    if self.once:
+                        return
+                    self._stop.wait(self.poll_interval)
+                    continue
+                judge(submission)
+        finally:
+            # every thread has its own connection
+            connection.close()
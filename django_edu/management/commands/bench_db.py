@@ -0,0 +1,113 @@
+"""
+manage.py bench_db: throughput of concurrent reads and writes of the configured db.
+"""
+
+import json
+import threading
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import DatabaseError, connection
+
+from django_edu.checker import Report
+from django_edu.models import Contest, Submission, Task
+from django_edu.management.commands.bench_runner import summary
+
+
+class Command(BaseCommand):
+    """ Load the db as the site does during a contest, print json. """
+    help = ('Run readers (tasks pages queries) and writers (submissions with progress '
+            'updates, as judge workers do) concurrently against the configured db, '
+            'print operations per second, latencies and errors as json.')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--readers', type=int, default=8,
+                            help='Reading threads.')
+        parser.add_argument('--writers', type=int, default=4,
+                            help='Writing threads.')
+        parser.add_argument('--duration', type=float, default=10,
+                            help='Seconds to run.')
+        parser.add_argument('--tasks', type=int, default=20,
+                            help='Tasks in the benchmark contest.')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        contest = Contest()
+        contest.set_name(f'DB benchmark {time.time()}')
+        contest.save()
+        try:
+            for num in range(options['tasks']):
+                task = Task(ans_type=Task.AnsType.text, ref_ans='42')
+                task.set_name(f'Task {num}')
+                task.set_text(f'<p>Statement {num}</p>')
+                contest.append_task(task)
+                task.save()
+            results = self.load(contest, options)
+        finally:
+            # submissions are deleted with tasks
+            contest.delete()
+        self.stdout.write(json.dumps(results, indent=2))
+
+    @staticmethod
+    def load(contest: Contest, options: dict[str, Any]) -> dict[str, Any]:
+        """ Run readers and writers for the duration, count operations and errors. """
+        task_ids = [task.id for task in contest.get_tasks()]
+        stop = threading.Event()
+        lock = threading.Lock()
+        counts = {'read_errors': 0, 'write_errors': 0}
+        latencies: dict[str, list[float]] = {'reads': [], 'writes': []}
+
+        def read() -> None:
+            list(Task.objects.filter(linked_contest=contest)
+                 .order_by('position', 'id').values('id', 'name', 'ans_type'))
+            Task.objects.filter(id=task_ids[0]).values_list('text', flat=True).first()
+
+        def write() -> None:
+            submission = Submission(task_id=task_ids[0], code='print(42)')
+            submission.save()
+            for test_num in range(1, 4):
+                submission.add_progress(test_num, 'OK', 0.01, 1024)
+            submission.finish(True, Report(True).to_json())
+
+        def worker(kind: str) -> None:
+            operation = read if kind == 'reads' else write
+            try:
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    try:
+                        operation()
+                    except DatabaseError:
+                        with lock:
+                            counts[kind[:-1] + '_errors'] += 1
+                        continue
+                    with lock:
+                        latencies[kind].append(time.perf_counter() - start)
+            finally:
+                connection.close()
+
+        threads = ([threading.Thread(target=worker, args=('reads',))
+                    for _num in range(options['readers'])]
+                   + [threading.Thread(target=worker, args=('writes',))
+                      for _num in range(options['writers'])])
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        results: dict[str, Any] = {
+            'engine': settings.DATABASES['default']['ENGINE'],
+            'readers': options['readers'],
+            'writers': options['writers'],
+            'duration': elapsed,
+            'read_errors': counts['read_errors'],
+            'write_errors': counts['write_errors'],
+        }
+        for kind, kind_latencies in latencies.items():
+            if kind_latencies:
+                results[kind] = summary(kind_latencies, elapsed)
+        return results
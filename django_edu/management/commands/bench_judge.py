@@ -0,0 +1,219 @@
+"""
+manage.py bench_judge: throughput and latency of Checker.check on synthetic tasks.
+"""
+
+import json
+import math
+import os
+import platform
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection
+from django.test.utils import override_settings
+
+from django_edu.checker import Checker
+from django_edu.models import Contest, Task, Test
+from django_edu.runner import ForkServerRunner, get_runner
+from django_edu.management.commands.bench_runner import bench, summary
+
+
+class Scenario(NamedTuple):
+    """ Synthetic task: amount of tests and size of every test input in bytes. """
+    tests: int
+    input_size: int
+
+
+SCENARIOS = {
+    'few_small': Scenario(tests=5, input_size=100),
+    'many_small': Scenario(tests=50, input_size=100),
+    'few_large': Scenario(tests=5, input_size=2**20),
+}
+
+# Every test input is a line of numbers, the answer is their sum.
+SOLUTIONS = {
+    'pass': 'print(sum(map(int, input().split())))',
+    'fail': 'print(-1)',
+    'timeout': 'while True:\n    pass',
+    'spam': "while True:\n    print('spam' * 256)",
+}
+# The passing solution in compiled languages: (language, code).
+NATIVE_SOLUTIONS = {
+    'pass_c': ('c', '#include <stdio.h>\n'
+                    'int main(void) {\n'
+                    '    long long sum = 0, number;\n'
+                    '    while (scanf("%lld", &number) == 1)\n'
+                    '        sum += number;\n'
+                    '    printf("%lld\\n", sum);\n'
+                    '    return 0;\n'
+                    '}'),
+    'pass_cpp': ('cpp', '#include <iostream>\n'
+                        'int main() {\n'
+                        '    std::ios::sync_with_stdio(false);\n'
+                        '    long long sum = 0, number;\n'
+                        '    while (std::cin >> number)\n'
+                        '        sum += number;\n'
+                        '    std::cout << sum << std::endl;\n'
+                        '}'),
+}
+
+
+def make_test(rng: random.Random, size: int) -> tuple[bytes, bytes]:
+    """ Test (input, output) with input of about size bytes. """
+    numbers: list[str] = []
+    length = 0
+    while length < size:
+        numbers.append(str(rng.randrange(10**9)))
+        length += len(numbers[-1]) + 1
+    return ' '.join(numbers).encode() + b'\n', str(sum(map(int, numbers))).encode()
+
+
+def create_task(contest: Contest, name: str, scenario: Scenario,
+                rng: random.Random) -> Task:
+    """ Save a code task with the tests of the scenario. """
+    task = Task(ans_type=Task.AnsType.code, comparator=Task.Comparator.tokens)
+    task.set_name(name)
+    task.set_text(f'Benchmark task "{name}"')
+    contest.append_task(task)
+    task.save()
+    tests: list[Test] = []
+    for position in range(scenario.tests):
+        test_input, test_output = make_test(rng, scenario.input_size)
+        test = Test(linked_task=task, position=position)
+        # large inputs are stored in files, as uploaded ones
+        test.set_input_data([test_input], len(test_input))
+        test.set_output_data([test_output], len(test_output))
+        tests.append(test)
+    Test.objects.bulk_create(tests)
+    return task
+
+
+def bench_checks(task: Task, code: str, runs: int, concurrency: int, workers: int,
+                 language: str = 'python') -> dict[str, Any]:
+    """
+    Check code `runs` times, `concurrency` checks at a time, and measure.
+    Every run gets a unique comment, so that it is neither in the verdict
+    cache nor in the compiled solutions cache, as a new submission.
+    """
+    latencies: list[float] = []
+    compile_times: list[float] = []
+    verdicts: list[bool] = []
+    comment = '#' if language == 'python' else '//'
+
+    def one(run: int) -> None:
+        try:
+            checker = Checker(workers=workers, fail_fast=False)
+            start = time.perf_counter()
+            verdicts.append(checker.check(
+                task, f'{code}\n{comment} run {run} {time.time()}', language=language))
+            latencies.append(time.perf_counter() - start)
+            compile_times.append(checker.report.compile_time)
+        finally:
+            if concurrency > 1:
+                connection.close()
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, range(runs)))
+    else:
+        for run in range(runs):
+            one(run)
+    result = summary(latencies, time.perf_counter() - start)
+    result['passed'] = sum(verdicts)
+    # compilation is a part of the latency
+    result['compile_mean_ms'] = sum(compile_times) / len(compile_times) * 1000
+    return result
+
+
+class Command(BaseCommand):
+    """ Benchmark the judging path, print results as json. """
+    help = ('Measure submissions per second and Checker.check latency on synthetic '
+            'tasks for every checker backend, print json.')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--runs', type=int, default=5,
+                            help='Checks per backend, task and solution.')
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='Simultaneous checks.')
+        parser.add_argument('--workers', type=int, default=settings.CHECKER_WORKERS,
+                            help='Simultaneous tests of a single check.')
+        parser.add_argument('--spawn-runs', type=int, default=100,
+                            help='Runs of an empty solution to measure a run cost.')
+        parser.add_argument('--time-limit', type=float, default=1,
+                            help='Time limit of a test, seconds.')
+        parser.add_argument('--backends', default='spawn,forkserver',
+                            help='Checker backends, comma separated.')
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help='Synthetic tasks, comma separated.')
+        parser.add_argument('--solutions',
+                            default=','.join([*SOLUTIONS, *NATIVE_SOLUTIONS]),
+                            help='Solutions, comma separated.')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Seed of the tests generator.')
+        parser.add_argument('--output', help='Write json to the file, not to stdout.')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        backends = options['backends'].split(',')
+        scenarios = options['scenarios'].split(',')
+        solutions = options['solutions'].split(',')
+        for names, known in ((backends, ('spawn', 'forkserver')),
+                             (scenarios, SCENARIOS),
+                             (solutions, [*SOLUTIONS, *NATIVE_SOLUTIONS])):
+            unknown = set(names) - set(known)
+            if unknown:
+                raise CommandError(f'Unknown names: {", ".join(sorted(unknown))}')
+        if 'forkserver' in backends and not ForkServerRunner.is_supported():
+            backends.remove('forkserver')
+
+        results: dict[str, Any] = {
+            'config': {key: options[key] for key in ('runs', 'concurrency', 'workers',
+                                                     'time_limit', 'seed')},
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'backends': {},
+        }
+        rng = random.Random(options['seed'])
+        contest = Contest()
+        contest.set_name(f'Benchmark {time.time()}')
+        contest.save()
+        try:
+            tasks = [create_task(contest, name, SCENARIOS[name], rng)
+                     for name in scenarios]
+            limits = {'CHECKER_TIME_LIMIT': options['time_limit'],
+                      'CHECKER_CPU_LIMIT': math.ceil(options['time_limit'])}
+            for backend in backends:
+                with override_settings(CHECKER_BACKEND=backend, **limits):
+                    runner = get_runner()
+                    backend_results: dict[str, Any] = {
+                        # cost of starting a solution, without any work in it
+                        'spawn': bench(runner, 'pass', options['spawn_runs'], 1),
+                        'checks': {},
+                    }
+                    for task in tasks:
+                        checks: dict[str, Any] = {}
+                        backend_results['checks'][task.name] = checks
+                        for name in solutions:
+                            language, code = NATIVE_SOLUTIONS.get(
+                                name, ('python', SOLUTIONS.get(name, '')))
+                            checks[name] = bench_checks(task, code, options['runs'],
+                                                        options['concurrency'],
+                                                        options['workers'], language)
+                results['backends'][backend] = backend_results
+        finally:
+            # tasks are deleted one by one to remove their test data files
+            for task in contest.get_tasks():
+                contest.delete_task(task.id)
+            contest.delete()
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                output_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
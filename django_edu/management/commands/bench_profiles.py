@@ -0,0 +1,146 @@
+"""
+manage.py bench_profiles: startup and page rendering time of the development and
+production settings profiles, static files collection for the production one.
+
+Every profile is measured in a child process:
+    python -m django_edu.management.commands.bench_profiles <renders>
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from django_edu.management.commands.bench_runner import summary
+
+PROFILES = ('development', 'production')
+
+
+def page_contexts() -> dict[str, dict[str, Any]]:
+    """ Templates and contexts, that are like the ones of the site pages. """
+    tasks = 20
+    return {
+        'index.html': {},
+        'contests.html': {
+            'contest_list': [(num, f'Contest {num}') for num in range(1, 51)],
+            'next_page_key': '50',
+        },
+        'tasks.html': {
+            'task_active_list': ['active'] + [''] * (tasks - 1),
+            'contest_id': 1,
+            'contest_version': 1,
+            'cur_active': 1,
+            # no fragment caching: templates are rendered every time
+            'page_cache_timeout': 0,
+            'task_name': 'Task 1',
+            'task_text': '<p>Sum two numbers.</p>' * 20,
+            'task_id': 1,
+            'task_ans_type': 'C',
+            'ans_is_text': False,
+            'ans_is_code': True,
+        },
+    }
+
+
+def measure(renders: int) -> dict[str, Any]:
+    """ In a child process: django.setup() time, first and further renders of pages. """
+    # pylint: disable=import-outside-toplevel
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_edu.settings')
+    import django
+    start = time.perf_counter()
+    django.setup()
+    results: dict[str, Any] = {'setup_ms': (time.perf_counter() - start) * 1000,
+                               'debug': settings.DEBUG, 'pages': {}}
+    from django.contrib.auth.models import AnonymousUser
+    from django.template.loader import render_to_string
+    from django.test import RequestFactory
+
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    for name, context in page_contexts().items():
+        start = time.perf_counter()
+        render_to_string(name, context, request)
+        first = time.perf_counter() - start
+        latencies: list[float] = []
+        start = time.perf_counter()
+        for _num in range(renders):
+            render_start = time.perf_counter()
+            render_to_string(name, context, request)
+            latencies.append(time.perf_counter() - render_start)
+        results['pages'][name] = summary(latencies, time.perf_counter() - start)
+        results['pages'][name]['first_ms'] = first * 1000
+    return results
+
+
+def static_sizes(root: Path) -> dict[str, int]:
+    """ Total size of collected css files and of their compressed copies. """
+    sizes = {'files': 0, '.css': 0, '.css.gz': 0, '.css.br': 0}
+    for path in root.rglob('*'):
+        if not path.is_file():
+            continue
+        sizes['files'] += 1
+        for suffix in ('.css', '.css.gz', '.css.br'):
+            if path.name.endswith(suffix):
+                sizes[suffix] += path.stat().st_size
+    return sizes
+
+
+class Command(BaseCommand):
+    """ Compare settings profiles, print results as json. """
+    help = ('Measure startup and template rendering time of the development and '
+            'production settings profiles, and static files collection, print json.')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--renders', type=int, default=200,
+                            help='Renders of every page.')
+        parser.add_argument('--output', help='Write json to the file, not to stdout.')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        results: dict[str, Any] = {'config': {'renders': options['renders']},
+                                   'python': sys.version.split()[0], 'profiles': {}}
+        with tempfile.TemporaryDirectory() as static_root:
+            for profile in PROFILES:
+                env = {**os.environ, 'DJANGO_PROFILE': profile,
+                       'STATIC_ROOT': static_root}
+                env.pop('DEBUG', None)
+                profile_results: dict[str, Any] = {}
+                if profile == 'production':
+                    start = time.perf_counter()
+                    self.child([sys.executable, 'manage.py', 'collectstatic',
+                                '--noinput', '--clear'], env)
+                    profile_results['collectstatic_ms'] = (time.perf_counter()
+                                                           - start) * 1000
+                    profile_results['static'] = static_sizes(Path(static_root))
+                start = time.perf_counter()
+                output = self.child([sys.executable, '-m', __name__,
+                                     str(options['renders'])], env)
+                profile_results['process_ms'] = (time.perf_counter() - start) * 1000
+                profile_results.update(json.loads(output))
+                results['profiles'][profile] = profile_results
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                output_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    @staticmethod
+    def child(args: list[str], env: dict[str, str]) -> str:
+        """ Run a child process in the project directory, return its output. """
+        proc = subprocess.run(args, env=env, cwd=settings.BASE_DIR, capture_output=True,
+                              text=True, check=False)
+        if proc.returncode != 0:
+            raise CommandError(f'{" ".join(args[1:])} failed:\n{proc.stderr}')
+        return proc.stdout
+
+
+if __name__ == '__main__':
+    print(json.dumps(measure(int(sys.argv[1]))))
@@ -0,0 +1,85 @@
+"""
+manage.py bench_runner: solution runs per second for every checker backend.
+"""
+
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from django_edu.runner import (AbstractRunner, ForkServerRunner, Limits, SpawnRunner,
+                               compile_solution)
+
+SOLUTIONS = {
+    'empty': 'pass',
+    'echo': 'print(input())',
+    'imports': 'import math, collections, itertools\nprint(math.gcd(12, 18))',
+}
+
+
+def bench(runner: AbstractRunner, code: str,
+          runs: int, concurrency: int) -> dict[str, Any]:
+    """ Run code `runs` times, `concurrency` runs at a time, and measure. """
+    solution = compile_solution(code)
+    limits = Limits.from_settings()._replace(wall_time=10)
+    runner.run(solution, b'1\n', limits)  # warm up (fork servers start lazily)
+    latencies: list[float] = []
+
+    def one(_num: int) -> None:
+        start = time.perf_counter()
+        result = runner.run(solution, b'1\n', limits)
+        latencies.append(time.perf_counter() - start)
+        if result.returncode != 0 or result.timed_out:
+            raise RuntimeError(f'Benchmark solution failed: {result.err!r}')
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(runs)))
+    return summary(latencies, time.perf_counter() - start)
+
+
+def summary(latencies: list[float], elapsed: float) -> dict[str, Any]:
+    """ Throughput and latency percentiles of runs, that took elapsed seconds. """
+    latencies = sorted(latencies)
+    return {
+        'runs': len(latencies),
+        'runs_per_sec': len(latencies) / elapsed,
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)] * 1000,
+    }
+
+
+class Command(BaseCommand):
+    """ Compare cold spawn and fork server backends. """
+    help = 'Compare solution runs per second of cold spawn and fork server backends.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--runs', type=int, default=200,
+                            help='Runs per backend and solution.')
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='Simultaneous runs.')
+        parser.add_argument('--preload', default='math,collections,itertools',
+                            help='Modules preloaded by fork servers, comma separated.')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        runners: dict[str, AbstractRunner] = {'spawn': SpawnRunner()}
+        if ForkServerRunner.is_supported():
+            runners['forkserver'] = ForkServerRunner(options['concurrency'],
+                                                     options['preload'].split(','))
+        results: dict[str, dict[str, Any]] = {}
+        for backend, runner in runners.items():
+            results[backend] = {
+                name: bench(runner, code, options['runs'], options['concurrency'])
+                for name, code in SOLUTIONS.items()
+            }
+        if 'forkserver' in results:
+            results['speedup'] = {
+                name: results['forkserver'][name]['runs_per_sec']
+                / results['spawn'][name]['runs_per_sec']
+                for name in SOLUTIONS
+            }
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,207 @@
+"""
+manage.py bench_server: requests per second and latency of the tasks page under
+the WSGI server with sync views and the ASGI one (uvicorn) with async views.
+"""
+
+import http.cookiejar
+import importlib.util
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from django_edu.models import Contest, Task
+from django_edu.management.commands.bench_judge import SOLUTIONS, Scenario, create_task
+from django_edu.management.commands.bench_runner import summary
+
+# Servers: command line (the port is appended) and ASYNC_VIEWS setting.
+SERVERS = {
+    # the threaded development server is the WSGI server, that ships with django
+    'wsgi': ([sys.executable, str(settings.BASE_DIR / 'manage.py'), 'runserver',
+              '--noreload'], '0'),
+    'asgi': ([sys.executable, '-m', 'uvicorn', 'django_edu.asgi:application',
+              '--log-level', 'warning', '--port'], '1'),
+}
+
+
+def free_port() -> int:
+    """ A port, that is free at the moment. """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+def start_server(name: str, timeout: float = 30) -> tuple[subprocess.Popen[bytes], str]:
+    """ Start the server name, wait until it accepts connections, return its url. """
+    args, async_views = SERVERS[name]
+    port = free_port()
+    address = f'127.0.0.1:{port}' if name == 'wsgi' else str(port)
+    env = {**os.environ, 'ASYNC_VIEWS': async_views, 'METRICS_LOG_LEVEL': 'WARNING'}
+    proc = subprocess.Popen(args + [address], env=env, cwd=settings.BASE_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise CommandError(f'{name} server exited with code {proc.returncode}')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return proc, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.1)
+    stop_server(proc)
+    raise CommandError(f'{name} server has not started in {timeout} seconds')
+
+
+def stop_server(proc: subprocess.Popen[bytes]) -> None:
+    """ Stop a server, started by start_server(). """
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+class Client:
+    """ A browser: keeps cookies, sends the csrf token with forms. """
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies))
+
+    def request(self, path: str, form: Optional[dict[str, str]] = None) -> bytes:
+        """ GET path or POST form to it, return the page. """
+        data = None
+        headers: dict[str, str] = {}
+        if form is not None:
+            data = urllib.parse.urlencode(form).encode()
+            token = next((cookie.value for cookie in self.cookies
+                          if cookie.name == settings.CSRF_COOKIE_NAME), None)
+            headers = {'X-CSRFToken': token or '', 'Referer': self.url + path}
+        request = urllib.request.Request(self.url + path, data=data, headers=headers)
+        with self.opener.open(request, timeout=60) as response:
+            page: bytes = response.read()
+            return page
+
+
+def bench_requests(url: str, path: str, form: Optional[dict[str, str]],
+                   runs: int, concurrency: int) -> dict[str, Any]:
+    """
+    Request path (POST form, if given) `runs` times, by `concurrency` clients at a time.
+    Answers get a unique comment, so that they are not in the verdict cache.
+    """
+    clients = [Client(url) for _num in range(concurrency)]
+    for client in clients:
+        client.request(path)  # session and csrf cookies
+    latencies: list[float] = []
+    errors = 0
+
+    def one(run: int) -> None:
+        nonlocal errors
+        client = clients[run % concurrency]
+        run_form = None
+        if form is not None:
+            run_form = {**form,
+                        'task_ans': f'{form["task_ans"]}\n# run {run} {time.time()}'}
+        start = time.perf_counter()
+        try:
+            client.request(path, run_form)
+        except (urllib.error.URLError, OSError):
+            errors += 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(runs)))
+    if not latencies:
+        raise CommandError(f'All requests to {path} failed')
+    result = summary(latencies, time.perf_counter() - start)
+    result['errors'] = errors
+    return result
+
+
+class Command(BaseCommand):
+    """ Compare WSGI and ASGI servers under load, print results as json. """
+    help = ('Measure requests per second and latency of the tasks page and of answers '
+            'checks under WSGI with sync views and under uvicorn with async views, '
+            'print json.')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--runs', type=int, default=200,
+                            help='Requests per server and scenario.')
+        parser.add_argument('--concurrency', type=int, default=16,
+                            help='Simultaneous clients.')
+        parser.add_argument('--tests', type=int, default=5,
+                            help='Tests of the task, every answer is run on.')
+        parser.add_argument('--solution', default='pass', choices=SOLUTIONS,
+                            help='Answer to check.')
+        parser.add_argument('--servers', default=','.join(SERVERS),
+                            help='Servers, comma separated.')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Seed of the tests generator.')
+        parser.add_argument('--output', help='Write json to the file, not to stdout.')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        servers = options['servers'].split(',')
+        unknown = set(servers) - set(SERVERS)
+        if unknown:
+            raise CommandError(f'Unknown names: {", ".join(sorted(unknown))}')
+        if 'asgi' in servers and importlib.util.find_spec('uvicorn') is None:
+            raise CommandError('uvicorn is not installed (pip install uvicorn)')
+
+        results: dict[str, Any] = {
+            'config': {key: options[key] for key in ('runs', 'concurrency', 'tests',
+                                                     'solution', 'seed')},
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'checker_max_sandboxes': settings.CHECKER_MAX_SANDBOXES,
+            'servers': {},
+        }
+        contest = Contest()
+        contest.set_name(f'Benchmark {time.time()}')
+        contest.save()
+        try:
+            task: Task = create_task(contest, 'server', Scenario(options['tests'], 100),
+                                     random.Random(options['seed']))
+            path = f'/tasks/{contest.id}/1'
+            answer = {'form_descr': 'task_ans', 'task_ans_id': str(task.id),
+                      'task_ans': SOLUTIONS[options['solution']]}
+            for name in servers:
+                proc, url = start_server(name)
+                try:
+                    results['servers'][name] = {
+                        'page': bench_requests(url, path, None, options['runs'],
+                                               options['concurrency']),
+                        'answer': bench_requests(url, path, answer, options['runs'],
+                                                 options['concurrency']),
+                    }
+                finally:
+                    stop_server(proc)
+        finally:
+            # tasks are deleted one by one to remove their test data files
+            for contest_task in contest.get_tasks():
+                contest.delete_task(contest_task.id)
+            contest.delete()
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                output_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
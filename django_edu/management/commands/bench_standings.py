@@ -0,0 +1,191 @@
+"""
+manage.py bench_standings: contest standings as submissions pile up. The standings
+page, that reads materialized rows, is compared with counting standings from
+raw submissions on every view; verdicts are timed with the standings update.
+"""
+
+import json
+import random
+import time
+from typing import Any, Callable
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection, reset_queries
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from django_edu import views
+from django_edu.checker import Report
+from django_edu.models import Contest, ContestResult, Submission, Task
+from django_edu.pagination import format_key
+from django_edu.management.commands.bench_runner import summary
+
+
+def timed(function: Callable[[], Any], runs: int) -> dict[str, Any]:
+    """ Latencies of `runs` calls of function and db queries of one call. """
+    latencies: list[float] = []
+    start = time.perf_counter()
+    for _run in range(runs):
+        run_start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - run_start)
+    result = summary(latencies, time.perf_counter() - start)
+    # the log of queries (kept with DEBUG) is bounded, counts of a full one are wrong
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        function()
+    result['queries'] = len(queries)
+    return result
+
+
+def get_page(contest_id: int, query: str = '', etag: str = '') -> HttpResponse:
+    """ Standings page, as an anonymous user gets it. """
+    headers = {'If-None-Match': etag} if etag else {}
+    request = RequestFactory().get(f'/standings/{contest_id}/{query}', headers=headers)
+    request.user = AnonymousUser()
+    return views.standings(request, contest_id)
+
+
+def scan_standings(contest: Contest) -> list[tuple[int, int, int]]:
+    """
+    Standings (solved, penalty, user id) in order, counted from all judged
+    submissions of the contest: what a page would do without materialized rows.
+    """
+    # (user id, task id): [failed attempts, penalty or None while unsolved]
+    results: dict[tuple[int, int], list[Any]] = {}
+    submissions = (Submission.objects
+                   .filter(task__linked_contest=contest, user__isnull=False,
+                           status=Submission.Status.done)
+                   .order_by('created_at', 'id')
+                   .values_list('user_id', 'task_id', 'passed', 'created_at'))
+    for user_id, task_id, passed, created_at in submissions.iterator():
+        result = results.setdefault((user_id, task_id), [0, None])
+        if result[1] is not None:
+            continue
+        if passed:
+            minutes = (created_at - contest.started_at).total_seconds() // 60
+            result[1] = (max(int(minutes), 0)
+                         + settings.STANDINGS_PENALTY_MINUTES * result[0])
+        else:
+            result[0] += 1
+    totals: dict[int, list[int]] = {}
+    for (user_id, _task_id), (_attempts, penalty) in results.items():
+        total = totals.setdefault(user_id, [0, 0])
+        if penalty is not None:
+            total[0] += 1
+            total[1] += penalty
+    ordered = sorted((-solved, penalty, user_id)
+                     for user_id, (solved, penalty) in totals.items())
+    return [(-solved, penalty, user_id) for solved, penalty, user_id in ordered]
+
+
+class Command(BaseCommand):
+    """ Benchmark standings of a large synthetic contest, print results as json. """
+    help = ('Submit rounds of answers of many users to a synthetic contest, measure '
+            'verdicts with standings updates and standings page loads (full and '
+            '304 Not Modified) against counting standings from raw submissions, '
+            'print json.')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--users', type=int, default=1000,
+                            help='Contest participants.')
+        parser.add_argument('--tasks', type=int, default=20,
+                            help='Contest tasks.')
+        parser.add_argument('--rounds', type=int, default=5,
+                            help='Rounds of submissions, measured after every one.')
+        parser.add_argument('--per-round', type=int, default=4,
+                            help='Submissions of every user in a round.')
+        parser.add_argument('--pass-rate', type=float, default=0.3,
+                            help='Share of passed submissions.')
+        parser.add_argument('--loads', type=int, default=20,
+                            help='Page loads (and scans) per measurement.')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Seed of the submissions generator.')
+        parser.add_argument('--output', help='Write json to the file, not to stdout.')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        results: dict[str, Any] = {
+            'config': {key: options[key] for key in ('users', 'tasks', 'rounds',
+                                                     'per_round', 'pass_rate', 'loads',
+                                                     'seed')},
+            'engine': settings.DATABASES['default']['ENGINE'],
+            'rounds': [],
+        }
+        rng = random.Random(options['seed'])
+        stamp = time.time_ns()
+        contest = Contest()
+        contest.set_name(f'Standings benchmark {stamp}')
+        contest.save()
+        user_model = get_user_model()
+        try:
+            tasks: list[Task] = []
+            for num in range(options['tasks']):
+                task = Task(ans_type=Task.AnsType.text, ref_ans='42')
+                task.set_name(f'Task {num}')
+                task.set_text(f'<p>Statement {num}</p>')
+                contest.append_task(task)
+                task.save()
+                tasks.append(task)
+            user_model.objects.bulk_create(
+                user_model(username=f'bench_{stamp}_{num}')
+                for num in range(options['users']))
+            user_ids = list(user_model.objects
+                            .filter(username__startswith=f'bench_{stamp}_')
+                            .values_list('id', flat=True))
+            for _round in range(options['rounds']):
+                results['rounds'].append(self.submit_round(contest, tasks, user_ids,
+                                                           rng, options))
+        finally:
+            # submissions and results are deleted with the contest and the users
+            contest.delete()
+            user_model.objects.filter(username__startswith=f'bench_{stamp}_').delete()
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                output_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    @staticmethod
+    def submit_round(contest: Contest, tasks: list[Task], user_ids: list[int],
+                     rng: random.Random, options: dict[str, Any]) -> dict[str, Any]:
+        """ Submit a round of answers, then measure standings. """
+        latencies: list[float] = []
+        start = time.perf_counter()
+        for user_id in user_ids:
+            for task in rng.sample(tasks, min(options['per_round'], len(tasks))):
+                passed = rng.random() < options['pass_rate']
+                submission = Submission(task=task, user_id=user_id,
+                                        code='42' if passed else '0')
+                verdict_start = time.perf_counter()
+                submission.finish(passed, Report(passed).to_json())
+                latencies.append(time.perf_counter() - verdict_start)
+        verdicts = summary(latencies, time.perf_counter() - start)
+
+        contest.refresh_from_db()
+        materialized = list(ContestResult.objects.filter(contest=contest)
+                            .order_by(*views.STANDINGS_ORDER)
+                            .values_list('solved', 'penalty', 'user_id'))
+        if materialized != scan_standings(contest):
+            raise CommandError('Materialized standings differ from counted ones')
+        middle_key = format_key(materialized[len(materialized) // 2])
+        etag = get_page(contest.id)['ETag']
+        not_modified = get_page(contest.id, etag=etag)
+        if not_modified.status_code != 304:
+            raise CommandError(f'Expected 304, got {not_modified.status_code}')
+        return {
+            'submissions': (Submission.objects
+                            .filter(task__linked_contest=contest).count()),
+            'verdicts': verdicts,
+            'first_page': timed(lambda: get_page(contest.id), options['loads']),
+            'middle_page': timed(lambda: get_page(contest.id, f'?after={middle_key}'),
+                                 options['loads']),
+            'not_modified': timed(lambda: get_page(contest.id, etag=etag),
+                                  options['loads']),
+            'scan': timed(lambda: scan_standings(contest), options['loads']),
+        }
@@ -0,0 +1,102 @@
+"""
+manage.py bench_validation: time of name and text validation on adversarial inputs.
+"""
+
+import json
+import multiprocessing
+import re
+import time
+from typing import Any, Callable, Optional
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from django_edu import validation
+
+# Patterns, that were used before django_edu/validation.py, for comparison.
+OLD_HTML_RE = re.compile(r'<([A-Za-z][A-Za-z0-9]*)(([^>])|(\n))*>(((.)|(\n))*)</\1>')
+OLD_SCRIPT_RE = re.compile(r'<(script)(([^>])|(\n))*>(((.)|(\n))*)</\1>')
+
+# Inputs of about n characters, that make backtracking patterns scan
+# the rest of the input from every '<' (newlines in a tag: every split of them
+# between the alternatives, which is exponential).
+ADVERSARIAL: dict[str, Callable[[int], str]] = {
+    'unclosed_tags': lambda n: '<a>' * (n // 3),
+    'unterminated_tags': lambda n: '<a' * (n // 2),
+    'unclosed_scripts': lambda n: '<script>' * (n // 8),
+    'newlines_in_tag': lambda n: '<a ' + '\n' * n,
+}
+
+CHECKS: dict[str, tuple[Callable[[str], Any], Callable[[str], Any]]] = {
+    'html': (OLD_HTML_RE.search, validation.contains_html),
+    'script': (OLD_SCRIPT_RE.search, validation.contains_script),
+}
+
+
+def timed(check: Callable[[str], Any], text: str, runs: int) -> float:
+    """ Best of runs, milliseconds. """
+    best = float('inf')
+    for _run in range(runs):
+        start = time.perf_counter()
+        check(text)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def timed_old(check_name: str, input_name: str, size: int, runs: int) -> float:
+    """ timed() of an old pattern, it is run in a child process. """
+    return timed(CHECKS[check_name][0], ADVERSARIAL[input_name](size), runs)
+
+
+def timed_old_with_budget(check_name: str, input_name: str, size: int, runs: int,
+                          budget: float) -> Optional[float]:
+    """ timed_old(), None if it takes more than budget seconds: the child is killed. """
+    # a running regex can not be interrupted in this process
+    with multiprocessing.Pool(1) as pool:
+        result = pool.apply_async(timed_old, (check_name, input_name, size, runs))
+        try:
+            return result.get(budget)
+        except multiprocessing.TimeoutError:
+            return None
+
+
+class Command(BaseCommand):
+    """ Compare old backtracking patterns with django_edu/validation.py. """
+    help = ('Time old validation patterns and django_edu/validation.py on adversarial '
+            'inputs of growing size, print json: new times must grow linearly. '
+            'Old patterns, that run out of --old-budget, are reported as timed out '
+            '(old_ms is null).')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--sizes', default='1000,2000,4000,8000',
+                            help='Input sizes, comma separated.')
+        parser.add_argument('--runs', type=int, default=3,
+                            help='Runs per input, the best one is taken.')
+        parser.add_argument('--old-budget', type=float, default=5.0,
+                            help='Seconds for all runs of an old pattern on an input, '
+                                 'it is reported as timed out after them.')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        results: dict[str, Any] = {}
+        for input_name, make_input in ADVERSARIAL.items():
+            for check_name, (_old, new) in CHECKS.items():
+                results[f'{check_name}/{input_name}'] = by_size = {}
+                old_timed_out = False
+                for size in sizes:
+                    # larger inputs are not tried after a timeout
+                    old_ms = None if old_timed_out else timed_old_with_budget(
+                        check_name, input_name, size, options['runs'],
+                        options['old_budget'])
+                    old_timed_out = old_ms is None
+                    by_size[size] = {
+                        'old_ms': old_ms, 'old_timed_out': old_timed_out,
+                        'new_ms': timed(new, make_input(size), options['runs']),
+                    }
+        # memoized: a repeated text is not parsed again
+        text = '<p>' + 'Task statement. ' * 50 + '</p>'
+        validation.html_error.cache_clear()
+        results['html_error/repeated'] = {
+            'first_ms': timed(validation.html_error, text, 1),
+            'repeated_ms': timed(validation.html_error, text, options['runs']),
+        }
+        self.stdout.write(json.dumps(results, indent=2))
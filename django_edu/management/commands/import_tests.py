@@ -0,0 +1,32 @@
+"""
+manage.py import_tests: append tests from a zip archive to a task.
+"""
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from django_edu.models import Task
+from django_edu.testarchive import TestsArchiveError, import_tests
+
+
+class Command(BaseCommand):
+    """ Append tests from zip archives with NN.in / NN.out pairs to a task. """
+    help = 'Append tests from zip archives with NN.in / NN.out pairs to a task.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('task_id', type=int, help='Task to add the tests to.')
+        parser.add_argument('archives', nargs='+', help='Zip archives with tests.')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            task = Task.objects.get(id=options['task_id'])
+        except Task.DoesNotExist as e:
+            raise CommandError(f'Task {options["task_id"]} not found') from e
+        for archive_path in options['archives']:
+            try:
+                with open(archive_path, 'rb') as archive_file:
+                    added = import_tests(task, archive_file)
+            except (OSError, TestsArchiveError) as e:
+                raise CommandError(f'{archive_path}: {e}') from e
+            self.stdout.write(f'{archive_path}: added {added} tests')
@@ -0,0 +1,37 @@
+"""
+manage.py judge: judge worker process.
+"""
+
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from django_edu.judge import JudgeWorker
+from django_edu.models import Submission
+
+
+class Command(BaseCommand):
+    """ Judge pending submissions with several parallel workers. """
+    help = 'Judge pending submissions with several parallel workers.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--workers', type=int, default=settings.JUDGE_WORKERS,
+                            help='Amount of submissions judged simultaneously.')
+        parser.add_argument('--poll-interval', type=float, default=0.5,
+                            help='Seconds to wait before polling an empty queue again.')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when the queue is empty.')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        requeued = Submission.requeue_stale(settings.JUDGE_STALE_TIMEOUT)
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale submissions')
+        worker = JudgeWorker(options['workers'], options['poll_interval'],
+                             options['once'])
+        self.stdout.write(f'Judging with {options["workers"]} workers')
+        try:
+            worker.run()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping after current submissions...')
+            worker.stop()
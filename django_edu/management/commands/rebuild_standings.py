@@ -0,0 +1,26 @@
+"""
+manage.py rebuild_standings: count contest standings anew from judged submissions.
+"""
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from django_edu.models import Contest, TaskResult
+
+
+class Command(BaseCommand):
+    """ Count standings of contests anew from their judged submissions. """
+    help = ('Count standings of contests (all by default) anew from their judged '
+            'submissions, i.e. the ones judged before standings were introduced.')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('contest_ids', nargs='*', type=int,
+                            help='Contests to count standings of.')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        contest_ids = (options['contest_ids']
+                       or list(Contest.objects.values_list('id', flat=True)))
+        for contest_id in contest_ids:
+            counted = TaskResult.recount(contest_id)
+            self.stdout.write(f'Contest {contest_id}: counted {counted} submissions')
@@ -0,0 +1,279 @@
+"""
+Instrumentation: timings of requests and of check stages (compile, spawn, run,
+compare, report, render), exported in the Prometheus text format and as
+structured log lines.
+
+Metrics are kept by every process: the web server ones are served at /metrics/,
+`manage.py judge` workers report submissions in their log.
+"""
+
+import bisect
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Iterator, Optional, Union, cast
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest
+from django.http.response import HttpResponseBase
+
+# Structured log lines, see log_event().
+events_logger = logging.getLogger('django_edu.events')
+
+# Upper bounds (seconds) of histogram buckets.
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Histogram:
+    """ Prometheus histogram: counts of observations per bucket, their amount and sum. """
+    buckets: list[int]
+    count: int
+    total: float
+
+    def __init__(self) -> None:
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        """ Add an observation, the caller holds the registry lock. """
+        idx = bisect.bisect_left(BUCKETS, value)
+        if idx < len(BUCKETS):
+            self.buckets[idx] += 1
+        self.count += 1
+        self.total += value
+
+
+_lock = threading.Lock()
+_histograms: dict[str, dict[Labels, Histogram]] = {}
+_counters: dict[str, dict[Labels, float]] = {}
+_help = {
+    'django_edu_request_seconds': 'Time of requests by view.',
+    'django_edu_request_queries_total': 'Database queries made by requests by view.',
+    'django_edu_request_db_seconds_total': 'Time of database queries by view.',
+    'django_edu_span_seconds': 'Time of check stages and template rendering.',
+}
+
+
+def observe(metric: str, value: float, **labels: str) -> None:
+    """ Add an observation to the histogram metric. """
+    key = tuple(sorted(labels.items()))
+    with _lock:
+        series = _histograms.setdefault(metric, {})
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(value)
+
+
+def inc(metric: str, value: float = 1, **labels: str) -> None:
+    """ Increase the counter metric. """
+    key = tuple(sorted(labels.items()))
+    with _lock:
+        series = _counters.setdefault(metric, {})
+        series[key] = series.get(key, 0) + value
+
+
+class Breakdown:
+    """ Total time of every span within a request or a check. """
+    spans: dict[str, float]
+
+    def __init__(self) -> None:
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        """ Add time of a span (tests run in several threads). """
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def as_ms(self) -> dict[str, float]:
+        """ Totals in milliseconds, for logging. """
+        with self._lock:
+            return {name: round(seconds * 1000, 3)
+                    for name, seconds in self.spans.items()}
+
+
+# Breakdowns of the current request and submission, spans are added to all of them.
+# Tests are run in pool threads: they get a copy of the context (see Checker).
+_breakdowns: ContextVar[tuple[Breakdown, ...]] = ContextVar('breakdowns', default=())
+
+
+@contextmanager
+def breakdown() -> Iterator[Breakdown]:
+    """ Collect spans, that happen in the block. """
+    current = Breakdown()
+    token = _breakdowns.set(_breakdowns.get() + (current,))
+    try:
+        yield current
+    finally:
+        _breakdowns.reset(token)
+
+
+def add_span(name: str, seconds: float) -> None:
+    """ Record a span, that is measured elsewhere (i.e. by a runner). """
+    if not settings.METRICS_ENABLED:
+        return
+    observe('django_edu_span_seconds', seconds, span=name)
+    for current in _breakdowns.get():
+        current.add(name, seconds)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """ Time the block as the span name. """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_span(name, time.perf_counter() - start)
+
+
+def log_event(event: str, **fields: Any) -> None:
+    """ Structured log line: a json object. """
+    if events_logger.isEnabledFor(logging.INFO):
+        events_logger.info(json.dumps({'event': event, **fields}))
+
+
+def _format_labels(labels: Labels, **extra: str) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    escaped = (name + '="' + value.replace('\\', '\\\\').replace('"', '\\"')
+               .replace('\n', '\\n') + '"'
+               for name, value in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def render() -> str:
+    """ All metrics in the Prometheus text exposition format. """
+    lines: list[str] = []
+    with _lock:
+        for metric, counter_series in sorted(_counters.items()):
+            lines.append(f'# HELP {metric} {_help.get(metric, metric)}')
+            lines.append(f'# TYPE {metric} counter')
+            for labels, value in sorted(counter_series.items()):
+                lines.append(f'{metric}{_format_labels(labels)} {value}')
+        for metric, histogram_series in sorted(_histograms.items()):
+            lines.append(f'# HELP {metric} {_help.get(metric, metric)}')
+            lines.append(f'# TYPE {metric} histogram')
+            for labels, histogram in sorted(histogram_series.items()):
+                cumulative = 0
+                for bound, amount in zip(BUCKETS, histogram.buckets):
+                    cumulative += amount
+                    lines.append(f'{metric}_bucket{_format_labels(labels, le=str(bound))}'
+                                 f' {cumulative}')
+                lines.append(f'{metric}_bucket{_format_labels(labels, le="+Inf")}'
+                             f' {histogram.count}')
+                lines.append(f'{metric}_sum{_format_labels(labels)} {histogram.total}')
+                lines.append(f'{metric}_count{_format_labels(labels)} {histogram.count}')
+    return '\n'.join(lines) + '\n'
+
+
+class _QueryCounter:
+    """ Database execute wrapper, counting queries and their time. """
+    def __init__(self) -> None:
+        self.queries = 0
+        self.time = 0.0
+
+    def __call__(self, execute: Callable[..., Any], sql: str, params: Any,
+                 many: bool, context: dict[str, Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - start
+            self.queries += 1
+
+
+# Query counter of the current request. Async views query the db from sync_to_async()
+# threads: count_queries() is installed on every connection (see apps.py) and
+# finds the counter in the context, that is copied to those threads.
+_query_counter: ContextVar[Optional[_QueryCounter]] = ContextVar('query_counter',
+                                                                 default=None)
+
+
+def count_queries(execute: Callable[..., Any], sql: str, params: Any,
+                  many: bool, context: dict[str, Any]) -> Any:
+    """ Database execute wrapper, counting queries of the current request. """
+    counter = _query_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+@contextmanager
+def _measure() -> Iterator[tuple[_QueryCounter, Breakdown]]:
+    """ Count queries and collect spans of a request, that is served in the block. """
+    queries = _QueryCounter()
+    token = _query_counter.set(queries)
+    try:
+        with breakdown() as spans:
+            yield queries, spans
+    finally:
+        _query_counter.reset(token)
+
+
+GetResponse = Callable[[HttpRequest],
+                       Union[HttpResponseBase, Awaitable[HttpResponseBase]]]
+
+
+class MetricsMiddleware:
+    """
+    Record time and database queries of every request by view,
+    and log them with the request spans.
+    Responses are timed until they are returned: streams are not included.
+    Async capable: async views are not run in a thread because of it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: GetResponse) -> None:
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest
+                 ) -> Union[HttpResponseBase, Awaitable[HttpResponseBase]]:
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        start = time.perf_counter()
+        with _measure() as (queries, spans):
+            response = self.get_response(request)
+        assert isinstance(response, HttpResponseBase)
+        self._record(request, response, time.perf_counter() - start, queries, spans)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        # the next handler is async, as this call is
+        get_response = cast(Callable[[HttpRequest], Awaitable[HttpResponseBase]],
+                            self.get_response)
+        if not settings.METRICS_ENABLED:
+            return await get_response(request)
+        start = time.perf_counter()
+        with _measure() as (queries, spans):
+            response = await get_response(request)
+        self._record(request, response, time.perf_counter() - start, queries, spans)
+        return response
+
+    @staticmethod
+    def _record(request: HttpRequest, response: HttpResponseBase, elapsed: float,
+                queries: _QueryCounter, spans: Breakdown) -> None:
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unresolved'
+        observe('django_edu_request_seconds', elapsed, view=view)
+        inc('django_edu_request_queries_total', queries.queries, view=view)
+        inc('django_edu_request_db_seconds_total', queries.time, view=view)
+        log_event('request', view=view, method=request.method, path=request.path,
+                  status=response.status_code, ms=round(elapsed * 1000, 3),
+                  queries=queries.queries, db_ms=round(queries.time * 1000, 3),
+                  spans=spans.as_ms())
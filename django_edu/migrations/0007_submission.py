@@ -0,0 +1,35 @@
+# Generated by Django 5.0.14 on 2026-10-16 20:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_edu', '0006_task_linked_contest_test_linked_task'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Submission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.TextField()),
+                ('status', models.CharField(choices=[('P', 'Pending'), ('R', 'Running'), ('D', 'Done'), ('E', 'Judge error')], default='P', max_length=1)),
+                ('passed', models.BooleanField(null=True)),
+                ('report', models.TextField(default='')),
+                ('worker', models.CharField(default='', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('claimed_at', models.DateTimeField(null=True)),
+                ('judged_at', models.DateTimeField(null=True)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='django_edu.task')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='django_edu__status_7a935c_idx')],
+            },
+        ),
+    ]
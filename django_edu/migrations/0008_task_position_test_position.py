@@ -0,0 +1,77 @@
+# Generated by Django 5.0.14 on 2026-10-16 21:00
+
+from typing import Any
+
+from django.db import migrations, models
+
+
+def positions_from_lists(apps: Any, schema_editor: Any) -> None:
+    """ Set positions from Contest.tasks and Task.tests id lists. """
+    Contest = apps.get_model('django_edu', 'Contest')
+    Task = apps.get_model('django_edu', 'Task')
+    Test = apps.get_model('django_edu', 'Test')
+    for parent_model, ids_field, child_model, fk_field in (
+            (Contest, 'tasks', Task, 'linked_contest'),
+            (Task, 'tests', Test, 'linked_task')):
+        for parent in parent_model.objects.all():
+            ids_list = getattr(parent, ids_field) or []
+            children = child_model.objects.filter(**{fk_field: parent})
+            for position, child_id in enumerate(ids_list):
+                children.filter(id=child_id).update(position=position)
+            # linked, but missing in the list: keep them, but after listed ones
+            unlisted = children.exclude(id__in=ids_list).order_by('id')
+            for position, child in enumerate(unlisted, start=len(ids_list)):
+                child.position = position
+                child.save(update_fields=['position'])
+
+
+def lists_from_positions(apps: Any, schema_editor: Any) -> None:
+    """ Restore Contest.tasks and Task.tests id lists from positions. """
+    Contest = apps.get_model('django_edu', 'Contest')
+    Task = apps.get_model('django_edu', 'Task')
+    Test = apps.get_model('django_edu', 'Test')
+    for contest in Contest.objects.all():
+        contest.tasks = list(Task.objects.filter(linked_contest=contest)
+                             .order_by('position', 'id').values_list('id', flat=True))
+        contest.save(update_fields=['tasks'])
+    for task in Task.objects.all():
+        task.tests = list(Test.objects.filter(linked_task=task)
+                          .order_by('position', 'id').values_list('id', flat=True))
+        task.save(update_fields=['tests'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_edu', '0007_submission'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='test',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(positions_from_lists, lists_from_positions),
+        migrations.RemoveField(
+            model_name='contest',
+            name='tasks',
+        ),
+        migrations.RemoveField(
+            model_name='task',
+            name='tests',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['linked_contest', 'position'], name='django_edu__linked__df87be_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(fields=['linked_task', 'position'], name='django_edu__linked__ecc9b1_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-16 21:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_edu', '0008_task_position_test_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='tests_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-16 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_edu', '0009_task_tests_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='progress',
+            field=models.JSONField(default=list),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-16 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_edu', '0010_submission_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='checker_code',
+            field=models.TextField(null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='comparator',
+            field=models.CharField(choices=[('E', 'Exact match, except for leading and trailing whitespace'), ('T', 'Whitespace separated tokens'), ('F', 'Tokens, numbers with tolerance'), ('L', 'Lines in any order'), ('C', 'Custom checker')], default='E', max_length=1),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-16 21:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_edu', '0011_task_checker_code_task_comparator'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='test',
+            name='input_file',
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='test',
+            name='output_file',
+            field=models.CharField(max_length=64, null=True),
+        ),
+    ]
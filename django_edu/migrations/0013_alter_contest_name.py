@@ -0,0 +1,44 @@
+# Generated by Django 5.0.14 on 2026-10-16 22:40
+
+from typing import Any
+
+from django.db import migrations, models
+
+MAX_NAME_LENGTH = 128
+
+
+def rename_duplicates(apps: Any, schema_editor: Any) -> None:
+    """ Make contest names unique: the oldest keeps the name, others get ' (N)'. """
+    Contest = apps.get_model('django_edu', 'Contest')
+    duplicates = (Contest.objects.values('name')
+                  .annotate(amount=models.Count('id'))
+                  .filter(amount__gt=1).values_list('name', flat=True))
+    taken = set(Contest.objects.values_list('name', flat=True))
+    for name in list(duplicates):
+        for contest in Contest.objects.filter(name=name).order_by('id')[1:]:
+            num = 2
+            while True:
+                suffix = f' ({num})'
+                new_name = name[:MAX_NAME_LENGTH - len(suffix)] + suffix
+                if new_name not in taken:
+                    break
+                num += 1
+            taken.add(new_name)
+            contest.name = new_name
+            contest.save(update_fields=['name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_edu', '0012_test_input_file_test_output_file'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='contest',
+            name='name',
+            field=models.CharField(max_length=128, unique=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.14 on 2026-10-16 23:55
+
+import json
+from typing import Any
+
+from django.db import migrations, models
+
+
+def reports_to_json(apps: Any, schema_editor: Any) -> None:
+    """ Html reports can not be parsed back: keep only the verdict of them. """
+    Submission = apps.get_model('django_edu', 'Submission')
+    for passed in (True, False, None):
+        Submission.objects.filter(passed=passed).update(
+            report=json.dumps({'passed': bool(passed)}))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_edu', '0013_alter_contest_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(reports_to_json, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='submission',
+            name='report',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.14 on 2026-10-17 00:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_edu', '0014_alter_submission_report'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='language',
+            field=models.CharField(choices=[('python', 'Python 3'), ('c', 'C'),
+                                            ('cpp', 'C++')],
+                                   default='python', max_length=16),
+        ),
+    ]
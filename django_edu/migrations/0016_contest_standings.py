@@ -0,0 +1,58 @@
+# Generated by Django 5.0.14 on 2026-10-17 02:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_edu', '0015_submission_language'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contest',
+            name='started_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='contest',
+            name='standings_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='TaskResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('solved_at', models.DateTimeField(null=True)),
+                ('penalty', models.PositiveIntegerField(default=0)),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='django_edu.contest')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='django_edu.task')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['contest', 'user'], name='django_edu__contest_fce2bd_idx')],
+                'constraints': [models.UniqueConstraint(fields=('task', 'user'), name='unique_task_result')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ContestResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('solved', models.PositiveIntegerField(default=0)),
+                ('penalty', models.PositiveIntegerField(default=0)),
+                ('cells', models.JSONField(default=dict)),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='django_edu.contest')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['contest', '-solved', 'penalty', 'user'], name='django_edu__contest_24b2bc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('contest', 'user'), name='unique_contest_result')],
+            },
+        ),
+    ]
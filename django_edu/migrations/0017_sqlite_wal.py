@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-17 10:20
+
+from typing import Any
+
+from django.db import migrations
+
+
+def set_journal_mode(mode: str) -> Any:
+    """ Migration function, that sets the SQLite journal mode (it is kept in the db). """
+    def run(apps: Any, schema_editor: Any) -> None:
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA journal_mode={mode}')
+    return run
+
+
+class Migration(migrations.Migration):
+    # the journal mode can not be changed in a transaction
+    atomic = False
+
+    dependencies = [
+        ('django_edu', '0016_contest_standings'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_journal_mode('WAL'), set_journal_mode('DELETE')),
+    ]
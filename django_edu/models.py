@@ -1,10 +1,16 @@
 """
 Django ORM models.
 """
-import re
-from django.db import models
+from datetime import timedelta
+from typing import Any, Iterable, Iterator, Optional
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Substr
+from django.utils import timezone
 from django.utils.translation import gettext as _
-from html5lib import HTMLParser, html5parser
+
+from django_edu import testdata, validation
+from django_edu.runner import DEFAULT_LANGUAGE, LANGUAGES, CompileError, compile_solution
 
 
 class Contest(models.Model):
@@ -15,10 +21,13 @@ class Contest(models.Model):
     ----------
     MAX_NAME_LENGTH : int
         Maximum length of contest name
-    tasks : models.JSONField
-        List of tasks in json format (for orm)
     name : models.CharField
         Contest name
+    started_at : models.DateTimeField
+        Start of the contest, penalty time of solved tasks is counted from it.
+    standings_version : models.PositiveIntegerField
+        Changes with every verdict, that changes the standings (see
+        TaskResult.record()), it tags standings pages for conditional requests.
     """
 
     class ContestNameError(ValueError):
@@ -28,8 +37,9 @@ class Contest(models.Model):
         """ Provide ability to detect specific error """
 
     MAX_NAME_LENGTH = 128
-    tasks = models.JSONField(default=list)
-    name = models.CharField(max_length=MAX_NAME_LENGTH)
+    name = models.CharField(max_length=MAX_NAME_LENGTH, unique=True)
+    started_at = models.DateTimeField(default=timezone.now)
+    standings_version = models.PositiveIntegerField(default=0)
 
     def set_name(self, name: str) -> None:
         """ Check and set contest name """
@@ -40,35 +50,47 @@ class Contest(models.Model):
             raise self.ContestNameError(_('Too long name for a contest'))
         if len(name) == 0:
             raise self.ContestNameError(_('Contest name must not be empty'))
-        if (re.search(r'<([A-Za-z][A-Za-z0-9]*)(([^>])|(\n))*>(((.)|(\n))*)</\1>', name)
-                is not None):
+        if validation.contains_html(name):
             raise self.ContestNameError(_('Contest name must not contain html'))
         # now name is ok: not empty plaintext that fits in MAX_NAME_LENGTH.
-        for contest in Contest.objects.all():
-            if contest.name == name:
-                raise self.ContestNameError(_('Contest name must be unique'))
+        # the unique index enforces it, this is for a friendly error
+        if Contest.objects.filter(name=name).exclude(pk=self.pk).exists():
+            raise self.ContestNameError(_('Contest name must be unique'))
         self.name = name
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """ Save, ContestNameError if the name is taken meanwhile. """
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError as e:
+            # other constraints are not the user's business
+            if not Contest.objects.filter(name=self.name).exclude(pk=self.pk).exists():
+                raise
+            raise self.ContestNameError(_('Contest name must be unique')) from e
+
     def get_tasks(self) -> list['Task']:
         """ Get tasks in this contest. """
-        ids_list = self.tasks
-        tasks_list: list[Task] = []
-        for task_id in ids_list:
-            tasks_list.append(Task.objects.get(id=task_id))
-        return tasks_list
-
-    def append_task(self, task_id: int) -> None:
-        """ Add task to this contest. """
-        ids_list = self.tasks
-        ids_list.append(task_id)
-        self.tasks = ids_list
+        return list(self.task_set.order_by('position', 'id'))
 
-    def delete_task(self, task_id: int) -> None:
+    def append_task(self, task: 'Task') -> None:
         """
-        Unlink task from this contest.
-        Task.delete() must be called manually.
+        Link task to this contest, placing it last.
+        task.save() must be called manually.
         """
-        self.tasks.remove(task_id)
+        last = self.task_set.aggregate(last=models.Max('position'))['last']
+        task.linked_contest = self
+        task.position = 0 if last is None else last + 1
+
+    def delete_task(self, task_id: int) -> None:
+        """ Delete task (with its tests) from this contest. """
+        files = Test.data_files(Test.objects.filter(linked_task_id=task_id,
+                                                    linked_task__linked_contest=self))
+        with transaction.atomic():
+            Task.objects.filter(id=task_id, linked_contest=self).delete()
+            # results of the task are deleted with it
+            ContestResult.rebuild(self.id)
+        Test.remove_unused_files(files)
 
 
 class Task(models.Model):
@@ -92,15 +114,32 @@ class Task(models.Model):
         Type of the answer: test for comparison with ref, or code.
     ref_ans:
         Reference answer for test answer task.
-    tests : models.JSONField
-        list of tests id-s.
-    TODO: eval? custom checker? ans not to be in that very situation with regex & LMS.
+    linked_contest : models.ForeignKey
+        Contest the task belongs to.
+    position : models.PositiveIntegerField
+        Task place in the contest.
+    tests_version : models.PositiveIntegerField
+        Changes every time tests are added or removed, so checks results
+        can be reused while it is the same.
+    comparator : models.CharField
+        How code output is compared with the test output.
+    checker_code : models.TextField
+        Python checker for the custom comparator, see django_edu/comparators.py.
+    TODO: eval? ans not to be in that very situation with regex & LMS.
     """
     class AnsType(models.TextChoices):
         """ Enum in fact, representing the task answer type """
         code = 'C', 'Answer as code'
         text = 'T', 'Answer as text'
 
+    class Comparator(models.TextChoices):
+        """ Enum in fact, representing the way code output is compared """
+        exact = 'E', 'Exact match, except for leading and trailing whitespace'
+        tokens = 'T', 'Whitespace separated tokens'
+        floats = 'F', 'Tokens, numbers with tolerance'
+        lines = 'L', 'Lines in any order'
+        custom = 'C', 'Custom checker'
+
     class TaskNameError(ValueError):
         """ Provide ability to detect specific error """
 
@@ -110,6 +149,9 @@ class Task(models.Model):
     class TaskRefAnsError(ValueError):
         """ Provide ability to detect specific error """
 
+    class TaskCheckerError(ValueError):
+        """ Provide ability to detect specific error """
+
     MAX_NAME_LENGTH = 64
     MAX_TEXT_LENGTH = 1000
     MAX_ANS_LENGTH = 256
@@ -119,8 +161,16 @@ class Task(models.Model):
                                 choices=AnsType.choices,
                                 default=AnsType.code)
     ref_ans = models.CharField(max_length=MAX_ANS_LENGTH, null=True)
-    tests = models.JSONField(default=list, null=True)
     linked_contest = models.ForeignKey(Contest, on_delete=models.CASCADE, default=None)
+    position = models.PositiveIntegerField(default=0)
+    tests_version = models.PositiveIntegerField(default=0)
+    comparator = models.CharField(max_length=1,
+                                  choices=Comparator.choices,
+                                  default=Comparator.exact)
+    checker_code = models.TextField(null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['linked_contest', 'position'])]
 
     def set_ref_ans(self, ref_ans: str) -> None:
         """ Check and set task reference ans (for text ans tasks). """
@@ -133,6 +183,24 @@ class Task(models.Model):
         self.ans_type = self.AnsType.text
         self.ref_ans = ref_ans
 
+    def set_comparator(self, comparator: str, checker_code: str = '') -> None:
+        """ Check and set the way code output is compared (for code ans tasks). """
+        if comparator not in self.Comparator.values:
+            raise self.TaskCheckerError(_('Unknown output comparison'))
+        if comparator == self.Comparator.custom:
+            if len(checker_code.strip()) == 0:
+                raise self.TaskCheckerError(_('Checker code must not be empty'))
+            try:
+                compile_solution(checker_code)
+            except CompileError as e:
+                raise self.TaskCheckerError(
+                    _('Checker code error: {err}').format(err=str(e))
+                ) from e
+            self.checker_code = checker_code
+        else:
+            self.checker_code = None
+        self.comparator = comparator
+
     def set_name(self, name: str) -> None:
         """ Check and set task name. """
         if not isinstance(name, str):
@@ -142,8 +210,7 @@ class Task(models.Model):
             raise self.TaskNameError(_('Too long name for a task'))
         if len(name) == 0:
             raise self.TaskNameError(_('Task name must not be empty'))
-        if (re.search(r'<([A-Za-z][A-Za-z0-9]*)(([^>])|(\n))*>(((.)|(\n))*)</\1>', name)
-                is not None):
+        if validation.contains_html(name):
             raise self.TaskNameError(_('Task name must not contain html'))
         # now name is ok: not empty plaintext that fits in MAX_NAME_LENGTH.
         self.name = name
@@ -157,38 +224,56 @@ class Task(models.Model):
             raise self.TaskTextError(_('Too long text for a task'))
         if len(text) == 0:
             raise self.TaskTextError(_('Task text must not be empty'))
-        if (re.search(r'<(script)(([^>])|(\n))*>(((.)|(\n))*)</\1>', text)
-                is not None):
+        if validation.contains_script(text):
             raise self.TaskTextError(_('Task text must not contain script'))
-        html_parser = HTMLParser(strict=True)
-        try:
-            html_parser.parse('<!DOCTYPE html><html>' + text + ' </html>')
-        except html5parser.ParseError as e:
-            raise self.TaskTextError(_('HTML error: {err}').format(err=repr(e)))
+        html_error = validation.html_error(text)
+        if html_error is not None:
+            raise self.TaskTextError(_('HTML error: {err}').format(err=html_error))
         self.text = text
 
     def get_tests(self) -> list['Test']:
         """ Get tests, associated with this task. """
-        ids_list = self.tests
-        tests_list: list[Test] = []
-        for test_id in ids_list:
-            tests_list.append(Test.objects.get(id=test_id))
-        return tests_list
-
-    def append_test(self, test_id: int) -> None:
-        """ Link test to the task. """
-        ids_list = self.tests
-        ids_list.append(test_id)
-        self.tests = ids_list
+        return list(self.test_set.order_by('position', 'id'))
+
+    def append_test(self, test: 'Test') -> None:
+        """
+        Link test to the task, placing it last.
+        test.save() must be called manually.
+        """
+        last = self.test_set.aggregate(last=models.Max('position'))['last']
+        test.linked_task = self
+        test.position = 0 if last is None else last + 1
 
     def delete_test(self, test_id: int) -> None:
-        """ Unlink test from the task. """
-        self.tests.remove(test_id)
+        """ Delete test of the task. """
+        tests = Test.objects.filter(id=test_id, linked_task=self)
+        files = Test.data_files(tests)
+        tests.delete()
+        Test.remove_unused_files(files)
+
+    def tests_changed(self) -> None:
+        """ Invalidate checks results: call it after tests are added or removed. """
+        Task.objects.filter(id=self.id).update(
+            tests_version=models.F('tests_version') + 1
+        )
+        self.refresh_from_db(fields=['tests_version'])
 
 
 class Test(models.Model):
     """
     Model that holds input & output for a program
+
+    Attributes
+    ----------
+    linked_task : models.ForeignKey
+        Task the test belongs to.
+    position : models.PositiveIntegerField
+        Test place in the task.
+    input_file : models.CharField
+        Digest of the input stored as a file (see django_edu/testdata.py),
+        test_input is empty then.
+    output_file : models.CharField
+        Digest of the output stored as a file, test_output is empty then.
     """
     class TestOutputError(ValueError):
         """ Provide ability to detect specific error """
@@ -196,13 +281,21 @@ class Test(models.Model):
     class TestInputError(ValueError):
         """ Provide ability to detect specific error """
 
+    MAX_PREVIEW_LENGTH = 1000
     test_input = models.TextField()
     test_output = models.TextField()
     linked_task = models.ForeignKey(Task, on_delete=models.CASCADE, default=None)
+    position = models.PositiveIntegerField(default=0)
+    input_file = models.CharField(max_length=64, null=True)
+    output_file = models.CharField(max_length=64, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['linked_task', 'position'])]
 
     def set_input(self, test_input: str) -> None:
         """ Check and set test input. """
         self.test_input = test_input
+        self.input_file = None
 
     def set_output(self, test_output: str) -> None:
         """ Check and set test output. """
@@ -211,3 +304,383 @@ class Test(models.Model):
         if len(test_output) == 0:
             raise self.TestOutputError(_('Test output must not be empty'))
         self.test_output = test_output
+        self.output_file = None
+
+    def set_input_data(self, chunks: Iterable[bytes], size: int) -> None:
+        """
+        Set test input from uploaded data of the size:
+        large data (over settings.TESTS_FILE_THRESHOLD) is stored as a file.
+        """
+        self.test_input, self.input_file = self._text_or_file(chunks, size)
+
+    def set_output_data(self, chunks: Iterable[bytes], size: int) -> None:
+        """ Check and set test output from uploaded data, see set_input_data(). """
+        if size == 0:
+            raise self.TestOutputError(_('Test output must not be empty'))
+        self.test_output, self.output_file = self._text_or_file(chunks, size)
+
+    @staticmethod
+    def _text_or_file(chunks: Iterable[bytes], size: int) -> tuple[str, Optional[str]]:
+        """ Data as text to keep in the db, or '' and the digest of the file with it. """
+        if size <= settings.TESTS_FILE_THRESHOLD:
+            data = b''.join(chunks)
+            try:
+                return data.decode('utf-8'), None
+            except UnicodeDecodeError:
+                chunks = [data]
+        return '', testdata.store(chunks)
+
+    def input_text(self) -> str:
+        """ Whole test input, read from the file if it is stored in a file. """
+        if self.input_file is None:
+            return self.test_input
+        return testdata.read(self.input_file).decode('utf-8', errors='replace')
+
+    def output_text(self) -> str:
+        """ Whole test output, see input_text(). """
+        if self.output_file is None:
+            return self.test_output
+        return testdata.read(self.output_file).decode('utf-8', errors='replace')
+
+    def input_preview(self) -> str:
+        """ Test input to show: only the beginning of long inputs. """
+        return self._preview(self._head('test_input', 'input_head'), self.input_file)
+
+    def output_preview(self) -> str:
+        """ Test output to show: only the beginning of long outputs. """
+        return self._preview(self._head('test_output', 'output_head'), self.output_file)
+
+    def _head(self, field: str, annotation: str) -> str:
+        """ The field value, or its beginning if only it is loaded, see with_heads(). """
+        head: Optional[str] = getattr(self, annotation, None)
+        return head if head is not None else getattr(self, field)
+
+    @classmethod
+    def with_heads(cls, tests: 'models.QuerySet[Test]') -> 'models.QuerySet[Test]':
+        """ Tests without data, but with its beginnings: enough for previews. """
+        return tests.defer('test_input', 'test_output').annotate(
+            input_head=Substr('test_input', 1, cls.MAX_PREVIEW_LENGTH + 1),
+            output_head=Substr('test_output', 1, cls.MAX_PREVIEW_LENGTH + 1),
+        )
+
+    @classmethod
+    def _preview(cls, text: str, digest: Optional[str]) -> str:
+        if digest is None:
+            preview = text[:cls.MAX_PREVIEW_LENGTH]
+            return preview + '...' if len(text) > cls.MAX_PREVIEW_LENGTH else preview
+        data = testdata.read(digest, cls.MAX_PREVIEW_LENGTH + 1)
+        preview = data[:cls.MAX_PREVIEW_LENGTH].decode('utf-8', errors='replace')
+        return preview + '...' if len(data) > cls.MAX_PREVIEW_LENGTH else preview
+
+    def data_chunks(self, kind: str) -> Iterator[bytes]:
+        """ Whole test 'input' or 'output', in chunks (files are not read at once). """
+        text, digest = ((self.test_input, self.input_file) if kind == 'input'
+                        else (self.test_output, self.output_file))
+        if digest is None:
+            yield text.encode('utf-8')
+        else:
+            yield from testdata.chunks(digest)
+
+    @staticmethod
+    def data_files(tests: 'models.QuerySet[Test]') -> set[str]:
+        """ Digests of files with data of the tests. """
+        return {digest
+                for files in tests.values_list('input_file', 'output_file')
+                for digest in files if digest is not None}
+
+    @staticmethod
+    def remove_unused_files(digests: Iterable[str]) -> None:
+        """ Remove files, that no test refers to (files are shared by equal data). """
+        for digest in digests:
+            if not Test.objects.filter(models.Q(input_file=digest)
+                                       | models.Q(output_file=digest)).exists():
+                testdata.remove(digest)
+
+
+class Submission(models.Model):
+    """
+    Model representing an answer submitted for a task, that is a judge queue entry.
+
+    Attributes
+    ----------
+    task : models.ForeignKey
+        Task the answer is submitted for.
+    user : models.ForeignKey
+        Submitter, None for anonymous users.
+    code : models.TextField
+        Submitted answer: code or text, depending on task answer type.
+    language : models.CharField
+        Language of code answers, see runner.LANGUAGES.
+    status : models.CharField
+        Position in the judge queue: pending, running, done or error.
+    passed : models.BooleanField
+        Verdict, None until the submission is judged.
+    report : models.JSONField
+        Report of the check, see checker.Report.to_json().
+    progress : models.JSONField
+        [test number, passed] for already finished tests, while the check is running.
+    worker : models.CharField
+        Name of the judge worker, that claimed the submission.
+    """
+    class Status(models.TextChoices):
+        """ Enum in fact, representing the submission state in the judge queue """
+        pending = 'P', 'Pending'
+        running = 'R', 'Running'
+        done = 'D', 'Done'
+        error = 'E', 'Judge error'
+
+    MAX_WORKER_LENGTH = 64
+    MAX_LANGUAGE_LENGTH = 16
+    task = models.ForeignKey(Task, on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.CASCADE,
+                             null=True)
+    code = models.TextField()
+    language = models.CharField(max_length=MAX_LANGUAGE_LENGTH,
+                                choices=[(name, language.label)
+                                         for name, language in LANGUAGES.items()],
+                                default=DEFAULT_LANGUAGE)
+    status = models.CharField(max_length=1,
+                              choices=Status.choices,
+                              default=Status.pending)
+    passed = models.BooleanField(null=True)
+    report = models.JSONField(default=dict)
+    progress = models.JSONField(default=list)
+    worker = models.CharField(max_length=MAX_WORKER_LENGTH, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True)
+    judged_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'id'])]
+
+    @classmethod
+    def claim(cls, worker: str, batch: int = 8) -> Optional['Submission']:
+        """
+        Take the oldest pending submission for judging.
+        The claim is a conditional UPDATE, so concurrent workers (even on SQLite,
+        which ignores SELECT ... FOR UPDATE) never get the same submission.
+        """
+        candidates = (cls.objects.filter(status=cls.Status.pending)
+                      .order_by('id').values_list('id', flat=True)[:batch])
+        for candidate_id in candidates:
+            claimed = cls.objects.filter(
+                id=candidate_id,
+                status=cls.Status.pending
+            ).update(
+                status=cls.Status.running,
+                worker=worker[:cls.MAX_WORKER_LENGTH],
+                claimed_at=timezone.now()
+            )
+            if claimed:
+                return cls.objects.select_related('task').get(id=candidate_id)
+        return None
+
+    @classmethod
+    def requeue_stale(cls, timeout: float) -> int:
+        """
+        Return to the queue submissions, that are running longer than timeout seconds,
+        i.e. whose worker has died. Return amount of requeued submissions.
+        """
+        stale_since = timezone.now() - timedelta(seconds=timeout)
+        return cls.objects.filter(status=cls.Status.running,
+                                  claimed_at__lt=stale_since).update(
+            status=cls.Status.pending,
+            worker='',
+            claimed_at=None
+        )
+
+    def add_progress(self, test_num: int, verdict: str,
+                     time: float, max_rss: int, save: bool = True) -> None:
+        """
+        Add a finished test status: verdict, cpu seconds and memory in KiB.
+        It is saved, if the submission is saved and save is set.
+        """
+        self.progress.append([test_num, verdict, time, max_rss])
+        if save and self.pk is not None:
+            self.save(update_fields=['progress'])
+
+    def finish(self, passed: Optional[bool], report: dict[str, Any],
+               status: 'Submission.Status' = Status.done) -> None:
+        """
+        Save check results. A submission is counted in the standings once: results
+        of a done submission (judged again, e.g. requeued as stale meanwhile)
+        are not saved.
+        """
+        self.passed = passed
+        self.report = report
+        self.status = status
+        self.judged_at = timezone.now()
+        with transaction.atomic():
+            if self.pk is None:
+                self.save()
+            else:
+                # conditional UPDATE: only the first of concurrent judges saves
+                saved = (Submission.objects.filter(pk=self.pk)
+                         .exclude(status=self.Status.done)
+                         .update(passed=passed, report=report, status=status,
+                                 judged_at=self.judged_at))
+                if not saved:
+                    return
+            if self.user_id is not None and status == self.Status.done:
+                TaskResult.record(self)
+
+
+class TaskResult(models.Model):
+    """
+    Best result of a user for a task, materialized from verdicts of the user
+    submissions by record(): standings never scan submissions.
+
+    Attributes
+    ----------
+    task : models.ForeignKey
+        The task.
+    user : models.ForeignKey
+        The user, anonymous submissions are not counted.
+    contest : models.ForeignKey
+        Contest of the task.
+    attempts : models.PositiveIntegerField
+        Failed submissions before the task is solved.
+    solved_at : models.DateTimeField
+        Submission time of the first passed submission, None while it is unsolved.
+    penalty : models.PositiveIntegerField
+        Minutes from the contest start to solved_at and
+        settings.STANDINGS_PENALTY_MINUTES for every attempt, 0 while it is unsolved.
+    """
+    task = models.ForeignKey(Task, on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    contest = models.ForeignKey(Contest, on_delete=models.CASCADE)
+    attempts = models.PositiveIntegerField(default=0)
+    solved_at = models.DateTimeField(null=True)
+    penalty = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['task', 'user'],
+                                               name='unique_task_result')]
+        indexes = [models.Index(fields=['contest', 'user'])]
+
+    @property
+    def solved(self) -> bool:
+        """ Check if the task is solved. """
+        return self.solved_at is not None
+
+    def cell(self) -> list[Any]:
+        """ Standings cell of the result: [solved, attempts, penalty]. """
+        return [self.solved, self.attempts, self.penalty]
+
+    @classmethod
+    def record(cls, submission: 'Submission') -> None:
+        """
+        Count the verdict of a submission of a registered user in the standings:
+        call it in the transaction, that saves the verdict.
+        Submissions of a solved task change nothing.
+        """
+        task = submission.task
+        user_id, contest_id = submission.user_id, task.linked_contest_id
+        # tasks are saved in contests
+        assert user_id is not None and contest_id is not None
+        if cls.objects.filter(task=task, user_id=user_id,
+                              solved_at__isnull=False).exists():
+            return
+        # locks the contest row, so standings updates of the contest are serialized
+        Contest.objects.filter(id=contest_id).update(
+            standings_version=models.F('standings_version') + 1
+        )
+        result, _created = cls.objects.get_or_create(
+            task=task, user_id=user_id, defaults={'contest_id': contest_id}
+        )
+        if result.solved:
+            return
+        if submission.passed:
+            started_at = (Contest.objects.filter(id=contest_id)
+                          .values_list('started_at', flat=True).get())
+            minutes = (submission.created_at - started_at).total_seconds() // 60
+            result.solved_at = submission.created_at
+            result.penalty = (max(int(minutes), 0)
+                              + settings.STANDINGS_PENALTY_MINUTES * result.attempts)
+        else:
+            result.attempts += 1
+        result.save()
+        ContestResult.add(result)
+
+    @classmethod
+    def recount(cls, contest_id: int) -> int:
+        """
+        Count standings of the contest anew from judged submissions, in the order
+        they were submitted (i.e. ones judged before standings were introduced).
+        Return amount of counted submissions.
+        """
+        submissions = (Submission.objects
+                       .filter(task__linked_contest_id=contest_id, user__isnull=False,
+                               status=Submission.Status.done)
+                       .defer('code', 'report', 'progress').select_related('task')
+                       .order_by('created_at', 'id'))
+        counted = 0
+        with transaction.atomic():
+            cls.objects.filter(contest_id=contest_id).delete()
+            ContestResult.objects.filter(contest_id=contest_id).delete()
+            for submission in submissions.iterator():
+                cls.record(submission)
+                counted += 1
+        return counted
+
+
+class ContestResult(models.Model):
+    """
+    Standings row of a user in a contest: aggregates of the user TaskResult rows,
+    updated together with them. The standings page reads a page of the rows
+    in the order of the index: more solved tasks, then less penalty.
+
+    Attributes
+    ----------
+    contest : models.ForeignKey
+        The contest.
+    user : models.ForeignKey
+        The user.
+    solved : models.PositiveIntegerField
+        Amount of solved tasks, the score.
+    penalty : models.PositiveIntegerField
+        Sum of penalties of solved tasks.
+    cells : models.JSONField
+        {task id: TaskResult.cell()} for tasks, the user has submitted.
+    """
+    contest = models.ForeignKey(Contest, on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    solved = models.PositiveIntegerField(default=0)
+    penalty = models.PositiveIntegerField(default=0)
+    cells = models.JSONField(default=dict)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['contest', 'user'],
+                                               name='unique_contest_result')]
+        indexes = [models.Index(fields=['contest', '-solved', 'penalty', 'user'])]
+
+    @classmethod
+    def add(cls, result: TaskResult) -> None:
+        """ Update the standings row with a changed task result. """
+        row, _created = cls.objects.get_or_create(contest_id=result.contest_id,
+                                                  user_id=result.user_id)
+        if result.solved:
+            row.solved += 1
+            row.penalty += result.penalty
+        # json keys are strings
+        row.cells[str(result.task_id)] = result.cell()
+        row.save()
+
+    @classmethod
+    def rebuild(cls, contest_id: int) -> None:
+        """ Recount standings rows of the contest from task results. """
+        Contest.objects.filter(id=contest_id).update(
+            standings_version=models.F('standings_version') + 1
+        )
+        rows: dict[int, ContestResult] = {}
+        for result in TaskResult.objects.filter(contest_id=contest_id):
+            row = rows.setdefault(result.user_id,
+                                  ContestResult(contest_id=contest_id,
+                                                user_id=result.user_id))
+            if result.solved:
+                row.solved += 1
+                row.penalty += result.penalty
+            row.cells[str(result.task_id)] = result.cell()
+        cls.objects.filter(contest_id=contest_id).delete()
+        ContestResult.objects.bulk_create(rows.values())
@@ -0,0 +1,84 @@
+"""
+Received outputs of failed tests, that do not fit into check reports: they are kept
+for download (see views.submission_output()) in settings.RECEIVED_OUTPUTS_DIR,
+content-addressed as test data (see testdata.py).
+Reports are shared by submissions of the same code (see Checker.verdict_key()),
+so outputs are not deleted with a submission: they expire after
+settings.RECEIVED_OUTPUTS_MAX_AGE, and the oldest ones are removed while the
+directory is larger than settings.RECEIVED_OUTPUTS_MAX_SIZE. A cached report
+is reused only while its outputs are kept, that keeps them anew (see keep()).
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from django.conf import settings
+
+from django_edu import testdata
+
+# Seconds between cleanups of the directory by a process.
+CLEANUP_INTERVAL = 60.0
+
+_cleanup_lock = threading.Lock()
+# Directory: time of its last cleanup by this process.
+_cleaned_at: dict[str, float] = {}
+
+
+def store(data: bytes) -> Optional[str]:
+    """ Keep the output, return its digest. None if it is larger than the storage. """
+    if len(data) > settings.RECEIVED_OUTPUTS_MAX_SIZE:
+        return None
+    data_dir = settings.RECEIVED_OUTPUTS_DIR
+    # an output, that is stored again, is kept anew
+    digest = testdata.store([data], data_dir)
+    with _cleanup_lock:
+        now = time.monotonic()
+        due = now - _cleaned_at.get(data_dir, float('-inf')) >= CLEANUP_INTERVAL
+        if due:
+            _cleaned_at[data_dir] = now
+    if due:
+        cleanup()
+    return digest
+
+
+def keep(digest: str) -> bool:
+    """ Keep the output anew, as if it is stored again, False if it is removed. """
+    try:
+        os.utime(testdata.path(digest, settings.RECEIVED_OUTPUTS_DIR))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def chunks(digest: str) -> Optional[Iterator[bytes]]:
+    """ The output in chunks, None if it is removed already. """
+    try:
+        data_file = testdata.open_file(digest, settings.RECEIVED_OUTPUTS_DIR)
+    except FileNotFoundError:
+        return None
+    return testdata.file_chunks(data_file)
+
+
+def cleanup() -> None:
+    """ Remove expired outputs, then the oldest ones, while the rest are too large. """
+    now = time.time()
+    kept: list[tuple[float, int, Path]] = []
+    for file_path in Path(settings.RECEIVED_OUTPUTS_DIR).glob('??/*'):
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            # removed by another process
+            continue
+        if now - stat.st_mtime > settings.RECEIVED_OUTPUTS_MAX_AGE:
+            file_path.unlink(missing_ok=True)
+        else:
+            kept.append((stat.st_mtime, stat.st_size, file_path))
+    size = sum(file_size for _mtime, file_size, _path in kept)
+    for _mtime, file_size, file_path in sorted(kept):
+        if size <= settings.RECEIVED_OUTPUTS_MAX_SIZE:
+            break
+        file_path.unlink(missing_ok=True)
+        size -= file_size
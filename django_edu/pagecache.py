@@ -0,0 +1,87 @@
+"""
+Page data cache for read-heavy pages: contests list and contest tasks.
+Cached entries are keyed by a version counter of their scope, that views bump
+whenever they add or delete something in the scope, so old entries are never read.
+Entries expire after settings.PAGE_CACHE_TIMEOUT: it bounds staleness of changes,
+that are made elsewhere (i.e. in the admin site, or by other server processes
+while the cache is per-process).
+"""
+
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+T = TypeVar('T')
+
+CONTESTS = 'contests'
+# Roles of users, that are cached in sessions (see django_edu/roles.py).
+ROLES = 'roles'
+
+
+def contest_scope(contest_id: int) -> str:
+    """ Scope of the contest tasks. """
+    return f'contest:{contest_id}'
+
+
+def _version_value(value: Optional[int]) -> int:
+    """ Version, that is read from the cache. """
+    # nothing is kept by a dummy cache: every read is a new version
+    return time.time_ns() if value is None else int(value)
+
+
+def version(scope: str) -> int:
+    """ Current version of the scope. """
+    # a lost (evicted) version starts anew from the clock, not to meet old entries
+    value = caches['pages'].get_or_set(f'version:{scope}', time.time_ns, timeout=None)
+    return _version_value(value)
+
+
+def bump(scope: str) -> None:
+    """ Make entries of the scope outdated: call it after changing its data. """
+    pages = caches['pages']
+    try:
+        pages.incr(f'version:{scope}')
+    except ValueError:
+        pages.set(f'version:{scope}', time.time_ns(), timeout=None)
+
+
+def get_or_load(scope: str, name: str, load: Callable[[], Optional[T]],
+                scope_version: Optional[int] = None) -> Optional[T]:
+    """
+    Cached entry name of the current scope version, or loaded (and cached) one.
+    None from load is returned but not cached.
+    """
+    if scope_version is None:
+        scope_version = version(scope)
+    pages = caches['pages']
+    key = f'page:{scope}:{scope_version}:{name}'
+    value: Optional[T] = pages.get(key)
+    if value is None:
+        value = load()
+        if value is not None:
+            pages.set(key, value, timeout=settings.PAGE_CACHE_TIMEOUT)
+    return value
+
+
+async def aversion(scope: str) -> int:
+    """ version() for async views. """
+    value = await caches['pages'].aget_or_set(f'version:{scope}', time.time_ns,
+                                              timeout=None)
+    return _version_value(value)
+
+
+async def aget_or_load(scope: str, name: str, load: Callable[[], Awaitable[Optional[T]]],
+                       scope_version: Optional[int] = None) -> Optional[T]:
+    """ get_or_load() for async views: load is a coroutine function. """
+    if scope_version is None:
+        scope_version = await aversion(scope)
+    pages = caches['pages']
+    key = f'page:{scope}:{scope_version}:{name}'
+    value: Optional[T] = await pages.aget(key)
+    if value is None:
+        value = await load()
+        if value is not None:
+            await pages.aset(key, value, timeout=settings.PAGE_CACHE_TIMEOUT)
+    return value
@@ -0,0 +1,143 @@
+"""
+Keyset pagination: pages start after (or end before) the key of a row, instead
+of skipping rows with OFFSET, so any page costs the same index range scan.
+"""
+
+from typing import Any, Callable, Generic, NamedTuple, Optional, TypeVar
+
+from django.db import models
+
+Row = TypeVar('Row')
+Key = tuple[int, ...]
+
+
+class KeysetPage(NamedTuple, Generic[Row]):
+    """ Rows of a page, whether there are pages before and after it. """
+    rows: list[Row]
+    has_prev: bool
+    has_next: bool
+
+
+def parse_key(value: Optional[str], size: int) -> Optional[Key]:
+    """ Key from a url parameter: size integers, separated with '-'. None if invalid. """
+    if value is None:
+        return None
+    try:
+        key = tuple(int(part) for part in value.split('-'))
+    except ValueError:
+        return None
+    return key if len(key) == size else None
+
+
+def format_key(key: Key) -> str:
+    """ Key for a url parameter, see parse_key(). """
+    return '-'.join(str(part) for part in key)
+
+
+def _reversed(field: str) -> str:
+    """ Ordering by field the other way: 'name' and '-name' (descending). """
+    return field[1:] if field.startswith('-') else f'-{field}'
+
+
+def _beyond(fields: tuple[str, ...], key: Key, lookup: str) -> models.Q:
+    """
+    Rows, that are after ('gt' lookup) or before ('lt') key in the order of fields,
+    descending ones ('-name') are compared the other way.
+    """
+    condition = models.Q()
+    equal: dict[str, Any] = {}
+    for field, value in zip(fields, key):
+        name = field.lstrip('-')
+        field_lookup = lookup
+        if field.startswith('-'):
+            field_lookup = 'lt' if lookup == 'gt' else 'gt'
+        condition |= models.Q(**equal, **{f'{name}__{field_lookup}': value})
+        equal[name] = value
+    return condition
+
+
+def count_before(queryset: 'models.QuerySet[Any]', fields: tuple[str, ...],
+                 key: Key) -> int:
+    """ Amount of rows before the key (i.e. to number rows of a page). """
+    return queryset.filter(_beyond(fields, key, 'lt')).count()
+
+
+async def acount_before(queryset: 'models.QuerySet[Any]', fields: tuple[str, ...],
+                        key: Key) -> int:
+    """ count_before() for async views. """
+    return await queryset.filter(_beyond(fields, key, 'lt')).acount()
+
+
+def _page_query(queryset: 'models.QuerySet[Any]', fields: tuple[str, ...], size: int,
+                after: Optional[Key], before: Optional[Key]) -> 'models.QuerySet[Any]':
+    """ Rows of the page and one more: it tells if there is a page beyond. """
+    if before is not None:
+        return (queryset.filter(_beyond(fields, before, 'lt'))
+                .order_by(*(_reversed(field) for field in fields))[:size + 1])
+    if after is not None:
+        queryset = queryset.filter(_beyond(fields, after, 'gt'))
+    return queryset.order_by(*fields)[:size + 1]
+
+
+def _make_page(rows: list[Row], size: int, after: Optional[Key],
+               before: Optional[Key]) -> KeysetPage[Row]:
+    """ Page from rows of _page_query(). """
+    if before is not None:
+        return KeysetPage(rows[:size][::-1], len(rows) > size, True)
+    return KeysetPage(rows[:size], after is not None, len(rows) > size)
+
+
+def _with_other_side(page: KeysetPage[Row], field: str,
+                     exists: bool) -> KeysetPage[Row]:
+    """ Page with the field, that _other_side() has given, set to exists. """
+    if field == 'has_next':
+        return page._replace(has_next=exists)
+    return page._replace(has_prev=exists)
+
+
+def _other_side(queryset: 'models.QuerySet[Any]', fields: tuple[str, ...],
+                key: Callable[[Row], Key], page: KeysetPage[Row],
+                after: Optional[Key], before: Optional[Key]
+                ) -> Optional[tuple[str, 'models.QuerySet[Any]']]:
+    """
+    The key, the page was asked by, may be gone: rows on the other side of the page
+    and the page field, that tells if they exist. None if it is known already.
+    """
+    if page.rows and before is not None:
+        return 'has_next', queryset.filter(_beyond(fields, key(page.rows[-1]), 'gt'))
+    if page.rows and after is not None:
+        return 'has_prev', queryset.filter(_beyond(fields, key(page.rows[0]), 'lt'))
+    return None
+
+
+def keyset_page(queryset: 'models.QuerySet[Any]', fields: tuple[str, ...],
+                key: Callable[[Row], Key], size: int,
+                after: Optional[Key] = None,
+                before: Optional[Key] = None) -> KeysetPage[Row]:
+    """
+    Page of size rows of queryset, ordered by fields (that make a unique key,
+    i.e. end with 'id'; '-name' is a descending one): rows right after the after key,
+    right before the before key, or the first ones. key gets the key of a row.
+    """
+    rows: list[Row] = list(_page_query(queryset, fields, size, after, before))
+    page = _make_page(rows, size, after, before)
+    other_side = _other_side(queryset, fields, key, page, after, before)
+    if other_side is not None:
+        field, rows_beyond = other_side
+        page = _with_other_side(page, field, rows_beyond.exists())
+    return page
+
+
+async def akeyset_page(queryset: 'models.QuerySet[Any]', fields: tuple[str, ...],
+                       key: Callable[[Row], Key], size: int,
+                       after: Optional[Key] = None,
+                       before: Optional[Key] = None) -> KeysetPage[Row]:
+    """ keyset_page() for async views. """
+    rows: list[Row] = [row async for row in _page_query(queryset, fields, size,
+                                                        after, before)]
+    page = _make_page(rows, size, after, before)
+    other_side = _other_side(queryset, fields, key, page, after, before)
+    if other_side is not None:
+        field, rows_beyond = other_side
+        page = _with_other_side(page, field, await rows_beyond.aexists())
+    return page
@@ -0,0 +1,48 @@
+"""
+User roles, cached in sessions: every page needs the role of the user, while group
+membership rarely changes.
+A cached role is used while the roles version is the same (it is bumped, when
+membership or groups change, see apps.py) and for settings.ROLE_CACHE_TIMEOUT at most:
+it bounds staleness of changes, that are made by other server processes.
+"""
+
+import time
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.http import HttpRequest
+
+from django_edu import pagecache
+
+# Group of users, that edit contests, tasks and tests.
+TEACHERS = 'teachers'
+# Session key of the cached role: [user id, roles version, check time, *Role].
+SESSION_KEY = 'role'
+
+
+class Role(NamedTuple):
+    """ What a user may do. """
+    is_teacher: bool
+
+
+ANONYMOUS = Role(is_teacher=False)
+
+
+def get_role(request: HttpRequest) -> Role:
+    """ Role of the request user, cached in its session. """
+    user = request.user
+    if not user.is_authenticated:
+        return ANONYMOUS
+    roles_version = pagecache.version(pagecache.ROLES)
+    cached = request.session.get(SESSION_KEY)
+    if (isinstance(cached, list) and cached[:2] == [user.pk, roles_version]
+            and time.time() - cached[2] < settings.ROLE_CACHE_TIMEOUT):
+        return Role(*cached[3:])
+    role = Role(is_teacher=user.groups.filter(name=TEACHERS).exists())
+    request.session[SESSION_KEY] = [user.pk, roles_version, time.time(), *role]
+    return role
+
+
+def roles_changed(**kwargs: Any) -> None:
+    """ Signal handler: make cached roles outdated. """
+    pagecache.bump(pagecache.ROLES)
@@ -0,0 +1,717 @@
+"""
+Runners: ways to execute a solution on a single input.
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import marshal
+import os
+import queue
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterable, NamedTuple, Optional, Union
+
+from django.conf import settings
+
+from django_edu import forkserver
+
+if TYPE_CHECKING:
+    import resource
+
+
+class CompileError(ValueError):
+    """ Solution can not be compiled, message is the compiler output. """
+
+
+class CompilerFailure(CompileError):
+    """ The compiler has failed to run or has timed out: not the solution is to blame. """
+
+
+class Language(NamedTuple):
+    """
+    A language of solutions. Python solutions are compiled to code objects
+    in process, others are compiled to executables by compiler with flags:
+    names of the settings, that configure them.
+    """
+    label: str
+    suffix: str
+    compiler: str = ''
+    flags: str = ''
+
+    def toolchain(self) -> list[str]:
+        """ The compiler and its flags, empty for python. """
+        if not self.compiler:
+            return []
+        return [getattr(settings, self.compiler), *getattr(settings, self.flags)]
+
+
+# Languages of solutions by name.
+LANGUAGES = {
+    'python': Language('Python 3', '.py'),
+    'c': Language('C', '.c', 'CHECKER_CC', 'CHECKER_CFLAGS'),
+    'cpp': Language('C++', '.cpp', 'CHECKER_CXX', 'CHECKER_CXXFLAGS'),
+}
+DEFAULT_LANGUAGE = 'python'
+# Characters of compiler messages, that are kept.
+MAX_COMPILER_OUTPUT = 2**16
+
+
+class CompiledSolution(NamedTuple):
+    """
+    Solution compiled to a code object, that is marshalled, or to an executable
+    file (bytecode is empty then). size is bytes of the bytecode or the executable.
+    """
+    digest: str
+    bytecode: bytes
+    executable: str = ''
+    size: int = 0
+
+
+_compiled_lock = threading.Lock()
+_compiled: OrderedDict[str, Union[CompiledSolution, str]] = OrderedDict()
+# Cache directories, that are checked to be private by this process.
+_private_dirs: set[str] = set()
+
+
+def _is_private(path: Path) -> bool:
+    """ path exists, belongs to the server user and may be written by it only. """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return False
+    if os.name != 'posix':
+        # no owners to check
+        return True
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+
+def _solution_dir(digest: str) -> Path:
+    """
+    Directory of the solution files in settings.CHECKER_CACHE_DIR, the latter
+    is created if needed. Files there are run: raise PermissionError,
+    if other users may write there.
+    """
+    cache_dir = settings.CHECKER_CACHE_DIR
+    with _compiled_lock:
+        checked = cache_dir in _private_dirs
+    if not checked:
+        Path(cache_dir).mkdir(mode=0o700, parents=True, exist_ok=True)
+        if not _is_private(Path(cache_dir)):
+            raise PermissionError(f'{cache_dir} may be written by other users')
+        with _compiled_lock:
+            _private_dirs.add(cache_dir)
+    return Path(cache_dir) / digest
+
+
+def compile_solution(code: str, language: str = DEFAULT_LANGUAGE) -> CompiledSolution:
+    """
+    Compile code, using a process-wide LRU cache keyed by the language, its compiler
+    and flags and the source hash, so that identical resubmissions are not compiled
+    again. Executables are kept in settings.CHECKER_CACHE_DIR, so that other
+    processes do not compile them either.
+    Raise CompileError (cached as well) if code can not be compiled.
+    """
+    toolchain = LANGUAGES[language].toolchain()
+    key = '\0'.join([language, *toolchain, code])
+    digest = hashlib.sha256(key.encode('utf-8', errors='surrogatepass')).hexdigest()
+    with _compiled_lock:
+        cached = _compiled.get(digest)
+        if cached is not None:
+            _compiled.move_to_end(digest)
+    if (isinstance(cached, CompiledSolution) and cached.executable
+            and not os.path.exists(cached.executable)):
+        # the cache directory is cleaned up
+        cached = None
+    if cached is None:
+        if toolchain:
+            cached = _compile_executable(code, LANGUAGES[language], toolchain, digest)
+        else:
+            try:
+                code_obj = compile(code, '<string>', 'exec', dont_inherit=True)
+                bytecode = marshal.dumps(code_obj)
+                cached = CompiledSolution(digest, bytecode, size=len(bytecode))
+            except (SyntaxError, ValueError, RecursionError, MemoryError) as e:
+                cached = ''.join(traceback.format_exception_only(e))
+        with _compiled_lock:
+            _compiled[digest] = cached
+            while len(_compiled) > settings.CHECKER_BYTECODE_CACHE_SIZE:
+                _compiled.popitem(last=False)
+    if isinstance(cached, str):
+        raise CompileError(cached)
+    return cached
+
+
+def _compile_executable(code: str, language: Language, toolchain: list[str],
+                        digest: str) -> Union[CompiledSolution, str]:
+    """
+    Compile code to the executable in its directory of settings.CHECKER_CACHE_DIR,
+    unless it is there already. Return compiler messages, if code is invalid.
+    Raise CompilerFailure, if the compiler fails: it is not cached.
+    """
+    try:
+        executable_dir = _solution_dir(digest)
+    except OSError as e:
+        raise CompilerFailure(f'Compiled solutions can not be kept: {e}') from e
+    executable = executable_dir / 'solution'
+    # a file of another user is replaced, not run
+    if not _is_private(executable):
+        executable_dir.mkdir(mode=0o700, exist_ok=True)
+        tmp_suffix = f'.{os.getpid()}.{threading.get_ident()}.tmp'
+        source = executable_dir / f'solution{language.suffix}'
+        tmp_source = source.with_name(source.name + tmp_suffix)
+        tmp_source.write_text(code, encoding='utf-8', errors='surrogateescape')
+        tmp_source.replace(source)
+        tmp_executable = executable.with_name(executable.name + tmp_suffix)
+        compiler, *flags = toolchain
+        try:
+            # relative paths: messages refer to solution.c, not to the cache
+            # directory; flags follow the source, as libraries must
+            proc = subprocess.run([compiler, source.name, '-o', tmp_executable.name,
+                                   *flags],
+                                  cwd=executable_dir, stdin=subprocess.DEVNULL,
+                                  capture_output=True, check=False,
+                                  timeout=settings.CHECKER_COMPILE_TIME_LIMIT)
+        except subprocess.TimeoutExpired as e:
+            tmp_executable.unlink(missing_ok=True)
+            raise CompilerFailure(f'Compilation takes longer than '
+                                  f'{settings.CHECKER_COMPILE_TIME_LIMIT} seconds') from e
+        except OSError as e:
+            raise CompilerFailure(f'{compiler} can not be run: {e}') from e
+        if proc.returncode != 0:
+            tmp_executable.unlink(missing_ok=True)
+            messages = (proc.stdout + proc.stderr).decode('utf-8', errors='replace')
+            return messages[:MAX_COMPILER_OUTPUT]
+        tmp_executable.replace(executable)
+    return CompiledSolution(digest, b'', str(executable), executable.stat().st_size)
+
+
+class Limits(NamedTuple):
+    """ Resource limits for a run, 0 is no limit. """
+    wall_time: float
+    cpu_time: int
+    memory: int
+    processes: int
+    file_size: int
+    output: int
+
+    @classmethod
+    def from_settings(cls) -> 'Limits':
+        """ Limits, configured by CHECKER_*_LIMIT settings. """
+        return cls(wall_time=settings.CHECKER_TIME_LIMIT,
+                   cpu_time=settings.CHECKER_CPU_LIMIT,
+                   memory=settings.CHECKER_MEMORY_LIMIT,
+                   processes=settings.CHECKER_PROCESS_LIMIT,
+                   file_size=settings.CHECKER_FILE_SIZE_LIMIT,
+                   output=settings.CHECKER_OUTPUT_LIMIT)
+
+    def rlimits(self) -> tuple[int, int, int, int]:
+        """ Arguments for forkserver.set_limits(). """
+        return self.cpu_time, self.memory, self.processes, self.file_size
+
+
+# Gets output chunks as they arrive, returns False to stop the run.
+OutputConsumer = Callable[[bytes], bool]
+# Solution input: data or a file descriptor to read it from, starting at its offset
+# (it is not closed by runners).
+Stdin = Union[bytes, int]
+
+
+class RunResult(NamedTuple):
+    """
+    Outcome of a single solution run.
+    rejected is set if the run is stopped by the output consumer.
+    time is wall clock seconds, cpu_time and max_rss (KiB) are 0 where unknown.
+    max_rss counts memory, that the run has inherited from the forked process.
+    spawn_time is wall clock seconds it took to start the solution, 0 where unknown.
+    """
+    out: bytes
+    err: bytes
+    returncode: int
+    timed_out: bool
+    output_exceeded: bool
+    rejected: bool
+    time: float
+    cpu_time: float
+    max_rss: int
+    spawn_time: float = 0.0
+
+
+class AbstractRunner(ABC):
+    """ Interface for a runner. """
+    @abstractmethod
+    def run(self, solution: CompiledSolution, stdin: Stdin, limits: Limits,
+            consumer: Optional[OutputConsumer] = None) -> RunResult:
+        """
+        Run solution, feeding stdin to it; stdout and stderr are captured,
+        stdout is passed to consumer as it arrives.
+        """
+
+
+def _max_rss_kib(ru_maxrss: int) -> int:
+    """ ru_maxrss is in bytes on macOS and in KiB elsewhere. """
+    return ru_maxrss // 1024 if sys.platform == 'darwin' else ru_maxrss
+
+
+def _kill_group(pgid: int) -> None:
+    """ Kill a run with all processes it has started. """
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+class _Pumped(NamedTuple):
+    """ Output of a run and the reason it is stopped for, if it is. """
+    out: bytes
+    err: bytes
+    timed_out: bool = False
+    output_exceeded: bool = False
+    rejected: bool = False
+
+
+_RunFds = tuple[Optional[int], int, int]
+
+
+def _open_pipes(stdin: Stdin) -> tuple[tuple[int, int, int], _RunFds]:
+    """
+    Pipes for a run: child's stdin, stdout, stderr and the other ends of them.
+    A file descriptor stdin is given to the child as is, without a pipe.
+    """
+    stdin_w: Optional[int] = None
+    if isinstance(stdin, int):
+        child_stdin = os.dup(stdin)
+    else:
+        child_stdin, stdin_w = os.pipe()
+    stdout_r, child_stdout = os.pipe()
+    stderr_r, child_stderr = os.pipe()
+    return (child_stdin, child_stdout, child_stderr), (stdin_w, stdout_r, stderr_r)
+
+
+def _close_fds(fds: Iterable[Optional[int]]) -> None:
+    for fd in fds:
+        if fd is not None:
+            os.close(fd)
+
+
+def _pump(fds: _RunFds, stdin: Stdin, deadline: float,
+          output_limit: int, consumer: Optional[OutputConsumer]) -> _Pumped:
+    """
+    Write stdin data and read stdout and stderr till EOF (fds are in this order),
+    like communicate(), passing stdout chunks to consumer.
+    Stop at deadline, when more than output_limit bytes are read (if it is not 0)
+    or when consumer rejects the output. All fds are closed.
+    """
+    stdin_fd, stdout_fd, _stderr_fd = fds
+    data = b'' if isinstance(stdin, int) else stdin
+    chunks: dict[int, list[bytes]] = {fd: [] for fd in fds[1:]}
+    out_size = 0
+    open_fds = set(fds)
+    offset = 0
+
+    def pumped(**stopped: bool) -> _Pumped:
+        out, err = (b''.join(fd_chunks) for fd_chunks in chunks.values())
+        return _Pumped(out, err, **stopped)
+
+    try:
+        with selectors.DefaultSelector() as selector:
+            if stdin_fd is not None and data:
+                os.set_blocking(stdin_fd, False)
+                selector.register(stdin_fd, selectors.EVENT_WRITE)
+            elif stdin_fd is not None:
+                os.close(stdin_fd)
+                open_fds.discard(stdin_fd)
+            for fd in fds[1:]:
+                selector.register(fd, selectors.EVENT_READ)
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return pumped(timed_out=True)
+                for key, _events in selector.select(remaining):
+                    if stdin_fd is not None and key.fd == stdin_fd:
+                        try:
+                            offset += os.write(stdin_fd, data[offset:offset + 65536])
+                        except BrokenPipeError:
+                            offset = len(data)
+                        if offset >= len(data):
+                            selector.unregister(stdin_fd)
+                            os.close(stdin_fd)
+                            open_fds.discard(stdin_fd)
+                        continue
+                    chunk = os.read(key.fd, 65536)
+                    if not chunk:
+                        selector.unregister(key.fd)
+                        continue
+                    out_size += len(chunk)
+                    if output_limit and out_size > output_limit:
+                        chunk = chunk[:len(chunk) - (out_size - output_limit)]
+                        chunks[key.fd].append(chunk)
+                        return pumped(output_exceeded=True)
+                    chunks[key.fd].append(chunk)
+                    if (key.fd == stdout_fd and consumer is not None
+                            and not consumer(chunk)):
+                        return pumped(rejected=True)
+        return pumped()
+    finally:
+        _close_fds(open_fds)
+
+
+class SpawnRunner(AbstractRunner):
+    """
+    Cold start: a new interpreter for every run.
+    It runs the solution from a .pyc file in settings.CHECKER_CACHE_DIR
+    (executables are run as they are).
+    Resource limits and accounting are POSIX only.
+    """
+    @classmethod
+    def args(cls, solution: CompiledSolution) -> list[str]:
+        """ Command line, that runs the solution. """
+        if solution.executable:
+            return [solution.executable]
+        # the same interpreter as the server's: .pyc magic must match
+        return [sys.executable, str(cls.pyc_path(solution))]
+
+    @staticmethod
+    def pyc_path(solution: CompiledSolution) -> Path:
+        """
+        Path to the solution .pyc file, that is written if needed.
+        Every solution has its own directory, as it becomes sys.path[0].
+        """
+        path = _solution_dir(solution.digest) / 'solution.pyc'
+        # a file of another user is replaced, not run
+        if not _is_private(path):
+            path.parent.mkdir(mode=0o700, exist_ok=True)
+            # magic, flags, mtime and size: the latter are not checked for scripts
+            header = importlib.util.MAGIC_NUMBER + bytes(12)
+            tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+            tmp_path.write_bytes(header + solution.bytecode)
+            tmp_path.replace(path)
+        return path
+
+    def run(self, solution: CompiledSolution, stdin: Stdin, limits: Limits,
+            consumer: Optional[OutputConsumer] = None) -> RunResult:
+        args = self.args(solution)
+        if os.name != 'posix':
+            return self._run_portable(args, stdin, limits, consumer)
+        start = time.perf_counter()
+        deadline = time.monotonic() + limits.wall_time
+        child_fds, fds = _open_pipes(stdin)
+        try:
+            # pylint: disable-next=subprocess-popen-preexec-fn
+            proc = subprocess.Popen(args=args,
+                                    stdin=child_fds[0],
+                                    stdout=child_fds[1],
+                                    stderr=child_fds[2],
+                                    start_new_session=True,
+                                    preexec_fn=partial(forkserver.set_limits,
+                                                       *limits.rlimits()))
+        except OSError:
+            _close_fds(fds)
+            raise
+        finally:
+            _close_fds(child_fds)
+        spawn_time = time.perf_counter() - start
+        with proc:
+            pumped = _pump(fds, stdin, deadline, limits.output, consumer)
+            timed_out = pumped.timed_out
+            waited = None
+            if not (timed_out or pumped.output_exceeded or pumped.rejected):
+                # the child can close stdout and keep running
+                waited = self._wait_until(proc.pid, deadline)
+                timed_out = waited is None
+            if waited is None:
+                _kill_group(proc.pid)
+                waited = os.wait4(proc.pid, 0)
+            _pid, status, rusage = waited
+            # reaped by wait4, Popen must not wait for it
+            proc.returncode = os.waitstatus_to_exitcode(status)
+        return RunResult(pumped.out, pumped.err, proc.returncode, timed_out,
+                         pumped.output_exceeded, pumped.rejected,
+                         time.perf_counter() - start, rusage.ru_utime + rusage.ru_stime,
+                         _max_rss_kib(rusage.ru_maxrss), spawn_time)
+
+    @staticmethod
+    def _wait_until(pid: int, deadline: float
+                    ) -> Optional[tuple[int, int, 'resource.struct_rusage']]:
+        """ Reap the child with wait4(), if it exits before deadline. """
+        pause = 0.001
+        while True:
+            waited = os.wait4(pid, os.WNOHANG)
+            if waited[0]:
+                return waited
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(pause)
+            pause = min(pause * 2, 0.05)
+
+    @staticmethod
+    def _run_portable(args: list[str], stdin: Stdin, limits: Limits,
+                      consumer: Optional[OutputConsumer]) -> RunResult:
+        """ Run without resource limits and accounting, where POSIX api is missing. """
+        if isinstance(stdin, int):
+            with os.fdopen(os.dup(stdin), 'rb') as stdin_file:
+                stdin = stdin_file.read()
+        timed_out = False
+        start = time.perf_counter()
+        with (subprocess.Popen(args=args,
+                               stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)) as proc:
+            try:
+                out, err = proc.communicate(input=stdin, timeout=limits.wall_time)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                out, err = proc.communicate()
+                timed_out = True
+        exceeded = bool(limits.output) and len(out) + len(err) > limits.output
+        if exceeded:
+            out = out[:limits.output]
+            err = err[:limits.output - len(out)]
+        rejected = not exceeded and consumer is not None and not consumer(out)
+        return RunResult(out, err, proc.returncode, timed_out, exceeded, rejected,
+                         time.perf_counter() - start, 0.0, 0)
+
+
+class AsyncSpawnRunner:
+    """
+    SpawnRunner for event loops: solutions are asyncio subprocesses, whose pipes
+    are served by the loop, so a single thread runs any amount of them at a time.
+    Children are reaped by asyncio: cpu_time and max_rss are not accounted
+    (cpu and other limits are still set on POSIX).
+    """
+    async def run(self, solution: CompiledSolution, stdin: Stdin, limits: Limits,
+                  consumer: Optional[OutputConsumer] = None) -> RunResult:
+        """ See AbstractRunner.run(). """
+        args = SpawnRunner.args(solution)
+        kwargs: dict[str, Any] = {}
+        if os.name == 'posix':
+            kwargs = {'start_new_session': True,
+                      'preexec_fn': partial(forkserver.set_limits, *limits.rlimits())}
+        start = time.perf_counter()
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=stdin if isinstance(stdin, int) else asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            **kwargs
+        )
+        spawn_time = time.perf_counter() - start
+        chunks: tuple[list[bytes], list[bytes]] = ([], [])
+        stopped: dict[str, bool] = {}
+        out_size = 0
+
+        async def write(data: bytes) -> None:
+            assert proc.stdin is not None
+            try:
+                proc.stdin.write(data)
+                await proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                proc.stdin.close()
+
+        async def read(stream: Optional[asyncio.StreamReader], idx: int) -> None:
+            nonlocal out_size
+            assert stream is not None
+            while chunk := await stream.read(65536):
+                out_size += len(chunk)
+                if limits.output and out_size > limits.output:
+                    chunks[idx].append(chunk[:len(chunk) - (out_size - limits.output)])
+                    stopped['output_exceeded'] = True
+                    self._kill(proc)
+                    return
+                chunks[idx].append(chunk)
+                if idx == 0 and consumer is not None and not consumer(chunk):
+                    stopped['rejected'] = True
+                    self._kill(proc)
+                    return
+
+        pumps = [asyncio.ensure_future(read(proc.stdout, 0)),
+                 asyncio.ensure_future(read(proc.stderr, 1)),
+                 asyncio.ensure_future(proc.wait())]
+        if not isinstance(stdin, int):
+            pumps.append(asyncio.ensure_future(write(stdin)))
+        try:
+            _done, pending = await asyncio.wait(pumps, timeout=limits.wall_time)
+            if pending and not stopped:
+                stopped['timed_out'] = True
+        finally:
+            if stopped or proc.returncode is None:
+                # timed out, or the check is cancelled
+                self._kill(proc)
+            for pump in pumps:
+                pump.cancel()
+            outcomes = await asyncio.gather(*pumps, return_exceptions=True)
+        for outcome in outcomes:
+            # i.e. an exception of the consumer
+            if isinstance(outcome, Exception):
+                raise outcome
+        await proc.wait()
+        assert proc.returncode is not None
+        out, err = (b''.join(stream_chunks) for stream_chunks in chunks)
+        return RunResult(out, err, proc.returncode, stopped.get('timed_out', False),
+                         stopped.get('output_exceeded', False),
+                         stopped.get('rejected', False),
+                         time.perf_counter() - start, 0.0, 0, spawn_time)
+
+    @staticmethod
+    def _kill(proc: asyncio.subprocess.Process) -> None:
+        """ Kill a run with all processes it has started (they hold its pipes). """
+        if os.name == 'posix':
+            _kill_group(proc.pid)
+        elif proc.returncode is None:
+            proc.kill()
+
+
+class _ForkServer:
+    """ A single warm interpreter process, see django_edu/forkserver.py. """
+    def __init__(self, preload: list[str]) -> None:
+        self.sock, child_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        with child_sock:
+            self.proc = subprocess.Popen(
+                args=[sys.executable, Path(forkserver.__file__),
+                      str(child_sock.fileno()), *preload],
+                pass_fds=[child_sock.fileno()],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL
+            )
+
+    def run(self, solution: CompiledSolution, stdin: Stdin, limits: Limits,
+            consumer: Optional[OutputConsumer] = None) -> RunResult:
+        """ Run solution in a fresh child forked from the warm interpreter. """
+        start = time.perf_counter()
+        deadline = time.monotonic() + limits.wall_time
+        child_fds, fds = _open_pipes(stdin)
+        try:
+            forkserver.send_frame(self.sock,
+                                  (solution.executable or solution.bytecode,
+                                   limits.rlimits()),
+                                  child_fds)
+        except OSError:
+            _close_fds(fds)
+            raise
+        finally:
+            _close_fds(child_fds)
+        self.sock.settimeout(None)
+        (_started, pid), _fds = forkserver.recv_frame(self.sock)
+        spawn_time = time.perf_counter() - start
+        pumped = _pump(fds, stdin, deadline, limits.output, consumer)
+        timed_out = pumped.timed_out
+        exited = None
+        if not (timed_out or pumped.output_exceeded or pumped.rejected):
+            # the child can close stdout and keep running
+            self.sock.settimeout(max(deadline - time.monotonic(), 0.001))
+            try:
+                exited, _fds = forkserver.recv_frame(self.sock)
+            except TimeoutError:
+                timed_out = True
+            self.sock.settimeout(None)
+        if exited is None:
+            # the child leads its own process group, that outlives it while
+            # its descendants hold the pipes, so the group id can not be reused
+            _kill_group(pid)
+            exited, _fds = forkserver.recv_frame(self.sock)
+        _exited, status, cpu_time, max_rss = exited
+        return RunResult(pumped.out, pumped.err, os.waitstatus_to_exitcode(status),
+                         timed_out,
+                         pumped.output_exceeded, pumped.rejected,
+                         time.perf_counter() - start, cpu_time, _max_rss_kib(max_rss),
+                         spawn_time)
+
+    def close(self) -> None:
+        """ Stop the fork server. """
+        self.sock.close()
+        try:
+            self.proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+
+class ForkServerRunner(AbstractRunner):
+    """
+    Pool of warm interpreters: every run happens in a child forked from a warm one,
+    so neither interpreter startup nor preloaded modules imports are paid per run.
+    Executables are run by such a child, forked from a small process rather than
+    from the server. POSIX only.
+
+    Attributes
+    ----------
+    size : int
+        Maximum amount of fork servers (and so simultaneous runs).
+    preload : list[str]
+        Modules imported by fork servers in advance.
+    """
+    size: int
+    preload: list[str]
+
+    def __init__(self, size: int, preload: list[str]) -> None:
+        self.size = size
+        self.preload = preload
+        self._idle: queue.SimpleQueue[_ForkServer] = queue.SimpleQueue()
+        self._started = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_supported() -> bool:
+        """ Check if the platform can fork and pass fds over unix sockets. """
+        return hasattr(os, 'fork') and hasattr(socket, 'send_fds')
+
+    def _acquire(self) -> _ForkServer:
+        with self._lock:
+            if self._idle.empty() and self._started < self.size:
+                self._started += 1
+                return _ForkServer(self.preload)
+        return self._idle.get()
+
+    def _discard(self, server: _ForkServer) -> None:
+        server.close()
+        with self._lock:
+            self._started -= 1
+
+    def run(self, solution: CompiledSolution, stdin: Stdin, limits: Limits,
+            consumer: Optional[OutputConsumer] = None) -> RunResult:
+        server = self._acquire()
+        try:
+            result = server.run(solution, stdin, limits, consumer)
+        except (OSError, EOFError, ValueError):
+            # fork server died, start a new one next time
+            self._discard(server)
+            raise
+        self._idle.put(server)
+        return result
+
+
+_runner_lock = threading.Lock()
+_runners: dict[str, AbstractRunner] = {}
+
+
+def get_runner(backend: Optional[str] = None) -> AbstractRunner:
+    """
+    Get the process-wide runner for the backend ('spawn' or 'forkserver'),
+    settings.CHECKER_BACKEND by default.
+    Falls back to 'spawn', if the platform does not support fork servers.
+    """
+    backend = backend or settings.CHECKER_BACKEND
+    if backend == 'forkserver' and not ForkServerRunner.is_supported():
+        backend = 'spawn'
+    with _runner_lock:
+        if backend not in _runners:
+            if backend == 'forkserver':
+                _runners[backend] = ForkServerRunner(settings.CHECKER_MAX_SANDBOXES,
+                                                     settings.CHECKER_PRELOAD_MODULES)
+            elif backend == 'spawn':
+                _runners[backend] = SpawnRunner()
+            else:
+                raise ValueError(f'Unknown checker backend "{backend}"')
+        return _runners[backend]
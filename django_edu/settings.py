@@ -12,12 +12,16 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# The test suite is run: `manage.py test`.
+TESTING = sys.argv[1:2] == ['test']
+
 dotenv_path = os.path.join(BASE_DIR, ".env")
 load_dotenv()
 
@@ -27,10 +31,22 @@ load_dotenv()
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = str(os.getenv("SECRET_KEY"))
 
+# Settings profile: 'development' (default) or 'production': no debug, static files
+# with hashed names and compressed copies (see django_edu/staticfiles.py).
+PROFILE = os.getenv('DJANGO_PROFILE', 'development')
+if PROFILE not in ('development', 'production'):
+    raise ValueError(f'Unknown DJANGO_PROFILE "{PROFILE}"')
+PRODUCTION = PROFILE == 'production'
+
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DEBUG', '0' if PRODUCTION else '1') == '1'
 
-ALLOWED_HOSTS: list[str] = []
+# Comma separated host names of the site, needed without debug.
+ALLOWED_HOSTS: list[str] = [
+    host for host in os.getenv('ALLOWED_HOSTS',
+                               'localhost,127.0.0.1' if PRODUCTION else '').split(',')
+    if host
+]
 
 
 # Application definition
@@ -42,10 +58,12 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
-    'django.contrib.staticfiles',
+    # staticfiles, that skips unused files (see django_edu/staticfiles.py)
+    'django_edu.staticfiles.StaticFilesConfig',
 ]
 
 MIDDLEWARE = [
+    'django_edu.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,8 +81,15 @@ TEMPLATES = [
         'DIRS': [
             os.path.join(BASE_DIR, 'templates'),
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # templates are parsed once per process (in development the cache
+            # is reset, when a template changes)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -81,12 +106,88 @@ WSGI_APPLICATION = 'django_edu.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE: 'sqlite' (default) or 'postgresql'.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'django_edu'),
+            'USER': os.getenv('DB_USER', ''),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', ''),
+            'PORT': os.getenv('DB_PORT', ''),
+            # persistent connections, checked before reuse
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+elif DB_ENGINE == 'sqlite':
+    # busy timeout and synchronous=NORMAL are set up on connection, see
+    # django_edu/apps.py; the WAL journal is set once by migration 0017
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME', str(BASE_DIR / 'db.sqlite3')),
+        }
     }
+else:
+    raise ValueError(f'Unknown DB_ENGINE "{DB_ENGINE}"')
+# Milliseconds SQLite waits for a lock held by another connection.
+DB_SQLITE_BUSY_TIMEOUT = int(os.getenv('DB_SQLITE_BUSY_TIMEOUT_MS', '5000'))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # checks results, see Checker; locmem cache evicts least recently used entries
+    'verdicts': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'verdicts',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('VERDICT_CACHE_SIZE', '1000')),
+        },
+    },
+    # sessions for 'cache' and 'cached_db' SESSION_BACKEND
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('SESSION_CACHE_SIZE', '10000')),
+        },
+    },
+    # contests and tasks pages data and fragments, see django_edu/pagecache.py
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pages',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('PAGE_CACHE_SIZE', '1000')),
+        },
+    },
 }
+# Seconds the pages cache entries live: longest delay of changes from other sources
+# than the site views (i.e. other processes, while the cache is per-process).
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', '60'))
+# Seconds a user role is cached in the session (see django_edu/roles.py): longest
+# delay of group membership changes, made by other processes.
+ROLE_CACHE_TIMEOUT = int(os.getenv('ROLE_CACHE_TIMEOUT', '60'))
+
+# Sessions
+# Storage: 'db', 'cached_db' (sessions are read from the 'sessions' cache, written
+# to the db as well), 'cache' (the 'sessions' cache only: sessions are lost on restart
+# and are not shared by processes, while it is per-process) or 'signed_cookies'
+# (kept by browsers, signed with SECRET_KEY).
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'db')
+if SESSION_BACKEND not in ('db', 'cached_db', 'cache', 'signed_cookies'):
+    raise ValueError(f'Unknown SESSION_BACKEND "{SESSION_BACKEND}"')
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_BACKEND}'
+SESSION_CACHE_ALIAS = 'sessions'
 
 
 # Password validation
@@ -129,6 +230,126 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = (
   os.path.join(BASE_DIR, 'static'),
 )
+# Collected static files (`manage.py collectstatic`), used in the production profile.
+STATIC_ROOT = os.getenv('STATIC_ROOT', os.path.join(BASE_DIR, 'static_collected'))
+# Serve collected static files by the application in the production profile:
+# 0 if a web server serves STATIC_ROOT at STATIC_URL.
+STATIC_SERVE = os.getenv('STATIC_SERVE', '1') == '1'
+if PRODUCTION:
+    STORAGES = {
+        'default': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        },
+        'staticfiles': {
+            'BACKEND': 'django_edu.staticfiles.CompressedManifestStaticFilesStorage',
+        },
+    }
+
+# Checker
+# Amount of tests of a single check that may run simultaneously.
+CHECKER_WORKERS = int(os.getenv('CHECKER_WORKERS', '4'))
+# Cap on simultaneously running solutions for the whole server process.
+CHECKER_MAX_SANDBOXES = int(os.getenv('CHECKER_MAX_SANDBOXES', str(os.cpu_count() or 1)))
+# Stop checking a solution on the first failed test.
+CHECKER_FAIL_FAST = os.getenv('CHECKER_FAIL_FAST', '0') == '1'
+# How solutions are started: 'spawn' - new interpreter per test,
+# 'forkserver' - fork from pre-warmed interpreters (POSIX only).
+CHECKER_BACKEND = os.getenv('CHECKER_BACKEND', 'forkserver')
+# Compiled solutions kept in memory by a server process.
+CHECKER_BYTECODE_CACHE_SIZE = int(os.getenv('CHECKER_BYTECODE_CACHE_SIZE', '256'))
+# Compilers of C and C++ solutions and their flags (they follow the source file).
+CHECKER_CC = os.getenv('CHECKER_CC', 'gcc')
+CHECKER_CFLAGS = os.getenv('CHECKER_CFLAGS', '-O2 -std=c11 -lm').split()
+CHECKER_CXX = os.getenv('CHECKER_CXX', 'g++')
+CHECKER_CXXFLAGS = os.getenv('CHECKER_CXXFLAGS', '-O2 -std=c++17').split()
+# Wall clock seconds a solution may compile.
+CHECKER_COMPILE_TIME_LIMIT = float(os.getenv('CHECKER_COMPILE_TIME_LIMIT', '10'))
+# Directory for compiled solutions files: they are run, so it is created private
+# to the server user, and it is not used if other users may write there.
+CHECKER_CACHE_DIR = os.getenv('CHECKER_CACHE_DIR',
+                              os.path.join(BASE_DIR, 'checker_cache'))
+# Modules, imported by pre-warmed interpreters in advance.
+CHECKER_PRELOAD_MODULES = os.getenv(
+    'CHECKER_PRELOAD_MODULES',
+    'math,collections,itertools,functools,heapq,bisect,string,re'
+).split(',')
+# Tolerance of numbers comparison (absolute or relative) for tasks with floats comparator.
+CHECKER_FLOAT_EPSILON = float(os.getenv('CHECKER_FLOAT_EPSILON', '1e-6'))
+# Uploaded test inputs and outputs larger than this (KiB) are stored as files.
+TESTS_FILE_THRESHOLD = int(os.getenv('TESTS_FILE_THRESHOLD_KB', '64')) * 2**10
+# Directory for test data files.
+TESTS_DATA_DIR = os.getenv('TESTS_DATA_DIR', os.path.join(BASE_DIR, 'tests_data'))
+# Received outputs of failed tests, that are cut in reports, are kept for download
+# in this directory for RECEIVED_OUTPUTS_MAX_AGE_HOURS, while it is not larger than
+# RECEIVED_OUTPUTS_MAX_SIZE_MB (the oldest ones are removed).
+RECEIVED_OUTPUTS_DIR = os.getenv('RECEIVED_OUTPUTS_DIR',
+                                 os.path.join(BASE_DIR, 'received_outputs'))
+RECEIVED_OUTPUTS_MAX_AGE = (float(os.getenv('RECEIVED_OUTPUTS_MAX_AGE_HOURS', '168'))
+                            * 3600)
+RECEIVED_OUTPUTS_MAX_SIZE = int(os.getenv('RECEIVED_OUTPUTS_MAX_SIZE_MB', '256')) * 2**20
+# Uploaded test files and tests archives (both packed and unpacked), MiB.
+TESTS_UPLOAD_MAX_SIZE = int(os.getenv('TESTS_UPLOAD_MAX_SIZE_MB', '256')) * 2**20
+# Limits for a single solution run, 0 disables a limit (all but the wall clock one).
+# Wall clock seconds.
+CHECKER_TIME_LIMIT = float(os.getenv('CHECKER_TIME_LIMIT', '3'))
+# CPU seconds (POSIX only, as all limits below but the output one).
+CHECKER_CPU_LIMIT = int(os.getenv('CHECKER_CPU_LIMIT', '2'))
+# Address space, MiB.
+CHECKER_MEMORY_LIMIT = int(os.getenv('CHECKER_MEMORY_LIMIT_MB', '256')) * 2**20
+# Processes of the user, that runs solutions (not applied to root): RLIMIT_NPROC
+# counts all processes and threads of the user, not of a run. So it is set only,
+# if the judge runs under a dedicated uid: then 1 forbids solutions to start
+# processes and threads. Under the server's own user it would fail its runs.
+CHECKER_PROCESS_LIMIT = int(os.getenv('CHECKER_PROCESS_LIMIT', '0'))
+# Size of files written by a solution, MiB.
+CHECKER_FILE_SIZE_LIMIT = int(os.getenv('CHECKER_FILE_SIZE_LIMIT_MB', '1')) * 2**20
+# Captured output (stdout and stderr), MiB.
+CHECKER_OUTPUT_LIMIT = int(os.getenv('CHECKER_OUTPUT_LIMIT_MB', '1')) * 2**20
+
+# Judge queue
+# Enqueue code submissions for `manage.py judge` instead of checking them in the request.
+JUDGE_ASYNC = os.getenv('JUDGE_ASYNC', '0') == '1'
+# Amount of submissions judged simultaneously by `manage.py judge`.
+JUDGE_WORKERS = int(os.getenv('JUDGE_WORKERS', '2'))
+# Seconds a submission progress stream is kept open, then clients reconnect.
+JUDGE_EVENTS_TIMEOUT = float(os.getenv('JUDGE_EVENTS_TIMEOUT', '30'))
+# Seconds after which a running submission is considered abandoned by a dead worker.
+JUDGE_STALE_TIMEOUT = float(os.getenv('JUDGE_STALE_TIMEOUT', '300'))
+
+# Standings
+# Penalty minutes for every failed submission of a task, that is solved at last.
+STANDINGS_PENALTY_MINUTES = int(os.getenv('STANDINGS_PENALTY_MINUTES', '20'))
+
+# Web server
+# Serve contests, tasks and tests pages with async views (django_edu/async_views.py),
+# for the ASGI application: `uvicorn django_edu.asgi:application`.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', '0') == '1'
+
+# Instrumentation
+# Record request and check timings, served at /metrics/ (see django_edu/metrics.py).
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+# /metrics/ is served to staff users and to scrapers with this bearer token, if set.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Structured (json) log lines with timings of every request and judged submission.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # json lines of requests and judged submissions, see metrics.log_event(),
+        # they are not written by `manage.py test`
+        'django_edu.events': {
+            'handlers': ['console'],
+            'level': os.getenv('METRICS_LOG_LEVEL', 'WARNING' if TESTING else 'INFO'),
+            'propagate': False,
+        },
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
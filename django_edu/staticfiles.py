@@ -0,0 +1,132 @@
+"""
+Static files of the production profile (see settings.PROFILE): collected with
+content-hashed names, css files get gzip and brotli copies, and are served with
+far-future cache headers, if no web server serves settings.STATIC_ROOT.
+"""
+
+import gzip
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+from typing import Any, Iterator, Union
+
+from django.conf import settings
+from django.contrib.staticfiles.apps import StaticFilesConfig as BaseStaticFilesConfig
+from django.contrib.staticfiles.storage import (ManifestStaticFilesStorage,
+                                                staticfiles_storage)
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.http import FileResponse, Http404, HttpRequest
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:  # optional, see pyproject.toml
+    brotli = None
+
+# Seconds browsers keep files with hashed names: they never change.
+HASHED_MAX_AGE = 365 * 24 * 3600
+# Files, that get compressed copies.
+COMPRESSED_PATTERNS = ('*.css',)
+# Source map references: maps are not collected.
+_SOURCE_MAP_RE = re.compile(rb'\n?/\*# sourceMappingURL=[^*]*\*/[ \t]*')
+# Original name, hashed name and whether it is processed, or the error for a name.
+PostProcessed = Union[tuple[str, str, bool], tuple[str, None, RuntimeError]]
+
+
+class StaticFilesConfig(BaseStaticFilesConfig):
+    """ staticfiles app, that does not collect unused old files and source maps. """
+    ignore_patterns = BaseStaticFilesConfig.ignore_patterns + ['old', '*.map']
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage (names with content hashes, see django docs),
+    that strips source map references from css and writes compressed copies of it:
+    name.gz and name.br (if brotli is installed) next to every version of a file.
+    """
+    def post_process(self, *args: Any, **kwargs: Any) -> Iterator[PostProcessed]:
+        # arguments of HashedFilesMixin.post_process()
+        return self._post_process_compressed(*args, **kwargs)
+
+    def _post_process_compressed(self, paths: dict[str, tuple[Storage, str]],
+                                 dry_run: bool = False,
+                                 **options: Any) -> Iterator[PostProcessed]:
+        if dry_run:
+            return
+        paths = dict(paths)
+        for name in paths:
+            if name.endswith('.css'):
+                self._strip_source_maps(name)
+                # files are hashed as they are read from paths: collected copies
+                # are stripped, originals are not (on later runs too)
+                paths[name] = (self, name)
+        written: set[str] = set()
+        for processed_file in super().post_process(paths, dry_run=dry_run, **options):
+            yield processed_file
+            name, hashed_name, processed = processed_file
+            if isinstance(processed, Exception) or not _compressed(name):
+                continue
+            for path in (name, hashed_name):
+                if path is not None and path not in written:
+                    self._write_compressed(path)
+                    written.add(path)
+
+    def _strip_source_maps(self, name: str) -> None:
+        with self.open(name) as css_file:
+            content = css_file.read()
+        stripped = _SOURCE_MAP_RE.sub(b'', content)
+        if stripped != content:
+            self.delete(name)
+            self.save(name, ContentFile(stripped))
+
+    def _write_compressed(self, name: str) -> None:
+        path = Path(self.path(name))
+        content = path.read_bytes()
+        path.with_name(path.name + '.gz').write_bytes(
+            gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            path.with_name(path.name + '.br').write_bytes(brotli.compress(content))
+
+
+def _compressed(name: str) -> bool:
+    """ Check if name gets compressed copies. """
+    return any(Path(name).match(pattern) for pattern in COMPRESSED_PATTERNS)
+
+
+def serve(request: HttpRequest, path: str) -> FileResponse:
+    """
+    Serve a collected static file, its compressed copy if the client accepts it.
+    Files with hashed names are cached by browsers for HASHED_MAX_AGE.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = Path(safe_join(settings.STATIC_ROOT, path))
+    except ValueError as e:
+        raise Http404(path) from e
+    if not full_path.is_file():
+        raise Http404(path)
+    content_type, _encoding = mimetypes.guess_type(full_path.name)
+    accepted = request.headers.get('Accept-Encoding', '')
+    encoding = None
+    if _compressed(path):
+        for suffix, name in (('.br', 'br'), ('.gz', 'gzip')):
+            compressed_path = full_path.with_name(full_path.name + suffix)
+            if name in accepted and compressed_path.is_file():
+                full_path = compressed_path
+                encoding = name
+                break
+    response = FileResponse(full_path.open('rb'),
+                            content_type=content_type or 'application/octet-stream')
+    if encoding is not None:
+        response['Content-Encoding'] = encoding
+    if _compressed(path):
+        patch_vary_headers(response, ('Accept-Encoding',))
+    if (isinstance(staticfiles_storage, ManifestStaticFilesStorage)
+            and path in staticfiles_storage.hashed_files.values()):
+        response['Cache-Control'] = f'public, max-age={HASHED_MAX_AGE}, immutable'
+    else:
+        response['Cache-Control'] = 'no-cache'
+    return response
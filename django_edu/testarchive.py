@@ -0,0 +1,159 @@
+"""
+Bulk tests import and export: zip archives with NN.in / NN.out pairs.
+"""
+
+import io
+import posixpath
+import zipfile
+from typing import IO, Iterator, cast
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils.translation import gettext as _
+
+from django_edu import testdata
+from django_edu.models import Task, Test
+
+
+class TestsArchiveError(ValueError):
+    """ Archive can not be imported. """
+
+
+def _chunks(data: IO[bytes]) -> Iterator[bytes]:
+    while chunk := data.read(testdata.CHUNK_SIZE):
+        yield chunk
+
+
+def _test_key(name: str) -> tuple[int, str]:
+    """ Numbered tests go first and in numeric order: 2 before 10. """
+    return (int(name), name) if name.isdigit() else (-1, name)
+
+
+def _pairs(archive: zipfile.ZipFile) -> list[tuple[zipfile.ZipInfo, zipfile.ZipInfo]]:
+    """ (input, output) members of the archive in tests order. """
+    inputs: dict[str, zipfile.ZipInfo] = {}
+    outputs: dict[str, zipfile.ZipInfo] = {}
+    for info in archive.infolist():
+        if info.is_dir():
+            continue
+        name, ext = posixpath.splitext(posixpath.basename(info.filename))
+        if ext == '.in':
+            inputs[name] = info
+        elif ext == '.out':
+            outputs[name] = info
+    unpaired = sorted(inputs.keys() ^ outputs.keys())
+    if unpaired:
+        raise TestsArchiveError(
+            _('Tests without input or output: {names}').format(names=', '.join(unpaired))
+        )
+    if not inputs:
+        raise TestsArchiveError(_('No NN.in / NN.out files in the archive'))
+    return [(inputs[name], outputs[name]) for name in sorted(inputs, key=_test_key)]
+
+
+def import_tests(task: Task, archive_file: IO[bytes]) -> int:
+    """
+    Append tests from a zip archive to the task, return amount of added tests.
+    Members are read in chunks, large ones go straight to files (see testdata.py),
+    and all tests are inserted with a single query.
+    """
+    try:
+        archive = zipfile.ZipFile(archive_file)
+    except zipfile.BadZipFile as e:
+        raise TestsArchiveError(_('Not a zip archive')) from e
+    new_tests: list[Test] = []
+    with archive:
+        pairs = _pairs(archive)
+        # members are never unpacked beyond their declared sizes
+        unpacked_size = sum(info.file_size for pair in pairs for info in pair)
+        if unpacked_size > settings.TESTS_UPLOAD_MAX_SIZE:
+            raise TestsArchiveError(
+                _('Tests in the archive are larger than {size} MiB')
+                .format(size=settings.TESTS_UPLOAD_MAX_SIZE // 2**20)
+            )
+        for index, (input_info, output_info) in enumerate(pairs):
+            test = Test()
+            try:
+                with archive.open(input_info) as data:
+                    test.set_input_data(_chunks(data), input_info.file_size)
+                with archive.open(output_info) as data:
+                    test.set_output_data(_chunks(data), output_info.file_size)
+            except Test.TestOutputError as e:
+                _remove_files(new_tests + [test])
+                raise TestsArchiveError(
+                    _('Test {name}: {err}').format(name=output_info.filename, err=str(e))
+                ) from e
+            except (zipfile.BadZipFile, OSError) as e:
+                _remove_files(new_tests + [test])
+                raise TestsArchiveError(
+                    _('Broken archive: {err}').format(err=str(e))
+                ) from e
+            test.linked_task = task
+            test.position = index
+            new_tests.append(test)
+    try:
+        with transaction.atomic():
+            # tests are placed after the last one, as with Task.append_test()
+            last = task.test_set.aggregate(last=models.Max('position'))['last']
+            first = 0 if last is None else last + 1
+            for test in new_tests:
+                test.position += first
+            Test.objects.bulk_create(new_tests)
+            task.tests_changed()
+    except Exception:
+        _remove_files(new_tests)
+        raise
+    return len(new_tests)
+
+
+def _remove_files(tests: list[Test]) -> None:
+    """ Remove files, stored for tests, that were not imported after all. """
+    Test.remove_unused_files({digest
+                              for test in tests
+                              for digest in (test.input_file, test.output_file)
+                              if digest is not None})
+
+
+class _StreamBuffer(io.RawIOBase):
+    """ Unseekable file, whose written data is taken away by the reader. """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._data = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:  # type: ignore[override]
+        self._data += data
+        return len(data)
+
+    def take(self) -> Iterator[bytes]:
+        """ Data written since the previous call, if any. """
+        if self._data:
+            data = bytes(self._data)
+            self._data.clear()
+            yield data
+
+
+def export_tests(task: Task) -> Iterator[bytes]:
+    """
+    Task tests as a zip archive, generated on the fly: only a chunk of a test
+    is in memory at a time, so it can be given to StreamingHttpResponse.
+    """
+    tests = task.get_tests()
+    width = max(2, len(str(len(tests))))
+    buffer = _StreamBuffer()
+    # a raw stream is a binary file, though not for typeshed
+    with zipfile.ZipFile(cast(IO[bytes], buffer), 'w',
+                         compression=zipfile.ZIP_DEFLATED) as archive:
+        for test_num, test in enumerate(tests, start=1):
+            for kind, ext in (('input', 'in'), ('output', 'out')):
+                name = f'{test_num:0{width}}.{ext}'
+                # size is unknown for the unseekable stream, allow large members
+                with archive.open(name, 'w', force_zip64=True) as member:
+                    for chunk in test.data_chunks(kind):
+                        member.write(chunk)
+                        yield from buffer.take()
+                yield from buffer.take()
+    yield from buffer.take()
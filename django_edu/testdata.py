@@ -0,0 +1,94 @@
+"""
+Test data storage: large test inputs and outputs are kept out of the db,
+as content-addressed files in settings.TESTS_DATA_DIR named by their sha256.
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Optional, Union
+
+from django.conf import settings
+
+_DIGEST_RE = re.compile(r'[0-9a-f]{64}')
+# Size of chunks, the files are read in.
+CHUNK_SIZE = 2**16
+
+
+def path(digest: str, data_dir: Optional[str] = None) -> Path:
+    """
+    Path to the file with the digest. Files are kept in data_dir,
+    settings.TESTS_DATA_DIR by default (all functions below take it).
+    """
+    if _DIGEST_RE.fullmatch(digest) is None:
+        raise ValueError(f'Invalid test data digest "{digest}"')
+    return Path(data_dir or settings.TESTS_DATA_DIR) / digest[:2] / digest
+
+
+def store(chunks: Iterable[bytes], data_dir: Optional[str] = None) -> str:
+    """ Write data, arriving in chunks, to the storage (if it is not there yet). """
+    root = Path(data_dir or settings.TESTS_DATA_DIR)
+    root.mkdir(parents=True, exist_ok=True)
+    tmp_path = root / f'.{os.getpid()}.{threading.get_ident()}.tmp'
+    sha = hashlib.sha256()
+    with open(tmp_path, 'wb') as tmp_file:
+        for chunk in chunks:
+            sha.update(chunk)
+            tmp_file.write(chunk)
+    digest = sha.hexdigest()
+    file_path = path(digest, data_dir)
+    file_path.parent.mkdir(exist_ok=True)
+    tmp_path.replace(file_path)
+    return digest
+
+
+def open_file(digest: str, data_dir: Optional[str] = None) -> BinaryIO:
+    """ Open the file for reading, every call gets its own file offset. """
+    return open(path(digest, data_dir), 'rb')
+
+
+@contextmanager
+def mapped(digest: str) -> Iterator[Union[mmap.mmap, bytes]]:
+    """ The file contents, memory-mapped, so that they are read on demand. """
+    with open_file(digest) as data_file:
+        if os.fstat(data_file.fileno()).st_size == 0:
+            # empty files can not be mapped
+            yield b''
+            return
+        data = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield data
+        finally:
+            try:
+                data.close()
+            except BufferError:
+                # still used by a parser (i.e. a re iterator):
+                # unmapped as soon as it is collected
+                pass
+
+
+def chunks(digest: str, data_dir: Optional[str] = None) -> Iterator[bytes]:
+    """ The file contents in chunks, not to hold the whole file in memory. """
+    yield from file_chunks(open_file(digest, data_dir))
+
+
+def file_chunks(data_file: BinaryIO) -> Iterator[bytes]:
+    """ Contents of an open file in chunks, the file is closed after them. """
+    with data_file:
+        while chunk := data_file.read(CHUNK_SIZE):
+            yield chunk
+
+
+def read(digest: str, size: int = -1) -> bytes:
+    """ Read the file or its first size bytes. """
+    with open_file(digest) as data_file:
+        return data_file.read(size)
+
+
+def remove(digest: str) -> None:
+    """ Remove the file, if it exists. """
+    path(digest).unlink(missing_ok=True)
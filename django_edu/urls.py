@@ -14,16 +14,39 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path
-from . import views
+from django.urls import path, re_path
+from . import async_views, staticfiles, views
+
+# the most visited pages are served by async views under ASGI, if enabled
+pages = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     path('', views.index),
-    path('contests/', views.contests),
-    path('tasks/<int:contest_id>/', views.tasks),
-    path('tasks/<int:contest_id>/<int:task_num>', views.tasks),
-    path('tests/<int:task_id>/', views.tests),
+    path('contests/', pages.contests),
+    path('tasks/<int:contest_id>/', pages.tasks),
+    path('tasks/<int:contest_id>/<int:task_num>', pages.tasks),
+    path('standings/<int:contest_id>/', views.standings),
+    path('tests/<int:task_id>/', pages.tests),
+    path('tests/<int:task_id>/export/', views.tests_export),
+    path('tests/<int:task_id>/<int:test_id>/input/', views.test_data,
+         {'kind': 'input'}),
+    path('tests/<int:task_id>/<int:test_id>/output/', views.test_data,
+         {'kind': 'output'}),
+    path('submissions/<int:submission_id>/', views.submission_status),
+    path('submissions/<int:submission_id>/events/', views.submission_events),
+    path('submissions/<int:submission_id>/tests/<int:test_num>/received/',
+         views.submission_output, {'kind': 'received'}),
+    path('submissions/<int:submission_id>/tests/<int:test_num>/expected/',
+         views.submission_output, {'kind': 'expected'}),
     path('login/', views.login),
+    path('metrics/', views.metrics_view),
     path('admin/', admin.site.urls),
 ]
+
+if settings.PRODUCTION and settings.STATIC_SERVE:
+    static_prefix = re.escape((settings.STATIC_URL or '').lstrip('/'))
+    urlpatterns.append(re_path(rf'^{static_prefix}(?P<path>.*)$', staticfiles.serve))
@@ -0,0 +1,48 @@
+"""
+Validation of user supplied names and html texts.
+Patterns are precompiled and linear-time: tags can not contain '<', so no
+position of the input is scanned more than a bounded amount of times.
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional
+
+from html5lib import HTMLParser, html5parser
+
+# A start or an end tag: '/' (end tag or ''), tag name.
+_TAG_RE = re.compile(r'<(/?)([A-Za-z][A-Za-z0-9]*)[^<>]*>')
+_SCRIPT_RE = re.compile(r'<script(?![A-Za-z0-9])', re.IGNORECASE)
+
+# Validated html texts kept: they are short (see Task.MAX_TEXT_LENGTH).
+HTML_CACHE_SIZE = 256
+
+
+def contains_html(text: str) -> bool:
+    """ Check if text has an element: a start tag and an end tag of the same name. """
+    opened: set[str] = set()
+    for match in _TAG_RE.finditer(text):
+        is_end, name = match.groups()
+        if not is_end:
+            opened.add(name)
+        elif name in opened:
+            return True
+    return False
+
+
+def contains_script(text: str) -> bool:
+    """ Check if text has a script start tag (closed or not, browsers run both). """
+    return _SCRIPT_RE.search(text) is not None
+
+
+@lru_cache(maxsize=HTML_CACHE_SIZE)
+def html_error(text: str) -> Optional[str]:
+    """
+    First error of a strict html parse of text as a document body, None if it is valid.
+    Results are memoized, as the same texts are validated again and again.
+    """
+    try:
+        HTMLParser(strict=True).parse('<!DOCTYPE html><html>' + text + ' </html>')
+    except html5parser.ParseError as e:
+        return repr(e)
+    return None
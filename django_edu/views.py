@@ -1,20 +1,73 @@
 """
 Django's views mechanism: generating html based on templates.
 """
-from typing import Any
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from typing import Any, AsyncIterator, Iterator, Optional, TypedDict, Union
 
-from django.shortcuts import render
+from django.conf import settings
+from django import shortcuts
+from django.core.files.uploadedfile import UploadedFile
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import QuerySet
 from django.http import (HttpRequest,
                          HttpResponse,
                          HttpResponseNotFound,
-                         HttpResponseRedirect)
+                         HttpResponseRedirect,
+                         JsonResponse,
+                         StreamingHttpResponse)
+from django.http.response import HttpResponseBase
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from django.utils.translation import gettext as _
 from django.contrib import auth
 
+from django_edu import metrics, outputs, pagecache, roles
 from django_edu.models import Contest
 from django_edu.models import Task
 from django_edu.models import Test
-from django_edu.checker import Checker
+from django_edu.models import Submission
+from django_edu.models import ContestResult
+from django_edu.pagination import (KeysetPage, count_before, format_key, keyset_page,
+                                   parse_key)
+from django_edu.checker import Checker, Report, TestStatus, Verdict
+from django_edu.runner import DEFAULT_LANGUAGE, LANGUAGES
+from django_edu.judge import judge
+from django_edu.testarchive import TestsArchiveError, export_tests, import_tests
+
+# Contests on a page of the contests list.
+CONTESTS_PER_PAGE = 50
+# Tests on a page of the tests editing page.
+TESTS_PER_PAGE = 50
+TESTS_ORDER = ('position', 'id')
+# Users on a page of contest standings.
+STANDINGS_PER_PAGE = 100
+# Standings order: more solved tasks, less penalty, see ContestResult.
+STANDINGS_ORDER = ('-solved', 'penalty', 'user_id')
+# Amount of anonymous submissions, whose status can be polled from a session.
+MAX_SESSION_SUBMISSIONS = 32
+# Seconds between submission progress checks in event streams.
+EVENTS_POLL_INTERVAL = 0.25
+# Submission fields, that event streams follow.
+EVENTS_FIELDS = ['status', 'passed', 'report', 'progress']
+
+
+class TaskRow(TypedDict):
+    """ Task of a contest, as it is listed on its pages (and cached). """
+    id: int
+    name: str
+    ans_type: str
+
+
+def render(request: HttpRequest, template_name: str,
+           context: dict[str, Any]) -> HttpResponse:
+    """ Render the template, timing it. """
+    with metrics.span('render'):
+        return shortcuts.render(request, template_name, context=context)
 
 
 def handle_misc_actions(request: HttpRequest) -> None:
@@ -36,10 +89,16 @@ def init_login_context(request: HttpRequest, context: dict[str, Any]) -> dict[st
     if request.user.is_authenticated:
         context['user_logged_in'] = True
         context['user_login'] = request.user.username
-        context['user_is_admin'] = request.user.groups.filter(name='teachers')
+        context['user_is_admin'] = roles.get_role(request).is_teacher
     return context
 
 
+def update_session(request: HttpRequest, key: str, value: Any) -> None:
+    """ Set a session value, so that the session is saved only if it is changed. """
+    if request.session.get(key) != value:
+        request.session[key] = value
+
+
 def index(request: HttpRequest) -> HttpResponse:
     """ Index page. """
     handle_misc_actions(request)
@@ -56,11 +115,10 @@ def login(request: HttpRequest) -> HttpResponse:
 
     if request.method == 'GET':
         # on GET - save prev page, on POST use
-        login_prev_page = request.META.get('HTTP_REFERER', '/')
-        request.session['login_prev_page'] = login_prev_page
+        update_session(request, 'login_prev_page', request.META.get('HTTP_REFERER', '/'))
 
     if request.method == 'POST':
-        login_prev_page = request.session.get('login_prev_page')
+        login_prev_page = request.session.get('login_prev_page', '/')
         username = request.POST.get('login')
         password = request.POST.get('password')
         user = auth.authenticate(request, username=username, password=password)
@@ -85,6 +143,7 @@ def contests(request: HttpRequest) -> HttpResponse:
                 new_contest = Contest()
                 new_contest.set_name(new_contest_name)
                 new_contest.save()
+                pagecache.bump(pagecache.CONTESTS)
             except Contest.ContestNameError as e:
                 context['contest_name_error'] = str(e)
         elif form_descr == 'contest_delete':
@@ -92,32 +151,181 @@ def contests(request: HttpRequest) -> HttpResponse:
             if contest_to_delete_id_str is None:
                 raise RuntimeError('HTML Template is broken')
             Contest.objects.get(id=int(contest_to_delete_id_str)).delete()
+            pagecache.bump(pagecache.CONTESTS)
+            pagecache.bump(pagecache.contest_scope(int(contest_to_delete_id_str)))
+
+    after = parse_key(request.GET.get('after'), 1)
+    before = parse_key(request.GET.get('before'), 1)
 
-    context["contest_list"] = []
-    for contest in Contest.objects.all():
-        context["contest_list"].append((contest.id, contest.name))
+    def load_page() -> dict[str, Any]:
+        page: KeysetPage[tuple[int, str]] = keyset_page(
+            Contest.objects.values_list('id', 'name'), ('id',),
+            lambda row: (row[0],), CONTESTS_PER_PAGE, after, before)
+        return contests_page_context(page)
+
+    contests_page = pagecache.get_or_load(pagecache.CONTESTS, f'list:{after}:{before}',
+                                          load_page)
+    context.update(contests_page or {})
     if len(context["contest_list"]) == 0:
         context["contest_list_is_empty"] = True
     return render(request, "contests.html", context=context)
 
 
-def tasks(request: HttpRequest, contest_id: int, task_num: int = 0) -> HttpResponse:
-    """ Tasks page. Represents selected contest. """
-    handle_misc_actions(request)
-    context: dict[str, Any] = {}
-    context = init_login_context(request, context)
+def contests_page_context(page: KeysetPage[tuple[int, str]]) -> dict[str, Any]:
+    """ Context part, that describes a page of contests (id, name), it is cached. """
+    return {'contest_list': page.rows,
+            'prev_page_key': format_key((page.rows[0][0],))
+            if page.has_prev and page.rows else None,
+            'next_page_key': format_key((page.rows[-1][0],))
+            if page.has_next and page.rows else None}
+
+
+def submit(request: HttpRequest, task: Task, ans: str,
+           language: str = DEFAULT_LANGUAGE) -> Submission:
+    """
+    Create a submission for the task, code ans is in language.
+    Code submissions are left pending for the judge worker if JUDGE_ASYNC is set,
+    other submissions are judged at once.
+    """
+    user = request.user if request.user.is_authenticated else None
+    submission = Submission(task=task, user=user, code=ans, language=language)
+    if settings.JUDGE_ASYNC and task.ans_type == Task.AnsType.code:
+        submission.save()
+    else:
+        judge(submission)
+    if user is None:
+        remember_submission(request, submission)
+    return submission
+
+
+def remember_submission(request: HttpRequest, submission: Submission) -> None:
+    """
+    Let an anonymous user poll the submission status and download its outputs:
+    save it in the session.
+    """
+    submission_ids = request.session.get('submission_ids', [])
+    submission_ids.append(submission.id)
+    request.session['submission_ids'] = submission_ids[-MAX_SESSION_SUBMISSIONS:]
+
+
+def contest_tasks(contest_id: int) -> tuple[int, Optional[list[TaskRow]]]:
+    """
+    Version of the contest page and its tasks id, name and ans_type
+    (from the pages cache), None instead of tasks, if there is no such contest.
+    """
+    scope = pagecache.contest_scope(contest_id)
+
+    def load() -> Optional[list[TaskRow]]:
+        if not Contest.objects.filter(id=contest_id).exists():
+            return None
+        # texts are only loaded for the shown task
+        return list(Task.objects.filter(linked_contest_id=contest_id)
+                    .order_by('position', 'id').values('id', 'name', 'ans_type'))
+
+    contest_version = pagecache.version(scope)
+    return contest_version, pagecache.get_or_load(scope, 'tasks', load, contest_version)
+
+
+def init_ans_type_context(request: HttpRequest, context: dict[str, Any]) -> None:
+    """
+    Init context part, that describes the task form type and the answer language,
+    chosen by the user.
+    """
     context['ans_is_text'] = request.session.get('ans_is_text')
     context['ans_is_code'] = request.session.get('ans_is_code')
     if context['ans_is_text'] is None:
         context['ans_is_text'] = True
     if context['ans_is_code'] is None:
         context['ans_is_code'] = False
+    # languages of code answers, the last chosen one is selected
+    context['languages'] = [(name, language.label)
+                            for name, language in LANGUAGES.items()]
+    context['ans_language'] = request.session.get('ans_language', DEFAULT_LANGUAGE)
 
-    try:
-        contest = Contest.objects.get(id=contest_id)
-    except Exception:
-        contest = None
-    if not contest:
+
+def report_url(submission: Submission) -> str:
+    """ Url, that whole outputs of the submission tests are downloaded from. """
+    return f'/submissions/{submission.id}/'
+
+
+def render_report(submission: Submission) -> str:
+    """ Html of the submission check report. """
+    with metrics.span('report'):
+        return render_to_string('report.html', {
+            'report': Report.from_json(submission.report),
+            'report_url': report_url(submission),
+        })
+
+
+def init_submission_context(submission: Submission, context: dict[str, Any]) -> None:
+    """ Init context part, that describes a submitted answer check. """
+    if submission.status == Submission.Status.pending:
+        context['submission_id'] = submission.id
+    elif submission.status == Submission.Status.error:
+        context['ans_error'] = _('Checking failed, try again later')
+    else:
+        context['ans_is_correct'] = submission.passed
+        context['ans_report'] = Report.from_json(submission.report)
+        context['ans_report_url'] = report_url(submission)
+
+
+def active_task_num(request: HttpRequest, contest_id: int, task_num: int) -> int:
+    """
+    Number (from 1) of the contest task to show: task_num if it is given (it is
+    saved in the session), the last shown one otherwise.
+    """
+    saved_task_nums = request.session.get('saved_task_nums', {})
+    if not isinstance(saved_task_nums, dict):
+        raise RuntimeError(
+            '"saved_task_nums" session var must be dict[contest_id:task_num],'
+            f' but it is {type(saved_task_nums)}'
+        )
+    # session data is json: keys are strings
+    key = str(contest_id)
+    if task_num > 0:
+        if saved_task_nums.get(key) != task_num:
+            # a new dict: the session is saved, when it is set
+            request.session['saved_task_nums'] = {**saved_task_nums, key: task_num}
+        return task_num
+    saved_task_num: int = saved_task_nums.get(key) or 1
+    return saved_task_num
+
+
+def init_tasks_context(context: dict[str, Any], contest_id: int, contest_version: int,
+                       tasks_list: list[TaskRow],
+                       cur_active: int) -> Optional[int]:
+    """
+    Init context part, that describes the contest tasks and the active one,
+    but its text. Return id of the active task, None if there are no tasks.
+    """
+    context['task_active_list'] = [
+        'active' if cur_active == (task_idx + 1)
+        else '' for task_idx in range(len(tasks_list))
+    ]
+    # keys of cached navigation and statement fragments
+    context['contest_id'] = contest_id
+    context['contest_version'] = contest_version
+    context['cur_active'] = cur_active
+    context['page_cache_timeout'] = settings.PAGE_CACHE_TIMEOUT
+    if len(context["task_active_list"]) == 0:
+        context['task_active_list_is_empty'] = True
+        return None
+    task_id: int = tasks_list[cur_active - 1]['id']
+    context['task_name'] = tasks_list[cur_active - 1]['name']
+    context['task_id'] = task_id
+    context['task_ans_type'] = tasks_list[cur_active - 1]['ans_type']
+    return task_id
+
+
+def tasks(request: HttpRequest, contest_id: int, task_num: int = 0) -> HttpResponse:
+    """ Tasks page. Represents selected contest. """
+    handle_misc_actions(request)
+    context: dict[str, Any] = {}
+    context = init_login_context(request, context)
+    init_ans_type_context(request, context)
+
+    contest_version, tasks_list = contest_tasks(contest_id)
+    if tasks_list is None:
         return HttpResponseNotFound(_('<h1>Contest not found</h1>'))
 
     if request.method == "POST":
@@ -127,84 +335,76 @@ def tasks(request: HttpRequest, contest_id: int, task_num: int = 0) -> HttpRespo
             if ans_type == 'text_ans':
                 context['ans_is_text'] = True
                 context['ans_is_code'] = False
-                request.session['ans_is_text'] = True
-                request.session['ans_is_code'] = False
+                update_session(request, 'ans_is_text', True)
+                update_session(request, 'ans_is_code', False)
             elif ans_type == 'code_ans':
                 context['ans_is_code'] = True
                 context['ans_is_text'] = False
-                request.session['ans_is_text'] = False
-                request.session['ans_is_code'] = True
+                update_session(request, 'ans_is_text', False)
+                update_session(request, 'ans_is_code', True)
         elif form_descr == 'task_data':
             task_name = request.POST.get('new_task_name') or ''
             task_text = request.POST.get('new_task_text') or ''
             task_ref_ans = request.POST.get('new_task_ref_ans') or ''
+            task_comparator = (request.POST.get('new_task_comparator')
+                               or Task.Comparator.exact)
+            task_checker_code = request.POST.get('new_task_checker_code') or ''
             try:
                 new_task = Task()
                 new_task.set_name(task_name)
                 new_task.set_text(task_text)
                 if request.POST.get('ans_is_text') is not None:
                     new_task.set_ref_ans(task_ref_ans)
-                new_task.linked_contest = contest
+                else:
+                    new_task.set_comparator(task_comparator, task_checker_code)
+                contest = Contest.objects.get(id=contest_id)
+                contest.append_task(new_task)
                 new_task.save()
-                contest.append_task(new_task.id)
-                contest.save()
+                pagecache.bump(pagecache.contest_scope(contest_id))
+                contest_version, reloaded_tasks = contest_tasks(contest_id)
+                tasks_list = reloaded_tasks or []
             except Task.TaskNameError as e:
                 context['task_name_error'] = str(e)
             except Task.TaskTextError as e:
                 context['task_text_error'] = str(e)
             except Task.TaskRefAnsError as e:
                 context['task_ref_ans_error'] = str(e)
+            except Task.TaskCheckerError as e:
+                context['task_checker_error'] = str(e)
         elif form_descr == 'task_delete':
             task_id_str = request.POST.get('task_to_delete_id')
             if task_id_str is None:
                 raise RuntimeError('HTML Template is broken')
-            task_id = int(task_id_str)
-            Task.objects.get(id=task_id).delete()
-            contest.delete_task(task_id)
-            contest.save()
+            Contest.objects.get(id=contest_id).delete_task(int(task_id_str))
+            pagecache.bump(pagecache.contest_scope(contest_id))
             return HttpResponseRedirect(request.path.rsplit('/', 1)[0])
         elif form_descr == 'task_ans':
             task_id_str = request.POST.get('task_ans_id')
             task_ans = request.POST.get('task_ans')
             if task_id_str is None or task_ans is None:
                 raise RuntimeError('HTML Template is broken')
-            task_id = int(task_id_str)
-            task = Task.objects.get(id=task_id)
+            task_language = request.POST.get('task_ans_language', DEFAULT_LANGUAGE)
+            task = Task.objects.get(id=int(task_id_str))
             try:
-                checker = Checker()
-                context['ans_is_correct'] = checker.check(task, task_ans)
-                context['ans_report'] = checker.html_report()
+                Checker.validate_ans(task_ans, task_language)
             except Checker.CheckerAnsException as e:
                 context['ans_error'] = str(e)
+            else:
+                if task.ans_type == Task.AnsType.code:
+                    update_session(request, 'ans_language', task_language)
+                    context['ans_language'] = task_language
+                init_submission_context(submit(request, task, task_ans, task_language),
+                                        context)
 
-    # init dictionary for saved task nums.
-    if not request.session.get('saved_task_nums'):
-        request.session['saved_task_nums'] = {contest_id: 0}
-    saved_task_nums = request.session.get('saved_task_nums')
-    if not isinstance(saved_task_nums, dict):
-        raise RuntimeError(
-            '"saved_task_nums" session var must be dict[contest_id:task_num],'
-            f' but it is {type(saved_task_nums)}'
+    cur_active = active_task_num(request, contest_id, task_num)
+    task_id = init_tasks_context(context, contest_id, contest_version, tasks_list,
+                                 cur_active)
+    if task_id is not None:
+        context['task_text'] = pagecache.get_or_load(
+            pagecache.contest_scope(contest_id), f'text:{task_id}',
+            Task.objects.filter(id=task_id).values_list('text', flat=True).first,
+            contest_version
         )
-    if not saved_task_nums.get(contest_id):
-        saved_task_nums[contest_id] = 0
-
-    if task_num > 0:
-        saved_task_nums[contest_id] = task_num
-    cur_active = saved_task_nums[contest_id] or 1
-
-    tasks_list = contest.get_tasks()
-    context['task_active_list'] = [
-        'active' if cur_active == (task_idx + 1)
-        else '' for task_idx in range(len(tasks_list))
-    ]
-    if len(context["task_active_list"]) == 0:
-        context['task_active_list_is_empty'] = True
-    else:
-        context['task_name'] = tasks_list[cur_active - 1].name
-        context['task_text'] = tasks_list[cur_active - 1].text
-        context['task_id'] = tasks_list[cur_active - 1].id
-        context['task_ans_type'] = tasks_list[cur_active - 1].ans_type
     return render(request, "tasks.html", context=context)
 
 
@@ -225,42 +425,365 @@ def tests(request: HttpRequest, task_id: int) -> HttpResponse:
 
     if request.method == 'GET':
         # on GET - save prev page, on POST use
-        tests_prev_page = request.META.get('HTTP_REFERER', '/')
-        request.session['tests_prev_page'] = tests_prev_page
+        update_session(request, 'tests_prev_page', request.META.get('HTTP_REFERER', '/'))
 
     if request.method == 'POST':
-        tests_prev_page = request.session.get('tests_prev_page')
+        # tests are changed by teachers only, uploads of others are not even parsed
+        if not roles.get_role(request).is_teacher:
+            return HttpResponseNotFound(_('<h1>Task not found</h1>'))
+        tests_prev_page = request.session.get('tests_prev_page', '/')
         form_descr = request.POST.get('form_descr')
         if form_descr == 'test_delete':
-            test_to_delete_num_str = request.POST.get('test_to_delete_num')
-            if test_to_delete_num_str is None:
+            test_to_delete_id_str = request.POST.get('test_to_delete_id')
+            if test_to_delete_id_str is None:
                 raise RuntimeError('HTML Template is broken')
-            test_to_delete_ind = int(test_to_delete_num_str) - 1
-            test_to_delete_id = task.tests[test_to_delete_ind]
-            Test.objects.get(id=test_to_delete_id).delete()
-            task.delete_test(test_to_delete_id)
-            task.save()
+            task.delete_test(int(test_to_delete_id_str))
+            task.tests_changed()
         if form_descr == 'test_add':
             new_test_input = request.POST.get('new_test_input') or ''
             new_test_output = request.POST.get('new_test_output') or ''
+            # large tests are uploaded as files
+            new_test_input_file = request.FILES.get('new_test_input_file')
+            new_test_output_file = request.FILES.get('new_test_output_file')
             try:
                 new_test = Test()
-                new_test.set_input(new_test_input)
-                new_test.set_output(new_test_output)
-                new_test.linked_task = task
+                if too_large(new_test_input_file):
+                    raise Test.TestInputError(upload_size_error())
+                if too_large(new_test_output_file):
+                    raise Test.TestOutputError(upload_size_error())
+                if new_test_input_file is not None:
+                    new_test.set_input_data(new_test_input_file.chunks(),
+                                            new_test_input_file.size or 0)
+                else:
+                    new_test.set_input(new_test_input)
+                if new_test_output_file is not None:
+                    new_test.set_output_data(new_test_output_file.chunks(),
+                                             new_test_output_file.size or 0)
+                else:
+                    new_test.set_output(new_test_output)
+                task.append_test(new_test)
                 new_test.save()
-                task.append_test(new_test.id)
-                task.save()
+                task.tests_changed()
             except Test.TestOutputError as e:
                 context['test_output_error'] = str(e)
             except Test.TestInputError as e:
                 context['test_input_error'] = str(e)
+        if form_descr == 'tests_import':
+            tests_archive = request.FILES.get('tests_archive')
+            if tests_archive is None:
+                context['tests_import_error'] = _('Choose a zip archive with tests')
+            elif too_large(tests_archive):
+                context['tests_import_error'] = upload_size_error()
+            else:
+                try:
+                    import_tests(task, tests_archive)
+                except TestsArchiveError as e:
+                    context['tests_import_error'] = str(e)
         if form_descr == 'test_editing_finished':
             return HttpResponseRedirect(tests_prev_page)
 
-    tests_list: list[Test] = []
-    for test in task.get_tests():
-        tests_list.append(test)
-    context['tests_list'] = tests_list
-
+    page = keyset_page(Test.with_heads(task.test_set.all()), TESTS_ORDER, test_key,
+                       TESTS_PER_PAGE, parse_key(request.GET.get('after'), 2),
+                       parse_key(request.GET.get('before'), 2))
+    first_test_num = 1
+    if page.rows:
+        first_test_num += count_before(task.test_set.all(), TESTS_ORDER,
+                                       test_key(page.rows[0]))
+    init_tests_page_context(context, task, page, first_test_num)
     return render(request, "tests.html", context=context)
+
+
+def too_large(upload: Optional[UploadedFile]) -> bool:
+    """ Whether the uploaded file is over settings.TESTS_UPLOAD_MAX_SIZE. """
+    return upload is not None and (upload.size or 0) > settings.TESTS_UPLOAD_MAX_SIZE
+
+
+def upload_size_error() -> str:
+    """ Error message for a too large uploaded file. """
+    return _('The file is larger than {size} MiB').format(
+        size=settings.TESTS_UPLOAD_MAX_SIZE // 2**20)
+
+
+def test_key(test: Test) -> tuple[int, int]:
+    """ Key of a test in tests pages, they are ordered by TESTS_ORDER. """
+    return test.position, test.id
+
+
+def init_tests_page_context(context: dict[str, Any], task: Task, page: KeysetPage[Test],
+                            first_test_num: int) -> None:
+    """ Init context part, that describes a page of the task tests. """
+    context['tests_list'] = page.rows
+    context['task_id'] = task.id
+    if page.rows:
+        context['first_test_num'] = first_test_num
+        if page.has_prev:
+            context['prev_page_key'] = format_key(test_key(page.rows[0]))
+        if page.has_next:
+            context['next_page_key'] = format_key(test_key(page.rows[-1]))
+
+
+def test_data(request: HttpRequest, task_id: int, test_id: int,
+              kind: str) -> HttpResponseBase:
+    """ Whole test input or output (kind), that is shown truncated on the tests page. """
+    if not roles.get_role(request).is_teacher:
+        return HttpResponseNotFound(_('<h1>Test not found</h1>'))
+    test = Test.objects.filter(id=test_id, linked_task_id=task_id).first()
+    if test is None:
+        return HttpResponseNotFound(_('<h1>Test not found</h1>'))
+    return StreamingHttpResponse(test.data_chunks(kind),
+                                 content_type='text/plain; charset=utf-8')
+
+
+def tests_export(request: HttpRequest, task_id: int) -> HttpResponseBase:
+    """ Tests of a task as a zip archive. """
+    if not roles.get_role(request).is_teacher:
+        return HttpResponseNotFound(_('<h1>Task not found</h1>'))
+    try:
+        task = Task.objects.get(id=task_id)
+    except Task.DoesNotExist:
+        return HttpResponseNotFound(_('<h1>Task not found</h1>'))
+    response = StreamingHttpResponse(export_tests(task), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="tests_{task.id}.zip"'
+    return response
+
+
+def standings(request: HttpRequest, contest_id: int) -> HttpResponse:
+    """
+    Contest standings page: a page of the materialized ContestResult rows.
+    It is tagged with the standings version, so that an unchanged page is
+    answered with 304 Not Modified without reading the rows.
+    """
+    handle_misc_actions(request)
+    context: dict[str, Any] = {}
+    context = init_login_context(request, context)
+    contest = (Contest.objects.filter(id=contest_id)
+               .values_list('name', 'standings_version').first())
+    if contest is None:
+        return HttpResponseNotFound(_('<h1>Contest not found</h1>'))
+    contest_name, standings_version = contest
+    contest_version, tasks_list = contest_tasks(contest_id)
+    page_key = (request.GET.get('after'), request.GET.get('before'))
+    # the page differs for users: the navigation bar and forms are personal
+    etag = quote_etag(hashlib.md5(
+        repr((standings_version, contest_version, page_key, request.user.pk,
+              context.get('user_is_admin'))).encode(),
+        usedforsecurity=False
+    ).hexdigest())
+    if request.method in ('GET', 'HEAD'):
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+
+    after = parse_key(page_key[0], len(STANDINGS_ORDER))
+    before = parse_key(page_key[1], len(STANDINGS_ORDER))
+    results = ContestResult.objects.filter(contest_id=contest_id)
+    page: KeysetPage[tuple[Any, ...]] = keyset_page(
+        results.values_list('solved', 'penalty', 'user_id', 'user__username', 'cells'),
+        STANDINGS_ORDER, lambda row: row[:3], STANDINGS_PER_PAGE, after, before
+    )
+    init_standings_context(context, contest_id, tasks_list or [], page,
+                           standings_places(results, page))
+    context['contest_name'] = contest_name
+    response = render(request, 'standings.html', context=context)
+    response['ETag'] = etag
+    # browsers revalidate the page every time, getting 304 while it is the same
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def standings_places(results: 'QuerySet[ContestResult]',
+                     page: KeysetPage[tuple[Any, ...]]) -> list[int]:
+    """ Places of the page rows: rows with equal solved and penalty share a place. """
+    if not page.rows:
+        return []
+    first = page.rows[0]
+    place = position = 1
+    if page.has_prev:
+        place = count_before(results, STANDINGS_ORDER[:2], first[:2]) + 1
+        position = count_before(results, STANDINGS_ORDER, first[:3]) + 1
+    places = [place]
+    for num, (prev, row) in enumerate(zip(page.rows, page.rows[1:]), start=1):
+        places.append(places[-1] if row[:2] == prev[:2] else position + num)
+    return places
+
+
+def standings_cell(cell: Optional[list[Any]]) -> tuple[str, str]:
+    """
+    Text and css class of a standings cell (see TaskResult.cell()): '+' or '+2' for
+    a task solved after 2 failed attempts, '-3' for 3 failed attempts.
+    """
+    if cell is None:
+        return '', ''
+    solved, attempts, _penalty = cell
+    if solved:
+        return f'+{attempts or ""}', 'table-success'
+    return f'-{attempts}', 'table-danger'
+
+
+def init_standings_context(context: dict[str, Any], contest_id: int,
+                           tasks_list: list[TaskRow],
+                           page: KeysetPage[tuple[Any, ...]], places: list[int]) -> None:
+    """ Init context part, that describes a page of standings rows. """
+    context['contest_id'] = contest_id
+    context['standings_tasks'] = [task['name'] for task in tasks_list]
+    context['standings_rows'] = [
+        {'place': place, 'username': username, 'solved': solved, 'penalty': penalty,
+         'cells': [standings_cell(cells.get(str(task['id']))) for task in tasks_list]}
+        for place, (solved, penalty, _user_id, username, cells) in zip(places, page.rows)
+    ]
+    context['prev_page_key'] = (format_key(page.rows[0][:3])
+                                if page.has_prev and page.rows else None)
+    context['next_page_key'] = (format_key(page.rows[-1][:3])
+                                if page.has_next and page.rows else None)
+
+
+def get_visible_submission(request: HttpRequest,
+                           submission_id: int) -> Optional[Submission]:
+    """ Get submission, if it belongs to the user (or to the session if anonymous). """
+    try:
+        submission = Submission.objects.get(id=submission_id)
+    except Submission.DoesNotExist:
+        return None
+    if submission.user_id is None:
+        visible = submission.id in request.session.get('submission_ids', [])
+    else:
+        visible = submission.user_id == request.user.id
+    return submission if visible else None
+
+
+def submission_status(request: HttpRequest, submission_id: int) -> HttpResponse:
+    """ Submission status for polling, as json. """
+    submission = get_visible_submission(request, submission_id)
+    if submission is None:
+        return HttpResponseNotFound(_('<h1>Submission not found</h1>'))
+    finished = submission.status in (Submission.Status.done, Submission.Status.error)
+    return JsonResponse({
+        'id': submission.id,
+        'status': submission.status,
+        'finished': finished,
+        'passed': submission.passed,
+        'report': render_report(submission) if finished else '',
+    })
+
+
+def submission_output(request: HttpRequest, submission_id: int, test_num: int,
+                      kind: str) -> HttpResponseBase:
+    """ Whole 'received' or 'expected' output (kind) of a test, cut in the report. """
+    submission = get_visible_submission(request, submission_id)
+    if submission is None:
+        return HttpResponseNotFound(_('<h1>Submission not found</h1>'))
+    mismatches = Report.from_json(submission.report).mismatches
+    mismatch = next((mismatch for mismatch in mismatches
+                     if mismatch.test_num == test_num), None)
+    if mismatch is None:
+        return HttpResponseNotFound(_('<h1>Test not found</h1>'))
+    chunks: Optional[Iterator[bytes]] = None
+    if kind == 'expected':
+        # tests may be changed since: the current output is given
+        test = Test.objects.filter(id=mismatch.test_id).first()
+        if test is not None:
+            chunks = test.data_chunks('output')
+    elif mismatch.received_file is None:
+        # the excerpt is the whole output
+        chunks = iter([mismatch.received.encode('utf-8')])
+    else:
+        # None if the output has expired
+        chunks = outputs.chunks(mismatch.received_file)
+    if chunks is None:
+        return HttpResponseNotFound(_('<h1>Test not found</h1>'))
+    response = StreamingHttpResponse(chunks, content_type='text/plain; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{kind}_{test_num}.txt"'
+    return response
+
+
+def submission_events(request: HttpRequest, submission_id: int) -> HttpResponseBase:
+    """
+    Submission progress as server-sent events: 'test' event with a test status
+    as soon as the test is finished, then 'done' event with the whole report.
+    Event id is the test number, so a reconnected client continues where it stopped.
+    """
+    submission = get_visible_submission(request, submission_id)
+    if submission is None:
+        return HttpResponseNotFound(_('<h1>Submission not found</h1>'))
+    try:
+        last_sent = int(request.headers.get('Last-Event-ID', '0'))
+    except ValueError:
+        last_sent = 0
+    events: Union[Iterator[str], AsyncIterator[str]]
+    if isinstance(request, ASGIRequest):
+        # a sync iterator would be consumed whole, before anything is sent
+        events = aiter_submission_events(submission, last_sent)
+    else:
+        events = iter_submission_events(submission, last_sent)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # do not let proxies buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def submission_progress_events(submission: Submission, last_sent: int) -> list[str]:
+    """
+    Events of the submission tests after the last_sent one,
+    then the 'done' event, if the submission is finished.
+    """
+    events = []
+    # progress holds statuses of tests 1, 2, ... in order
+    for test_num, verdict, run_time, max_rss in submission.progress[last_sent:]:
+        status = TestStatus(test_num, Verdict(verdict), run_time, max_rss)
+        data = {'test': test_num, 'passed': status.passed, 'verdict': verdict,
+                'html': render_to_string('test_status.html', {'status': status})}
+        events.append(f'id: {test_num}\nevent: test\ndata: {json.dumps(data)}\n\n')
+    if submission.status in (Submission.Status.done, Submission.Status.error):
+        data = {'status': submission.status, 'passed': submission.passed,
+                'report': render_report(submission)}
+        events.append(f'event: done\ndata: {json.dumps(data)}\n\n')
+    return events
+
+
+def iter_submission_events(submission: Submission, last_sent: int) -> Iterator[str]:
+    """
+    Follow submission progress in the db (under WSGI: a thread is held meanwhile).
+    The stream is closed after JUDGE_EVENTS_TIMEOUT, clients reconnect on their own.
+    """
+    deadline = time.monotonic() + settings.JUDGE_EVENTS_TIMEOUT
+    while True:
+        yield from submission_progress_events(submission, last_sent)
+        last_sent = max(last_sent, len(submission.progress))
+        if (submission.status in (Submission.Status.done, Submission.Status.error)
+                or time.monotonic() > deadline):
+            return
+        time.sleep(EVENTS_POLL_INTERVAL)
+        submission.refresh_from_db(fields=EVENTS_FIELDS)
+
+
+async def aiter_submission_events(submission: Submission,
+                                  last_sent: int) -> AsyncIterator[str]:
+    """ iter_submission_events() for ASGI: every event is sent as soon as it is read. """
+    deadline = time.monotonic() + settings.JUDGE_EVENTS_TIMEOUT
+    while True:
+        for event in submission_progress_events(submission, last_sent):
+            yield event
+        last_sent = max(last_sent, len(submission.progress))
+        if (submission.status in (Submission.Status.done, Submission.Status.error)
+                or time.monotonic() > deadline):
+            return
+        await asyncio.sleep(EVENTS_POLL_INTERVAL)
+        await submission.arefresh_from_db(fields=EVENTS_FIELDS)
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """
+    Metrics of this server process in the Prometheus text format,
+    for staff users and requests with settings.METRICS_TOKEN.
+    """
+    if not settings.METRICS_ENABLED:
+        return HttpResponseNotFound()
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get('Authorization', '')
+    if not (request.user.is_staff
+            or (token and hmac.compare_digest(authorization.encode(),
+                                              f'Bearer {token}'.encode()))):
+        return HttpResponseNotFound()
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4')
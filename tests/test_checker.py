@@ -0,0 +1,228 @@
+"""
+Checks of answers: verdicts of runs and cached verdicts.
+"""
+
+import signal
+import tempfile
+import unittest
+from typing import Any
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from django_edu.checker import Checker, Verdict
+from django_edu.models import Contest, Task, Test
+from django_edu.runner import Limits, RunResult
+
+SOLUTION = 'print(sum(map(int, input().split())))\n'
+
+LIMITS = Limits(wall_time=3, cpu_time=2, memory=256 * 2**20, processes=1,
+                file_size=2**20, output=2**20)
+
+
+def run_result(**fields: Any) -> RunResult:
+    """ Result of a successful run, with fields replaced. """
+    result = RunResult(out=b'3\n', err=b'', returncode=0, timed_out=False,
+                       output_exceeded=False, rejected=False, time=0.1,
+                       cpu_time=0.05, max_rss=10000)
+    return result._replace(**fields)
+
+
+def add_test(task: Task, test_input: str, test_output: str) -> None:
+    """ Add test to the task, as the tests page does. """
+    test = Test()
+    test.set_input(test_input)
+    test.set_output(test_output)
+    task.append_test(test)
+    test.save()
+    task.tests_changed()
+
+
+class ClassifyTests(unittest.TestCase):
+    """ Runs, that have failed whatever the output is, are classified. """
+
+    def assertVerdict(self, expected: Verdict | None, limits: Limits = LIMITS,
+                      **fields: Any) -> None:
+        """ classify() of a run with fields gives the expected verdict. """
+        self.assertEqual(Checker.classify(run_result(**fields), limits), expected)
+
+    def test_successful_run(self) -> None:
+        self.assertVerdict(None)
+        self.assertVerdict(None, err=b'MemoryError\n')
+
+    def test_output_limit(self) -> None:
+        self.assertVerdict(Verdict.output_limit, output_exceeded=True)
+        # it wins over the consequences of the kill
+        self.assertVerdict(Verdict.output_limit, output_exceeded=True,
+                           returncode=-signal.SIGKILL, timed_out=True)
+
+    def test_rejected(self) -> None:
+        self.assertVerdict(Verdict.wrong_answer, rejected=True,
+                           returncode=-signal.SIGKILL)
+
+    def test_time_limit(self) -> None:
+        self.assertVerdict(Verdict.time_limit, timed_out=True,
+                           returncode=-signal.SIGKILL)
+        self.assertVerdict(Verdict.time_limit, returncode=-signal.SIGXCPU)
+        self.assertVerdict(Verdict.time_limit, cpu_time=2.0)
+        self.assertVerdict(None, cpu_time=2.0,
+                           limits=LIMITS._replace(cpu_time=0))
+
+    def test_memory_limit(self) -> None:
+        err = b'Traceback (most recent call last):\n  ...\nMemoryError\n'
+        self.assertVerdict(Verdict.memory_limit, returncode=1, err=err)
+        self.assertVerdict(Verdict.runtime_error, returncode=1, err=err,
+                           limits=LIMITS._replace(memory=0))
+
+    def test_runtime_error(self) -> None:
+        self.assertVerdict(Verdict.runtime_error, returncode=1,
+                           err=b'ZeroDivisionError: division by zero\n')
+        # MemoryError, that is not the last line, is caught by the solution
+        self.assertVerdict(Verdict.runtime_error, returncode=1,
+                           err=b'MemoryError\nValueError\n')
+        self.assertVerdict(Verdict.runtime_error, returncode=-signal.SIGSEGV)
+
+
+@override_settings(TESTS_DATA_DIR=tempfile.mkdtemp(prefix='django_edu_tests_'))
+class VerdictTests(TestCase):
+    """ Verdicts of solutions, that are run on a test. """
+    task: Task
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        contest = Contest()
+        contest.set_name('Verdicts mapping')
+        contest.save()
+        cls.task = Task(ans_type=Task.AnsType.code)
+        cls.task.set_name('Sum')
+        cls.task.set_text('<p>Sum of two numbers</p>')
+        contest.append_task(cls.task)
+        cls.task.save()
+        add_test(cls.task, '1 2\n', '3')
+
+    def setUp(self) -> None:
+        caches['verdicts'].clear()
+
+    def assertVerdict(self, ans: str, expected: Verdict) -> None:
+        """ The only test of ans has the expected verdict. """
+        checker = Checker()
+        passed = checker.check(self.task, ans)
+        self.assertEqual(passed, expected == Verdict.ok)
+        self.assertEqual([test.verdict for test in checker.report.tests], [expected])
+
+    def test_accepted(self) -> None:
+        self.assertVerdict(SOLUTION, Verdict.ok)
+
+    def test_wrong_answer(self) -> None:
+        self.assertVerdict('print(4)', Verdict.wrong_answer)
+
+    def test_runtime_error(self) -> None:
+        self.assertVerdict('print(1 / 0)', Verdict.runtime_error)
+
+    @override_settings(CHECKER_CPU_LIMIT=1)
+    def test_time_limit(self) -> None:
+        self.assertVerdict('while True:\n    pass\n', Verdict.time_limit)
+
+    @override_settings(CHECKER_MEMORY_LIMIT=128 * 2**20)
+    def test_memory_limit(self) -> None:
+        self.assertVerdict('data = bytearray(2**30)\nprint(3)', Verdict.memory_limit)
+
+    @override_settings(CHECKER_OUTPUT_LIMIT=2**10)
+    def test_output_limit(self) -> None:
+        self.assertVerdict('print(3)\nprint("x" * 2**12)', Verdict.output_limit)
+
+
+@override_settings(TESTS_DATA_DIR=tempfile.mkdtemp(prefix='django_edu_tests_'))
+class VerdictCacheTests(TestCase):
+    """ Verdicts are reused for equivalent answers while tests are not changed. """
+    task: Task
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        contest = Contest()
+        contest.set_name('Verdicts')
+        contest.save()
+        cls.task = Task(ans_type=Task.AnsType.code)
+        cls.task.set_name('Sum')
+        cls.task.set_text('<p>Sum of two numbers</p>')
+        contest.append_task(cls.task)
+        cls.task.save()
+        for first, second in ((1, 2), (3, 4)):
+            add_test(cls.task, f'{first} {second}\n', str(first + second))
+
+    def setUp(self) -> None:
+        caches['verdicts'].clear()
+
+    def check(self, ans: str, language: str = 'python') -> Checker:
+        """ Checker after a check of ans. """
+        checker = Checker()
+        checker.check(self.task, ans, language=language)
+        return checker
+
+    def assertCached(self, ans: str, language: str = 'python') -> None:
+        """ Check of ans loads no tests, the verdict is taken from the cache. """
+        with self.assertNumQueries(0):
+            self.check(ans, language)
+
+    def test_miss_then_hit(self) -> None:
+        first = self.check(SOLUTION)
+        self.assertTrue(first.report.passed)
+        self.assertEqual(first.report.passed_amount, 2)
+        with self.assertNumQueries(0):
+            second = self.check(SOLUTION)
+        self.assertEqual(second.report, first.report)
+
+    def test_failed_verdict_is_cached(self) -> None:
+        self.assertFalse(self.check('print(0)').report.passed)
+        with self.assertNumQueries(0):
+            self.assertFalse(self.check('print(0)').report.passed)
+
+    def test_equivalent_code_hits(self) -> None:
+        self.check(SOLUTION)
+        self.assertCached(SOLUTION.replace('\n', '\r\n'))
+        self.assertCached(SOLUTION + '\n  \n')
+
+    def test_other_code_misses(self) -> None:
+        self.check(SOLUTION)
+        with self.assertNumQueries(1):
+            self.check('print(sum(map(int, input().split())) + 0)')
+
+    def test_other_language_misses(self) -> None:
+        self.check(SOLUTION)
+        key = Checker.verdict_key(self.task, SOLUTION)
+        self.assertNotEqual(Checker.verdict_key(self.task, SOLUTION, 'c'), key)
+
+    def test_changed_tests_miss(self) -> None:
+        self.check(SOLUTION)
+        add_test(self.task, '5 6\n', '11')
+        with self.assertNumQueries(1):
+            checker = self.check(SOLUTION)
+        self.assertEqual(checker.report.passed_amount, 3)
+        self.assertCached(SOLUTION)
+
+    @override_settings(TESTS_FILE_THRESHOLD=4)
+    def test_large_test(self) -> None:
+        test = Test()
+        numbers = b' '.join(b'%d' % num for num in range(10000))
+        test.set_input_data([numbers], len(numbers))
+        total = b'%d' % sum(range(10000))
+        test.set_output_data([total], len(total))
+        self.assertIsNotNone(test.input_file)
+        self.assertIsNotNone(test.output_file)
+        self.task.append_test(test)
+        test.save()
+        self.task.tests_changed()
+        checker = self.check(SOLUTION)
+        self.assertTrue(checker.report.passed)
+        self.assertEqual(checker.report.passed_amount, 3)
+        checker = self.check('print(sum(map(int, input().split())) % 10000)')
+        self.assertEqual([test.verdict for test in checker.report.tests],
+                         [Verdict.ok, Verdict.ok, Verdict.wrong_answer])
+
+    @override_settings(CHECKER_TIME_LIMIT=0.5)
+    def test_timed_out_is_not_cached(self) -> None:
+        checker = self.check('while True:\n    pass\n')
+        self.assertTrue(checker.timed_out)
+        self.assertFalse(checker.report.passed)
+        key = Checker.verdict_key(self.task, 'while True:\n    pass\n')
+        self.assertIsNone(caches['verdicts'].get(key))
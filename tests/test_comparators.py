@@ -0,0 +1,203 @@
+"""
+Comparators of solution outputs: outputs are fed split into chunks at every
+position, a comparator must not depend on where chunks end.
+"""
+
+import tempfile
+from typing import Callable, Iterator
+
+from django.test import SimpleTestCase, override_settings
+
+from django_edu import testdata
+from django_edu.comparators import (AbstractComparator, ExactComparator, Expected,
+                                    FloatComparator, LineSetComparator,
+                                    TokenComparator)
+
+ComparatorFactory = Callable[[Expected], AbstractComparator]
+
+
+def splits(output: bytes) -> Iterator[list[bytes]]:
+    """ Output as a whole, split in two at every position and byte by byte. """
+    yield [output]
+    for pos in range(len(output) + 1):
+        yield [output[:pos], output[pos:]]
+    yield [output[pos:pos + 1] for pos in range(len(output))]
+
+
+def judge(comparator: AbstractComparator, chunks: list[bytes]) -> bool:
+    """ Feed chunks as a run does: it is stopped at the first wrong one. """
+    return all(comparator.feed(chunk) for chunk in chunks) and comparator.finish()
+
+
+class ComparatorTestCase(SimpleTestCase):
+    """ Base of tests, that compare outputs with an expected one. """
+    factory: ComparatorFactory
+
+    def assertJudged(self, expected: bytes, output: bytes, correct: bool) -> None:
+        """ Output is judged the same way for any chunks it arrives in. """
+        for chunks in splits(output):
+            with self.subTest(chunks=chunks):
+                self.assertEqual(judge(self.factory(expected), chunks), correct)
+
+    def assertCorrect(self, expected: bytes, *outputs: bytes) -> None:
+        """ All outputs are correct. """
+        for output in outputs:
+            self.assertJudged(expected, output, True)
+
+    def assertWrong(self, expected: bytes, *outputs: bytes) -> None:
+        """ All outputs are wrong. """
+        for output in outputs:
+            self.assertJudged(expected, output, False)
+
+
+class ExactComparatorTests(ComparatorTestCase):
+    """ Only leading and trailing whitespace of the whole output is ignored. """
+    factory = ExactComparator
+
+    def test_same_output(self) -> None:
+        self.assertCorrect(b'1 2\n3\n', b'1 2\n3\n')
+
+    def test_surrounding_whitespace(self) -> None:
+        self.assertCorrect(b'1 2\n3\n', b'1 2\n3', b'  \n1 2\n3 \n\n', b'1 2\n3\r\n')
+        self.assertCorrect(b'\n 1 2\n3', b'1 2\n3\n')
+
+    def test_inner_whitespace(self) -> None:
+        self.assertWrong(b'1 2\n3\n', b'1  2\n3', b'1 2 3', b'1 2\n\n3')
+
+    def test_prefix_and_extension(self) -> None:
+        self.assertWrong(b'1 2\n3\n', b'', b'1 2', b'1 2\n', b'1 2\n33', b'1 2\n3 4')
+
+    def test_empty_expected(self) -> None:
+        self.assertCorrect(b'', b'', b' \n\n')
+        self.assertCorrect(b'\n', b'')
+        self.assertWrong(b'', b'0', b'\n0\n')
+
+    def test_stops_at_first_difference(self) -> None:
+        comparator = ExactComparator(b'1 2\n3\n')
+        self.assertFalse(comparator.feed(b'1 3'))
+
+
+class TokenComparatorTests(ComparatorTestCase):
+    """ Tokens must be the same, whitespace between them is not significant. """
+    factory = TokenComparator
+
+    def test_whitespace(self) -> None:
+        self.assertCorrect(b'1 2\n3\n', b'1 2\n3\n', b'1\n2 3', b'\t1   2\r\n3  \n\n')
+
+    def test_tokens(self) -> None:
+        self.assertWrong(b'1 2\n3\n', b'1 23', b'12 3', b'1 2 3.0', b'1 2 3 4',
+                         b'1 2', b'')
+
+    def test_prefix_token(self) -> None:
+        # a token, that is a prefix of the expected one, is not enough
+        self.assertWrong(b'10 20', b'10 2', b'1 20')
+
+    def test_empty_expected(self) -> None:
+        self.assertCorrect(b'', b'', b'\n \n')
+        self.assertCorrect(b' \n', b'')
+        self.assertWrong(b'', b'0')
+
+    def test_stops_at_first_wrong_token(self) -> None:
+        comparator = TokenComparator(b'10 20 30')
+        self.assertTrue(comparator.feed(b'10 2'))
+        self.assertFalse(comparator.feed(b'1 30'))
+        comparator = TokenComparator(b'10 20 30')
+        # no token, that starts with '3', can be the expected one
+        self.assertFalse(comparator.feed(b'3'))
+
+
+class FloatComparatorTests(ComparatorTestCase):
+    """ Numbers are compared with a tolerance, other tokens - exactly. """
+    factory: ComparatorFactory = FloatComparator
+
+    def factory_with(self, epsilon: float) -> ComparatorFactory:
+        """ Factory of comparators with the given tolerance. """
+        return lambda expected: FloatComparator(expected, epsilon)
+
+    def test_absolute_tolerance(self) -> None:
+        self.assertCorrect(b'0.1 2\n', b'0.1000001 2', b'0.0999999 2.0000', b'1e-1 2e0')
+        self.assertWrong(b'0.1 2\n', b'0.100002 2', b'0.1 1.99999')
+
+    def test_relative_tolerance(self) -> None:
+        self.assertCorrect(b'1000000', b'1000000.5', b'999999.5')
+        self.assertWrong(b'1000000', b'1000002', b'999998')
+
+    def test_epsilon(self) -> None:
+        self.factory = self.factory_with(0.01)
+        self.assertCorrect(b'1.5', b'1.509', b'1.491')
+        self.assertWrong(b'1.5', b'1.52')
+        self.factory = self.factory_with(0)
+        self.assertCorrect(b'1.5', b'1.50', b'15e-1')
+        self.assertWrong(b'1.5', b'1.5000001')
+
+    def test_settings_epsilon(self) -> None:
+        with self.settings(CHECKER_FLOAT_EPSILON=0.1):
+            self.assertCorrect(b'1', b'1.09', b'0.91')
+            self.assertWrong(b'1', b'1.2', b'0.8')
+
+    def test_words(self) -> None:
+        self.assertCorrect(b'YES 1.0\n', b'YES 1', b'YES\n1.0000000001')
+        self.assertWrong(b'YES 1.0\n', b'yes 1', b'YES one', b'1 YES', b'YES 1 YES')
+
+    def test_special_values(self) -> None:
+        self.assertCorrect(b'nan inf -inf', b'NaN Inf -INF')
+        self.assertWrong(b'nan inf -inf', b'0 inf -inf', b'nan 1e308 -inf',
+                         b'nan -inf inf')
+        self.assertWrong(b'1', b'nan', b'inf')
+
+    def test_number_split_between_chunks(self) -> None:
+        comparator = FloatComparator(b'0.5 2')
+        self.assertTrue(comparator.feed(b'0.'))
+        self.assertTrue(comparator.feed(b'4999999 2'))
+        self.assertTrue(comparator.finish())
+
+
+class LineSetComparatorTests(ComparatorTestCase):
+    """ Lines may be in any order, the amount of every line matters. """
+    factory = LineSetComparator
+
+    def test_any_order(self) -> None:
+        self.assertCorrect(b'a\nb\nb\n', b'b\na\nb', b' b \n\na\n b\n',
+                           b'b\r\nb\r\na\r\n')
+
+    def test_amount_of_lines(self) -> None:
+        self.assertWrong(b'a\nb\nb\n', b'a\nb', b'a\nb\nb\nb', b'a\na\nb', b'a b\nb')
+
+
+@override_settings(TESTS_DATA_DIR=tempfile.mkdtemp(prefix='django_edu_tests_'))
+class MappedExpectedTests(SimpleTestCase):
+    """ Expected outputs of large tests are memory-mapped files. """
+    factories: tuple[ComparatorFactory, ...] = (ExactComparator, TokenComparator,
+                                                FloatComparator, LineSetComparator)
+    # many times larger than a chunk of output
+    expected = b''.join(b'%d %d.5\n' % (num, num) for num in range(100000))
+
+    def judge_mapped(self, factory: ComparatorFactory, output: bytes) -> bool:
+        """ Judge output, arriving in odd chunks, against the mapped expected one. """
+        digest = testdata.store([self.expected])
+        with testdata.mapped(digest) as expected:
+            self.assertNotIsInstance(expected, bytes)
+            chunks = [output[pos:pos + 4093] for pos in range(0, len(output), 4093)]
+            return judge(factory(expected), chunks)
+
+    def test_same_output(self) -> None:
+        for factory in self.factories:
+            with self.subTest(factory=factory):
+                self.assertTrue(self.judge_mapped(factory, self.expected))
+
+    def test_difference_at_the_end(self) -> None:
+        output = self.expected.replace(b'99999 99999.5', b'99999 99998.5')
+        for factory in self.factories:
+            with self.subTest(factory=factory):
+                self.assertFalse(self.judge_mapped(factory, output))
+
+    def test_truncated_output(self) -> None:
+        output = self.expected[:len(self.expected) // 2]
+        for factory in self.factories:
+            with self.subTest(factory=factory):
+                self.assertFalse(self.judge_mapped(factory, output))
+
+    def test_empty_file(self) -> None:
+        with testdata.mapped(testdata.store([])) as expected:
+            self.assertEqual(expected, b'')
+            self.assertTrue(judge(ExactComparator(expected), [b'\n']))
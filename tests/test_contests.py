@@ -0,0 +1,34 @@
+"""
+Contests: names are unique, that is reported to the user.
+"""
+
+from django.db import IntegrityError
+from django.test import TestCase
+
+from django_edu.models import Contest
+
+
+class ContestSaveTests(TestCase):
+    """ Only a taken name is reported as ContestNameError on save. """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        contest = Contest()
+        contest.set_name('Taken')
+        contest.save()
+
+    def test_name_taken_meanwhile(self) -> None:
+        contest = Contest()
+        contest.set_name('Free')
+        # another contest is saved with the name after the check
+        contest.name = 'Taken'
+        with self.assertRaises(Contest.ContestNameError):
+            contest.save()
+
+    def test_other_constraint(self) -> None:
+        contest = Contest()
+        contest.set_name('Broken')
+        contest.standings_version = -1
+        with self.assertRaises(IntegrityError):
+            contest.save()
+        self.assertFalse(Contest.objects.filter(name='Broken').exists())
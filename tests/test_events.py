@@ -0,0 +1,107 @@
+"""
+Submission progress events: streamed as tests finish, under WSGI and ASGI.
+"""
+
+from typing import Any, AsyncIterator
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from django_edu.checker import Report
+from django_edu.judge import ajudge
+from django_edu.models import Contest, Submission, Task
+from tests.test_checker import SOLUTION, add_test
+
+
+@override_settings(JUDGE_EVENTS_TIMEOUT=5)
+class SubmissionEventsTests(TestCase):
+    """ Events of a submission, that is being judged. """
+    user: User
+    submission: Submission
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        contest = Contest()
+        contest.set_name('Events')
+        contest.save()
+        task = Task(ans_type=Task.AnsType.code)
+        task.set_name('Sum')
+        task.set_text('<p>Sum of two numbers</p>')
+        contest.append_task(task)
+        task.save()
+        cls.user = User.objects.create_user('student')
+        cls.submission = Submission.objects.create(
+            task=task, user=cls.user, code='print(3)', status=Submission.Status.running,
+            progress=[[1, 'OK', 0.01, 1024]])
+
+    def finish(self) -> None:
+        """ Save the verdict of the submission. """
+        Submission.objects.filter(id=self.submission.id).update(
+            status=Submission.Status.done, passed=True, report=Report(True).to_json(),
+            progress=[[1, 'OK', 0.01, 1024], [2, 'OK', 0.01, 1024]])
+
+    def test_wsgi(self) -> None:
+        self.finish()
+        self.client.force_login(self.user)
+        response = self.client.get(f'/submissions/{self.submission.id}/events/')
+        stream = b''.join(response.streaming_content)  # type: ignore[attr-defined]
+        self.assertEqual([line for line in stream.splitlines()
+                          if line.startswith(b'event:')],
+                         [b'event: test', b'event: test', b'event: done'])
+
+    async def test_asgi_streams_before_done(self) -> None:
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(
+            f'/submissions/{self.submission.id}/events/', headers={'Last-Event-ID': '0'})
+        events: AsyncIterator[bytes] = aiter(
+            response.streaming_content)  # type: ignore[attr-defined]
+        first = (await anext(events)).decode()
+        self.assertTrue(first.startswith('id: 1\nevent: test\n'))
+        status = await Submission.objects.values_list('status', flat=True).aget(
+            id=self.submission.id)
+        self.assertEqual(status, Submission.Status.running)
+        await sync_to_async(self.finish)()
+        self.assertTrue((await anext(events)).decode().startswith('id: 2\nevent: test\n'))
+        self.assertTrue((await anext(events)).decode().startswith('event: done\n'))
+
+
+class AsyncJudgeProgressTests(TestCase):
+    """ Submissions judged in the event loop save their progress for the events. """
+    task: Task
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        contest = Contest()
+        contest.set_name('Async progress')
+        contest.save()
+        cls.task = Task(ans_type=Task.AnsType.code)
+        cls.task.set_name('Sum')
+        cls.task.set_text('<p>Sum of two numbers</p>')
+        contest.append_task(cls.task)
+        cls.task.save()
+        for first, second in ((1, 2), (3, 4)):
+            add_test(cls.task, f'{first} {second}\n', str(first + second))
+
+    def setUp(self) -> None:
+        caches['verdicts'].clear()
+
+    async def test_progress_saved(self) -> None:
+        saved_progress = []
+        finish = Submission.finish
+
+        def finish_saved(submission: Submission, *args: Any, **kwargs: Any) -> None:
+            # progress, that an event stream reads before the verdict is saved
+            saved_progress.append(Submission.objects.get(id=submission.id).progress)
+            finish(submission, *args, **kwargs)
+
+        submission = Submission(task=self.task, code=SOLUTION)
+        with mock.patch.object(Submission, 'finish', finish_saved):
+            await ajudge(submission)
+        self.assertEqual([[[test_num, verdict] for test_num, verdict, *_ in progress]
+                          for progress in saved_progress], [[[1, 'OK'], [2, 'OK']]])
+        saved = await Submission.objects.aget(id=submission.id)
+        self.assertEqual(saved.status, Submission.Status.done)
+        self.assertTrue(saved.passed)
@@ -0,0 +1,40 @@
+"""
+Metrics page: served to staff users and scrapers with the configured token only.
+"""
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+
+class MetricsAccessTests(TestCase):
+    """ /metrics/ is hidden from everyone else. """
+
+    def test_anonymous(self) -> None:
+        self.assertEqual(self.client.get('/metrics/').status_code, 404)
+
+    def test_user(self) -> None:
+        self.client.force_login(User.objects.create_user('student'))
+        self.assertEqual(self.client.get('/metrics/').status_code, 404)
+
+    def test_staff(self) -> None:
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self) -> None:
+        self.assertEqual(self.client.get('/metrics/', headers={
+            'Authorization': 'Bearer secret'}).status_code, 200)
+        self.assertEqual(self.client.get('/metrics/', headers={
+            'Authorization': 'Bearer other'}).status_code, 404)
+
+    def test_no_token(self) -> None:
+        # an empty token is not configured, not an empty password
+        self.assertEqual(self.client.get('/metrics/', headers={
+            'Authorization': 'Bearer '}).status_code, 404)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self) -> None:
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        self.assertEqual(self.client.get('/metrics/').status_code, 404)
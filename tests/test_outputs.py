@@ -0,0 +1,157 @@
+"""
+Received outputs of failed tests: kept apart from test data, expired and size-capped.
+"""
+
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from django_edu import outputs, testdata
+from django_edu.checker import Checker, Report
+from django_edu.models import Contest, Submission, Task, Test
+
+
+class OutputsTests(SimpleTestCase):
+    """ Outputs are stored, expired and removed, while there are too many. """
+
+    def setUp(self) -> None:
+        outputs_dir = tempfile.TemporaryDirectory(prefix='django_edu_outputs_')
+        self.addCleanup(outputs_dir.cleanup)
+        self.outputs_dir = outputs_dir.name
+        self.enterContext(override_settings(RECEIVED_OUTPUTS_DIR=self.outputs_dir,
+                                            RECEIVED_OUTPUTS_MAX_AGE=3600,
+                                            RECEIVED_OUTPUTS_MAX_SIZE=2**10))
+
+    def stored(self, data: bytes, age: float = 0) -> str:
+        """ Store data as an output age seconds old, return its digest. """
+        digest = outputs.store(data)
+        assert digest is not None
+        mtime = time.time() - age
+        os.utime(testdata.path(digest, self.outputs_dir), (mtime, mtime))
+        return digest
+
+    def read(self, digest: str) -> bytes | None:
+        """ The stored output, None if it is removed. """
+        chunks = outputs.chunks(digest)
+        return None if chunks is None else b''.join(chunks)
+
+    def test_store(self) -> None:
+        digest = self.stored(b'1\n2\n')
+        self.assertEqual(self.read(digest), b'1\n2\n')
+        self.assertTrue(testdata.path(digest, self.outputs_dir).is_file())
+
+    def test_too_large(self) -> None:
+        self.assertIsNone(outputs.store(b'1' * (2**10 + 1)))
+        self.assertEqual(os.listdir(self.outputs_dir), [])
+
+    def test_expired(self) -> None:
+        old = self.stored(b'old', age=7200)
+        new = self.stored(b'new', age=60)
+        outputs.cleanup()
+        self.assertIsNone(self.read(old))
+        self.assertEqual(self.read(new), b'new')
+
+    def test_keep(self) -> None:
+        old = self.stored(b'old', age=7200)
+        self.assertTrue(outputs.keep(old))
+        outputs.cleanup()
+        self.assertEqual(self.read(old), b'old')
+        with self.settings(RECEIVED_OUTPUTS_MAX_AGE=-1):
+            outputs.cleanup()
+        self.assertFalse(outputs.keep(old))
+
+    def test_size_limit(self) -> None:
+        digests = [self.stored(bytes([char]) * 2**8, age=600 - char)
+                   for char in range(5)]
+        outputs.cleanup()
+        self.assertEqual([self.read(digest) is not None for digest in digests],
+                         [False, True, True, True, True])
+
+    def test_cleanup_on_store(self) -> None:
+        old = self.stored(b'old', age=7200)
+        outputs.store(b'new')
+        # cleaned up once in an interval
+        self.assertEqual(self.read(old), b'old')
+        with mock.patch.object(outputs, 'CLEANUP_INTERVAL', 0):
+            outputs.store(b'new')
+        self.assertIsNone(self.read(old))
+
+
+class SubmissionOutputTests(TestCase):
+    """ Whole received outputs are downloaded, while they are kept. """
+    task: Task
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        contest = Contest()
+        contest.set_name('Outputs')
+        contest.save()
+        cls.task = Task(ans_type=Task.AnsType.code)
+        cls.task.set_name('Count')
+        cls.task.set_text('<p>Numbers from 1 to 10</p>')
+        contest.append_task(cls.task)
+        cls.task.save()
+        test = Test()
+        test.set_input('10\n')
+        test.set_output('\n'.join(map(str, range(1, 11))))
+        cls.task.append_test(test)
+        test.save()
+
+    def setUp(self) -> None:
+        caches['verdicts'].clear()
+        data_dir = tempfile.TemporaryDirectory(prefix='django_edu_tests_')
+        self.addCleanup(data_dir.cleanup)
+        outputs_dir = tempfile.TemporaryDirectory(prefix='django_edu_outputs_')
+        self.addCleanup(outputs_dir.cleanup)
+        self.data_dir = data_dir.name
+        self.outputs_dir = outputs_dir.name
+        self.enterContext(override_settings(TESTS_DATA_DIR=self.data_dir,
+                                            RECEIVED_OUTPUTS_DIR=self.outputs_dir))
+
+    def submit(self, ans: str) -> Submission:
+        """ Checked submission of ans, visible to the client session. """
+        checker = Checker()
+        checker.check(self.task, ans)
+        submission = Submission.objects.create(
+            task=self.task, code=ans, status=Submission.Status.done,
+            passed=checker.report.passed, report=checker.report.to_json())
+        session = self.client.session
+        session['submission_ids'] = [submission.id]
+        session.save()
+        return submission
+
+    def test_received(self) -> None:
+        # the first difference is on the last line, far from the start
+        submission = self.submit('for i in range(1, 10):\n    print(i)\nprint(0)\n')
+        mismatch = Report.from_json(submission.report).mismatches[0]
+        self.assertIsNotNone(mismatch.received_file)
+        # test data is not mixed with the outputs
+        self.assertEqual(os.listdir(self.data_dir), [])
+        url = f'/submissions/{submission.id}/tests/1/received/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        received = b''.join(response.streaming_content)  # type: ignore[attr-defined]
+        # the run may be stopped at the difference, before the last line feed
+        self.assertEqual(received.rstrip(), b'1\n2\n3\n4\n5\n6\n7\n8\n9\n0')
+        with self.settings(RECEIVED_OUTPUTS_MAX_AGE=-1):
+            outputs.cleanup()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_cached_report_with_removed_output(self) -> None:
+        ans = 'for i in range(1, 10):\n    print(i)\nprint(0)\n'
+        Checker().check(self.task, ans)
+        with self.assertNumQueries(0):
+            Checker().check(self.task, ans)
+        with self.settings(RECEIVED_OUTPUTS_MAX_AGE=-1):
+            outputs.cleanup()
+        # the cached report would link to the removed output: checked again
+        checker = Checker()
+        with self.assertNumQueries(1):
+            checker.check(self.task, ans)
+        received_file = checker.report.mismatches[0].received_file
+        assert received_file is not None
+        self.assertIsNotNone(outputs.chunks(received_file))
@@ -0,0 +1,83 @@
+"""
+Query counts of loading tasks and tests, checks and pages, that show them:
+they must not grow with the amount of tasks and tests.
+"""
+
+import tempfile
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from django_edu.checker import Checker
+from django_edu.models import Contest, Task, Test
+
+TASKS = 3
+TESTS = 5
+
+
+@override_settings(TESTS_DATA_DIR=tempfile.mkdtemp(prefix='django_edu_tests_'))
+class QueryCountTests(TestCase):
+    """ Tasks and tests are loaded with a constant amount of queries. """
+    contest: Contest
+    task: Task
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.contest = Contest()
+        cls.contest.set_name('Queries')
+        cls.contest.save()
+        for num in range(TASKS):
+            task = Task(ans_type=Task.AnsType.code, comparator=Task.Comparator.tokens)
+            task.set_name(f'Task {num}')
+            task.set_text(f'<p>Sum of numbers {num}</p>')
+            cls.contest.append_task(task)
+            task.save()
+            for test_num in range(TESTS):
+                test = Test()
+                test.set_input(f'{test_num} {num}\n')
+                test.set_output(str(test_num + num))
+                task.append_test(test)
+                test.save()
+        cls.task = cls.contest.get_tasks()[0]
+
+    def setUp(self) -> None:
+        for name in ('verdicts', 'pages'):
+            caches[name].clear()
+
+    def test_get_tasks(self) -> None:
+        with self.assertNumQueries(1):
+            tasks = self.contest.get_tasks()
+        self.assertEqual([task.name for task in tasks],
+                         [f'Task {num}' for num in range(TASKS)])
+
+    def test_get_tests(self) -> None:
+        with self.assertNumQueries(1):
+            tests = self.task.get_tests()
+        self.assertEqual([test.test_output for test in tests],
+                         [str(num) for num in range(TESTS)])
+
+    def test_check(self) -> None:
+        checker = Checker(workers=2)
+        with self.assertNumQueries(1):
+            passed = checker.check(self.task,
+                                   'print(sum(map(int, input().split())))')
+        self.assertTrue(passed)
+        self.assertEqual(checker.report.passed_amount, TESTS)
+
+    def test_tasks_page(self) -> None:
+        url = f'/tasks/{self.contest.id}/2'
+        # the contest, its tasks and the task text; a new session with the shown task
+        # is saved (a savepoint, an existence check and an insert)
+        with self.assertNumQueries(7):
+            response = self.client.get(url)
+        self.assertContains(response, 'Sum of numbers 1')
+        # the page is cached then, only the session is loaded and it is unchanged
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_tests_page(self) -> None:
+        url = f'/tests/{self.task.id}/'
+        # the task, a page of tests and its position; a new session is saved
+        with self.assertNumQueries(7):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['tests_list']), TESTS)
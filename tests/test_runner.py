@@ -0,0 +1,56 @@
+"""
+Compiled solutions cache: it is private to the server user, as its files are run.
+"""
+
+import os
+import shutil
+import stat
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase, override_settings
+
+from django_edu.runner import (CompilerFailure, LANGUAGES, SpawnRunner,
+                               compile_solution)
+
+C_SOLUTION = '#include <stdio.h>\nint main(void) { puts("3"); return 0; }\n'
+
+
+class CacheDirTests(SimpleTestCase):
+    """ Solutions are not run from a directory, that other users may write to. """
+
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory(prefix='django_edu_runner_')
+        self.addCleanup(tmp_dir.cleanup)
+        self.cache_dir = Path(tmp_dir.name) / 'cache'
+        self.enterContext(override_settings(CHECKER_CACHE_DIR=str(self.cache_dir)))
+
+    def test_created_private(self) -> None:
+        path = SpawnRunner.pyc_path(compile_solution('print(3)'))
+        self.assertEqual(stat.S_IMODE(self.cache_dir.stat().st_mode), 0o700)
+        self.assertEqual(stat.S_IMODE(path.parent.stat().st_mode), 0o700)
+        self.assertTrue(path.is_file())
+
+    def test_shared_dir(self) -> None:
+        self.cache_dir.mkdir(mode=0o777)
+        os.chmod(self.cache_dir, 0o777)
+        with self.assertRaises(PermissionError):
+            SpawnRunner.pyc_path(compile_solution('print(3)'))
+
+    def test_shared_dir_executable(self) -> None:
+        if shutil.which(LANGUAGES['c'].toolchain()[0]) is None:
+            self.skipTest('no C compiler')
+        self.cache_dir.mkdir(mode=0o777)
+        os.chmod(self.cache_dir, 0o777)
+        with self.assertRaises(CompilerFailure):
+            compile_solution(C_SOLUTION + '\n', 'c')
+        self.assertFalse(list(self.cache_dir.iterdir()))
+
+    def test_shared_file_replaced(self) -> None:
+        solution = compile_solution('print(4)')
+        path = SpawnRunner.pyc_path(solution)
+        path.write_bytes(b'planted')
+        os.chmod(path, 0o666)
+        self.assertEqual(SpawnRunner.pyc_path(solution), path)
+        self.assertNotEqual(path.read_bytes(), b'planted')
+        self.assertFalse(stat.S_IMODE(path.stat().st_mode) & 0o022)
@@ -0,0 +1,33 @@
+"""
+Pages, that return to the previous page saved in the session.
+"""
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+
+class PrevPageTests(TestCase):
+    """ A missing previous page is the main one. """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        User.objects.create_user('student', password='secret-password')
+
+    def login(self) -> str:
+        """ Log in, return the redirect location. """
+        response = self.client.post('/login/', {'login': 'student',
+                                                'password': 'secret-password'})
+        self.assertEqual(response.status_code, 302)
+        return response['Location']
+
+    def test_login_without_prev_page(self) -> None:
+        self.assertEqual(self.login(), '/')
+
+    def test_login_returns_to_prev_page(self) -> None:
+        self.client.get('/login/', headers={'Referer': '/contests/'})
+        self.assertEqual(self.login(), '/contests/')
+
+    def test_failed_login(self) -> None:
+        response = self.client.post('/login/', {'login': 'student', 'password': ''})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['auth_error'])
@@ -0,0 +1,54 @@
+"""
+Standings: verdicts of submissions are counted in them once.
+"""
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from django_edu.checker import Report
+from django_edu.models import Contest, ContestResult, Submission, Task, TaskResult
+
+
+class RecordTests(TestCase):
+    """ A submission judged again is not counted again. """
+    task: Task
+    user: User
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        contest = Contest()
+        contest.set_name('Standings')
+        contest.save()
+        cls.task = Task(ans_type=Task.AnsType.code)
+        cls.task.set_name('Sum')
+        cls.task.set_text('<p>Sum of two numbers</p>')
+        contest.append_task(cls.task)
+        cls.task.save()
+        cls.user = User.objects.create_user('student')
+
+    def claimed(self) -> Submission:
+        """ A submission, claimed by a judge worker. """
+        Submission.objects.create(task=self.task, user=self.user, code='print(0)')
+        submission = Submission.claim('worker')
+        assert submission is not None
+        return submission
+
+    def test_requeued_failed(self) -> None:
+        first = self.claimed()
+        # the worker is slow, the submission is requeued and claimed again
+        self.assertEqual(Submission.requeue_stale(-1), 1)
+        second = Submission.claim('other')
+        assert second is not None
+        first.finish(False, Report(False).to_json())
+        second.finish(False, Report(False).to_json())
+        result = TaskResult.objects.get(task=self.task, user=self.user)
+        self.assertEqual(result.attempts, 1)
+
+    def test_judged_again(self) -> None:
+        submission = self.claimed()
+        submission.finish(False, Report(False).to_json())
+        # the first verdict is kept
+        submission.finish(True, Report(True).to_json())
+        self.assertEqual(ContestResult.objects.get(user=self.user).solved, 0)
+        self.assertEqual(TaskResult.objects.get(user=self.user).attempts, 1)
+        self.assertFalse(Submission.objects.get(id=submission.id).passed)
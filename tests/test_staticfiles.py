@@ -0,0 +1,62 @@
+"""
+Static files of the production profile: collected with hashed names, css without
+source map references and with compressed copies.
+"""
+
+import gzip
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from django_edu import staticfiles
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': 'django_edu.staticfiles.CompressedManifestStaticFilesStorage',
+    },
+}
+
+
+class CollectStaticTests(SimpleTestCase):
+    """ collectstatic with CompressedManifestStaticFilesStorage. """
+
+    def setUp(self) -> None:
+        static_root = tempfile.TemporaryDirectory(prefix='django_edu_static_')
+        self.addCleanup(static_root.cleanup)
+        self.static_root = Path(static_root.name)
+        self.enterContext(override_settings(STATIC_ROOT=static_root.name,
+                                            STORAGES=STORAGES))
+
+    def collect(self) -> None:
+        """ Collect static files. """
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_source_maps(self) -> None:
+        # the second run finds collected files unmodified
+        for _run in range(2):
+            self.collect()
+        css_files = list(self.static_root.glob('bootstrap.min.*css'))
+        self.assertEqual(len(css_files), 2)
+        for css_file in css_files:
+            self.assertNotIn(b'sourceMappingURL', css_file.read_bytes())
+            compressed = css_file.with_name(css_file.name + '.gz').read_bytes()
+            self.assertEqual(gzip.decompress(compressed), css_file.read_bytes())
+        self.assertFalse(list(self.static_root.glob('*.map')))
+
+    def test_serve(self) -> None:
+        self.collect()
+        hashed = next(self.static_root.glob('tweaks.*.css')).name
+        request = RequestFactory().get(f'/static/{hashed}',
+                                       headers={'Accept-Encoding': 'gzip, deflate'})
+        response = staticfiles.serve(request, hashed)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        response.close()
+        response = staticfiles.serve(RequestFactory().get('/static/tweaks.css'),
+                                     'tweaks.css')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        response.close()
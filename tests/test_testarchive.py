@@ -0,0 +1,116 @@
+"""
+Tests archives: import and export, who may upload them and how large they may be.
+"""
+
+import io
+import os
+import tempfile
+import zipfile
+
+from django.contrib.auth.models import Group, User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from django_edu import roles
+from django_edu.models import Contest, Task
+from django_edu.testarchive import TestsArchiveError, export_tests, import_tests
+
+
+def make_archive(members: dict[str, bytes]) -> bytes:
+    """ Zip archive with the members. """
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, contents in members.items():
+            archive.writestr(name, contents)
+    return data.getvalue()
+
+
+ARCHIVE = make_archive({'01.in': b'1 2\n', '01.out': b'3\n',
+                        '02.in': b'2 2\n', '02.out': b'4\n'})
+
+
+class TestsArchiveTests(TestCase):
+    """ Tests are imported from archives by teachers only. """
+    task: Task
+    teacher: User
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        contest = Contest()
+        contest.set_name('Archives')
+        contest.save()
+        cls.task = Task(ans_type=Task.AnsType.code)
+        cls.task.set_name('Sum')
+        cls.task.set_text('<p>Sum of two numbers</p>')
+        contest.append_task(cls.task)
+        cls.task.save()
+        cls.teacher = User.objects.create_user('teacher')
+        cls.teacher.groups.add(Group.objects.create(name=roles.TEACHERS))
+
+    def setUp(self) -> None:
+        data_dir = tempfile.TemporaryDirectory(prefix='django_edu_tests_')
+        self.addCleanup(data_dir.cleanup)
+        self.data_dir = data_dir.name
+        self.enterContext(override_settings(TESTS_DATA_DIR=self.data_dir))
+
+    def upload(self, archive: bytes) -> int:
+        """ Post the archive to the tests page, return the response status. """
+        response = self.client.post(f'/tests/{self.task.id}/', {
+            'form_descr': 'tests_import',
+            'tests_archive': SimpleUploadedFile('tests.zip', archive),
+        })
+        self.response = response
+        return response.status_code
+
+    def test_import_export(self) -> None:
+        self.assertEqual(import_tests(self.task, io.BytesIO(ARCHIVE)), 2)
+        exported = b''.join(export_tests(self.task))
+        with zipfile.ZipFile(io.BytesIO(exported)) as archive:
+            self.assertEqual({name: archive.read(name) for name in archive.namelist()},
+                             {'01.in': b'1 2\n', '01.out': b'3\n',
+                              '02.in': b'2 2\n', '02.out': b'4\n'})
+
+    def test_anonymous_upload(self) -> None:
+        self.assertEqual(self.upload(ARCHIVE), 404)
+        self.assertEqual(self.task.test_set.count(), 0)
+
+    def test_student_upload(self) -> None:
+        self.client.force_login(User.objects.create_user('student'))
+        with override_settings(TESTS_FILE_THRESHOLD=0):
+            self.assertEqual(self.upload(ARCHIVE), 404)
+        self.assertEqual(self.task.test_set.count(), 0)
+        self.assertEqual(os.listdir(self.data_dir), [])
+
+    def test_teacher_upload(self) -> None:
+        self.client.force_login(self.teacher)
+        self.assertEqual(self.upload(ARCHIVE), 200)
+        self.assertEqual(self.task.test_set.count(), 2)
+
+    @override_settings(TESTS_UPLOAD_MAX_SIZE=2**10)
+    def test_large_archive(self) -> None:
+        self.client.force_login(self.teacher)
+        large = make_archive({'01.in': os.urandom(2**11), '01.out': b'1\n'})
+        self.upload(large)
+        self.assertIn('tests_import_error', self.response.context)
+        self.assertEqual(self.task.test_set.count(), 0)
+
+    @override_settings(TESTS_UPLOAD_MAX_SIZE=2**11)
+    def test_large_unpacked_archive(self) -> None:
+        # compressed below the limit
+        bomb = make_archive({'01.in': b'0' * 2**20, '01.out': b'1\n'})
+        self.assertLess(len(bomb), 2**11)
+        with self.assertRaises(TestsArchiveError):
+            import_tests(self.task, io.BytesIO(bomb))
+        self.assertEqual(self.task.test_set.count(), 0)
+        self.assertEqual(os.listdir(self.data_dir), [])
+
+    @override_settings(TESTS_UPLOAD_MAX_SIZE=2**10)
+    def test_large_test_file(self) -> None:
+        self.client.force_login(self.teacher)
+        response = self.client.post(f'/tests/{self.task.id}/', {
+            'form_descr': 'test_add',
+            'new_test_input_file': SimpleUploadedFile('test.in', b'1' * 2**11),
+            'new_test_output': '1',
+        })
+        self.assertIn('test_input_error', response.context)
+        self.assertEqual(self.task.test_set.count(), 0)